@@ -1,34 +1,92 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, messagebox
 import platform
-import subprocess
-import threading
+import queue
 import os
+import time
 import sys
 
-# --- Administrator Elevation Check (Windows Only) ---
-# This section attempts to re-run the script with administrator privileges on Windows
-# if it's not already running as administrator.
-if platform.system() == "Windows":
-    try:
-        import ctypes
-        # Check if the current process is elevated
-        is_admin = ctypes.windll.shell32.IsUserAnAdmin()
-        if not is_admin:
-            # If not admin, try to re-run the script with 'runas' verb
-            # This will trigger the UAC prompt
-            script_path = os.path.abspath(sys.argv[0])
-            # Use ShellExecuteW for better handling of paths with spaces
-            ctypes.windll.shell32.ShellExecuteW(
-                None, "runas", sys.executable, f'"{script_path}"', None, 1
-            )
-            sys.exit(0) # Exit the current non-elevated process
-    except Exception as e:
-        # Handle cases where ctypes or elevation fails (e.g., non-Windows, or permission issues)
-        # For simplicity, we just print an error and continue without elevation.
-        # A more robust app might show a user-friendly error message.
-        print(f"Failed to check/request admin privileges: {e}")
-# --- End of Administrator Elevation Check ---
+from wlfk_catalog import CATALOG, WINDOWS_VERSIONS, LINUX_DISTROS, WINDOWS, LINUX, MACOS, CommandSearch
+# wlfk_jobs and wlfk_console are imported on first use: they are not needed to paint
+# the main menu and wlfk_jobs alone (concurrent.futures, logging) is a large share of startup.
+
+
+def request_elevation():
+    """On Windows, re-runs the script as Administrator (UAC prompt) if it isn't elevated already."""
+    # --- Administrator Elevation Check (Windows Only) ---
+    # This section attempts to re-run the script with administrator privileges on Windows
+    # if it's not already running as administrator.
+    if platform.system() == "Windows":
+        try:
+            import ctypes
+            # Check if the current process is elevated
+            is_admin = ctypes.windll.shell32.IsUserAnAdmin()
+            if not is_admin:
+                # If not admin, try to re-run the script with 'runas' verb
+                # This will trigger the UAC prompt
+                script_path = os.path.abspath(sys.argv[0])
+                # Use ShellExecuteW for better handling of paths with spaces
+                ctypes.windll.shell32.ShellExecuteW(
+                    None, "runas", sys.executable, f'"{script_path}"', None, 1
+                )
+                sys.exit(0) # Exit the current non-elevated process
+        except Exception as e:
+            # Handle cases where ctypes or elevation fails (e.g., non-Windows, or permission issues)
+            # For simplicity, we just print an error and continue without elevation.
+            # A more robust app might show a user-friendly error message.
+            print(f"Failed to check/request admin privileges: {e}")
+    # --- End of Administrator Elevation Check ---
+
+
+def has_admin_privileges():
+    """True if the tool runs as Administrator (Windows) or root (effective UID 0 on Linux/macOS)."""
+    if platform.system() == "Windows":
+        try:
+            import ctypes
+            return bool(ctypes.windll.shell32.IsUserAnAdmin())
+        except Exception:
+            return False
+    return os.geteuid() == 0
+
+# How often (in ms) the Tk loop drains streamed command output into the consoles.
+OUTPUT_POLL_INTERVAL_MS = 50
+# Lines kept in each output console; older lines are discarded in bulk.
+OUTPUT_MAX_LINES = 50000
+# Commands allowed to run at the same time; further runs wait in the job queue.
+MAX_CONCURRENT_JOBS = 4
+# Added/removed/changed entries listed (each) below a snapshot run's output.
+SNAPSHOT_REPORT_LIMIT = 200
+# Key of the main menu in WLFKTool.screens (the OS screens use the catalog's OS names)
+MAIN_MENU = "Main"
+
+
+class Screen:
+    """A cached screen (main menu or one OS kit) and the widgets its handlers need."""
+
+    def __init__(self, key, frame):
+        self.key = key
+        self.frame = frame
+        self.loading_label = None
+        self.command_search_var = None
+        self.command_search = None # CommandSearch over the selected group's command names
+        self.command_combobox = None
+        self.command_hint = None # Why the selected command can't run here, if it can't
+        self.group = None # Catalog group whose commands are listed
+        self.unavailable = {} # command name -> why it can't run here (see wlfk_capabilities)
+        self.timeout_var = None
+        self.use_cache_var = None # Serve cacheable inventory commands from the result cache
+        self.diagnostics_label = None
+        self.playbook_var = None
+        self.playbook_combobox = None # Playbooks (wlfk_playbooks) of the selected group
+        self.playbook_label = None
+        self.watch_interval_var = None # Seconds between watch-mode runs
+        # Journal analysis options (Linux screen only)
+        self.journal_priority_var = None
+        self.journal_unit_var = None
+        self.journal_kernel_var = None
+        self.journal_follow_var = None
+        self.job_tree = None
+        self.output_notebook = None
 
 
 class WLFKTool:
@@ -38,6 +96,78 @@ class WLFKTool:
         master.geometry("950x750") # Slightly larger default size for more content
         master.resizable(True, True) # Allow resizing
 
+        # Only the styles the main menu needs are configured before the first frame;
+        # the rest is done when the event loop is idle (or before an OS screen is built).
+        self._configure_styles()
+        self._deferred_styles_done = False
+        master.after_idle(self._configure_deferred_styles)
+
+        # Main frame to hold all content
+        self.main_frame = ttk.Frame(master, padding="35 35 35 35", relief='flat', borderwidth=1, style='TFrame') # Added subtle border
+        self.main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Screens are built on first visit and cached; navigating only swaps them
+        self.screens = {} # MAIN_MENU/WINDOWS/LINUX/MACOS -> Screen
+        self.active_screen = None
+
+        # Initialize loading_label as None, it will be created in show_main_menu
+        self.loading_label = None 
+        self.loading_animation_id = None # To store the ID for the loading animation loop
+
+        # Every run is a job on a bounded worker pool, created with the first run (see
+        # _get_job_manager). Workers report output and state changes through
+        # job_manager.events; the Tk loop drains it on a fixed cadence so one
+        # _update_output call covers a whole batch for each job.
+        self.job_manager = None
+        self.job_consoles = {} # job id -> OutputConsole
+        self.job_tabs = {} # job id -> notebook tab (the console, or a frame with the console and a table view)
+        self.job_tables = {} # job id -> TableView, for commands whose output is parsed into a table
+        self.job_screens = {} # job id -> Screen the job was started from
+        self.diagnostics_cancel = None # threading.Event of the diagnostics bundle being collected, if any
+        self.playbook_runs = [] # (screen, wlfk_playbooks.PlaybookRun) of playbooks that are running
+        self.watches = [] # (wlfk_watch.WatchSession, wlfk_console.WatchConsole) of commands being watched
+        self.stopped_watches = [] # WatchSessions stopped while a run was still ending (the run is forgotten then)
+        self.snapshot_jobs = {} # job id -> (group, CatalogEntry, output parts) of runs to store as snapshots
+        self.snapshot_store = None # wlfk_snapshots.SnapshotStore, created on first use
+        self.journal_views = {} # job id -> wlfk_table.JournalView of journal analysis jobs
+        self.dirsize_views = {} # job id -> (root, wlfk_table.DirectorySizeView) of directory size scans
+        master.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # Computed once; drives the non-modal privilege banner
+        self.is_elevated = has_admin_privileges()
+        self.privilege_banner = None
+
+        # Distro/version detection and which commands can run here, probed on a background thread
+        self.capabilities = None # wlfk_capabilities.Capabilities once the probe is done
+        self.detected_os_label = None
+        master.after_idle(self._start_capability_probe)
+
+        # Call show_main_menu after all initializations and method definitions
+        self.show_main_menu()
+
+        # Show the notice about admin/root privileges once the first frame is up
+        master.after_idle(self.display_initial_message)
+
+    def _get_job_manager(self):
+        """Creates the job manager (and starts draining its events) on first use."""
+        if self.job_manager is None:
+            # Commands run, and their output is decoded, parsed and spooled, in a worker process;
+            # this process only renders what it sends (see wlfk_worker).
+            from wlfk_worker import WorkerJobManager
+            from wlfk_spool import SpoolStore
+            broker = False
+            if not self.is_elevated and platform.system() != "Windows":
+                from wlfk_broker import elevation_available
+                # 'sudo ...' commands go to a helper started with root rights on first use.
+                broker = elevation_available()
+            # The GUI's SpoolStore only reads the logs (the worker writes them through) and deletes
+            # runs under the index's file lock.
+            self.job_manager = WorkerJobManager(max_jobs=MAX_CONCURRENT_JOBS, broker=broker, spool=SpoolStore())
+            self.master.after(OUTPUT_POLL_INTERVAL_MS, self._drain_output_queue)
+        return self.job_manager
+        
+    def _configure_styles(self):
+        """Configures the theme, palette and the styles used by the main menu."""
         # Configure default styles for a smoother, 'Windows 11-inspired' look
         self.style = ttk.Style()
         self.style.theme_use('clam') # 'clam' is a good base for customization
@@ -74,7 +204,13 @@ class WLFKTool:
                        bordercolor=[('active', self.hover_color)],
                        lightcolor=[('active', self.hover_color)],
                        darkcolor=[('active', self.hover_color)])
-        
+
+    def _configure_deferred_styles(self):
+        """Configures the styles only the OS screens and the privilege banner use (once)."""
+        if self._deferred_styles_done:
+            return
+        self._deferred_styles_done = True
+
         # Combobox style
         self.style.configure('TCombobox', font=('Segoe UI', 11), padding=7, fieldbackground='white')
         self.style.map('TCombobox', fieldbackground=[('readonly', 'white')], selectbackground=[('readonly', self.secondary_bg)],
@@ -84,35 +220,42 @@ class WLFKTool:
         self.style.configure('TScrolledtext', font=('Consolas', 10), background=self.output_bg, foreground=self.output_fg, 
                              insertbackground=self.output_fg, borderwidth=1, relief='solid', bordercolor=self.border_color)
 
-        # Main frame to hold all content
-        self.main_frame = ttk.Frame(master, padding="35 35 35 35", relief='flat', borderwidth=1, style='TFrame') # Added subtle border
-        self.main_frame.pack(fill=tk.BOTH, expand=True)
-
-        # Initialize loading_label as None, it will be created in show_main_menu
-        self.loading_label = None 
-        self.loading_animation_id = None # To store the ID for the loading animation loop
-
-        # Call show_main_menu after all initializations and method definitions
-        self.show_main_menu()
-        
-    def clear_frame(self, frame):
-        """Clears all widgets from a given frame."""
-        for widget in frame.winfo_children():
-            widget.destroy()
+        # Privilege notice banner
+        self.style.configure('Banner.TFrame', background='#fff4ce')
+        self.style.configure('Banner.TLabel', font=('Segoe UI', 10), background='#fff4ce', foreground='#5c4400', padding=(10, 6))
+
+    def _show_screen(self, key, builder):
+        """Shows a screen, building it on first visit; afterwards it is only swapped in and out."""
+        screen = self.screens.get(key)
+        if screen is None:
+            if key != MAIN_MENU:
+                self._configure_deferred_styles()
+            screen = Screen(key, ttk.Frame(self.main_frame, style='TFrame'))
+            self.screens[key] = screen
+            builder(screen)
+        if self.active_screen is not None and self.active_screen is not screen:
+            self.active_screen.frame.pack_forget()
+        screen.frame.pack(fill=tk.BOTH, expand=True)
+        self.active_screen = screen
+        self.loading_label = screen.loading_label
 
     def show_main_menu(self):
         """Displays the initial menu with Windows, Linux, MacOS buttons and Credits button."""
-        self.clear_frame(self.main_frame)
+        self._show_screen(MAIN_MENU, self._build_main_menu)
+
+    def _build_main_menu(self, screen):
+        """Builds the main menu screen (once)."""
+        parent = screen.frame
 
         # Title
-        ttk.Label(self.main_frame, text="WLFK Tool", style='Heading.TLabel').pack(pady=(20, 10))
-        ttk.Label(self.main_frame, text="Windows/Linux/macOS Fix Kit", font=('Segoe UI', 15, 'italic'), background=self.primary_bg, foreground=self.text_color).pack(pady=(0, 40))
+        ttk.Label(parent, text="WLFK Tool", style='Heading.TLabel').pack(pady=(20, 10))
+        ttk.Label(parent, text="Windows/Linux/macOS Fix Kit", font=('Segoe UI', 15, 'italic'), background=self.primary_bg, foreground=self.text_color).pack(pady=(0, 40))
 
 
-        ttk.Label(self.main_frame, text="Select Your Operating System", style='SubHeading.TLabel').pack(pady=(0, 25))
+        ttk.Label(parent, text="Select Your Operating System", style='SubHeading.TLabel').pack(pady=(0, 25))
 
         # OS Selection Buttons
-        button_frame = ttk.Frame(self.main_frame, style='TFrame')
+        button_frame = ttk.Frame(parent, style='TFrame')
         button_frame.pack(pady=20)
 
         # Windows Button
@@ -128,442 +271,514 @@ class WLFKTool:
         macos_btn.grid(row=0, column=2, padx=20, pady=15)
 
         # Credits Button
-        credits_btn = ttk.Button(self.main_frame, text="Credits", command=self.show_credits, style='TButton')
+        credits_btn = ttk.Button(parent, text="Credits", command=self.show_credits, style='TButton')
         credits_btn.pack(pady=30)
 
         # Current OS Info
         current_os = platform.system()
-        ttk.Label(self.main_frame, text=f"Detected OS: {current_os}", style='Info.TLabel').pack(pady=40)
+        self.detected_os_label = ttk.Label(parent, text=f"Detected OS: {current_os}", style='Info.TLabel')
+        self.detected_os_label.pack(pady=40)
         
         # Create and pack the loading label here for the main menu
-        self.loading_label = ttk.Label(self.main_frame, text="", font=('Segoe UI', 11, 'italic'), foreground=self.accent_color, background=self.primary_bg)
-        self.loading_label.pack(pady=10) # Ensure it's packed
-
-        # Display initial message about admin/root privileges
-        self.display_initial_message()
+        screen.loading_label = ttk.Label(parent, text="", font=('Segoe UI', 11, 'italic'), foreground=self.accent_color, background=self.primary_bg)
+        screen.loading_label.pack(pady=10) # Ensure it's packed
 
     def show_credits(self):
         """Displays the credits information."""
         messagebox.showinfo("Credits", "Created by AbramichS inc. 2015-2025")
 
     def display_initial_message(self):
-        """Displays a message about running with admin/root privileges."""
+        """Shows a dismissible, non-modal banner about admin/root privileges when not elevated."""
+        if self.is_elevated or self.privilege_banner is not None:
+            return
+        self._configure_deferred_styles()
         script_name = os.path.basename(sys.argv[0]) # Get the script's filename
-        messagebox.showinfo("WLFK Tool - Important!",
-                            "For full functionality and to run many system-level commands, "
-                            "please ensure you run this WLFK Tool with Administrator (Windows) "
-                            "or root (Linux/macOS via 'sudo') privileges.\n\n"
-                            "On Windows: Right-click the Python script and select 'Run as administrator'.\n"
-                            f"On Linux/macOS: Run from terminal using 'sudo python {script_name}'.\n\n" # Dynamically use script name
-                            "Remember: 'sudo' is a command for Linux/macOS. Do NOT use it on Windows commands.")
+        if platform.system() == "Windows":
+            notice = ("Not running as Administrator: many system-level commands will fail. "
+                      "Right-click the Python script and select 'Run as administrator'.")
+        elif self._broker_available():
+            notice = ("Not running as root: commands that need root ('sudo ...') are run by a privileged helper. "
+                      "You will be asked for your password once, when the first of them runs.")
+        else:
+            notice = ("Not running as root: many system-level commands will fail. "
+                      f"Run from terminal using 'sudo python {script_name}'. "
+                      "Remember: 'sudo' is a command for Linux/macOS. Do NOT use it on Windows commands.")
+        self.privilege_banner = ttk.Frame(self.master, style='Banner.TFrame')
+        ttk.Button(self.privilege_banner, text="Dismiss", command=self.privilege_banner.pack_forget).pack(side=tk.RIGHT, padx=10, pady=4)
+        ttk.Label(self.privilege_banner, text=notice, style='Banner.TLabel', wraplength=760).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.privilege_banner.pack(fill=tk.X, before=self.main_frame)
+
+    def _start_capability_probe(self):
+        """Probes the distro/version and the installed programs without blocking the window."""
+        import threading
+        from wlfk_capabilities import detect_capabilities
+        results = queue.Queue()
+
+        def worker():
+            try:
+                results.put(detect_capabilities())
+            except Exception:
+                results.put(None) # Nothing is preselected or greyed out then
+
+        threading.Thread(target=worker, name="wlfk-capabilities", daemon=True).start()
+        self._poll_capability_probe(results)
+
+    def _poll_capability_probe(self, results):
+        try:
+            capabilities = results.get_nowait()
+        except queue.Empty:
+            self.master.after(OUTPUT_POLL_INTERVAL_MS * 2, self._poll_capability_probe, results)
+            return
+        if capabilities is None:
+            return
+        self.capabilities = capabilities
+        name = capabilities.os_release.get("PRETTY_NAME") or capabilities.group
+        if name and self.detected_os_label is not None:
+            self.detected_os_label.config(text=f"Detected OS: {platform.system()} ({name})")
+        for screen in self.screens.values():
+            if screen.command_combobox is None:
+                continue
+            if not self._preselect_group(screen) and screen.group is not None:
+                self._set_command_group(screen, screen.group, select_first=False)
+
+    def _preselect_group(self, screen):
+        """Selects this machine's version/distribution on its screen unless one was picked. Returns True if it did."""
+        group = self.capabilities.group if self.capabilities is not None else None
+        if group is None or screen.group is not None:
+            return False
+        if screen.key == LINUX and group in LINUX_DISTROS:
+            self.selected_linux_distro.set(group)
+            self.update_linux_commands()
+            return True
+        if screen.key == WINDOWS and group in WINDOWS_VERSIONS:
+            self.selected_windows_version.set(group)
+            self.update_windows_commands()
+            return True
+        return False
+
+    def _broker_available(self):
+        from wlfk_broker import elevation_available
+        return elevation_available()
 
     def show_windows_menu(self):
         """Displays the Windows specific menu with version selection and command execution."""
-        self.clear_frame(self.main_frame)
+        self._show_screen(WINDOWS, self._build_windows_menu)
+
+    def _build_windows_menu(self, screen):
+        """Builds the Windows screen (once)."""
+        parent = screen.frame
 
-        ttk.Label(self.main_frame, text="Windows Fix Kit", style='Heading.TLabel').pack(pady=(10, 25))
+        ttk.Label(parent, text="Windows Fix Kit", style='Heading.TLabel').pack(pady=(10, 25))
 
         # Back button
-        ttk.Button(self.main_frame, text="← Back to Main Menu", command=self.show_main_menu, style='TButton').pack(anchor=tk.NW, padx=15, pady=15)
+        ttk.Button(parent, text="← Back to Main Menu", command=self.show_main_menu, style='TButton').pack(anchor=tk.NW, padx=15, pady=15)
 
         # Windows Versions
-        ttk.Label(self.main_frame, text="Select Windows Version:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
-        self.windows_versions = ["Windows Vista", "Windows 7", "Windows 8/8.1", "Windows 10", "Windows 11"]
+        ttk.Label(parent, text="Select Windows Version:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
+        self.windows_versions = WINDOWS_VERSIONS
         self.selected_windows_version = tk.StringVar()
-        self.version_combobox = ttk.Combobox(self.main_frame, textvariable=self.selected_windows_version, values=self.windows_versions, state="readonly", font=('Segoe UI', 11), width=35)
+        self.version_combobox = ttk.Combobox(parent, textvariable=self.selected_windows_version, values=self.windows_versions, state="readonly", font=('Segoe UI', 11), width=35)
         self.version_combobox.set("Select a version") # Default text
         self.version_combobox.pack(pady=5, anchor=tk.W, padx=15)
         self.version_combobox.bind("<<ComboboxSelected>>", self.update_windows_commands)
 
-        # Command selection
-        ttk.Label(self.main_frame, text="Select a Command to Run:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
-        self.windows_commands_options = {} # Populated dynamically
+        # Command selection (with fuzzy search over the command names)
         self.selected_windows_command = tk.StringVar()
-        self.command_combobox = ttk.Combobox(self.main_frame, textvariable=self.selected_windows_command, state="readonly", font=('Segoe UI', 11), width=70)
-        self.command_combobox.set("Select a command")
-        self.command_combobox.pack(pady=5, anchor=tk.W, padx=15)
+        self._build_command_picker(screen, self.selected_windows_command)
 
         # Run Command Button
-        run_btn = ttk.Button(self.main_frame, text="Run Selected Command", command=self.run_selected_command, style='TButton')
-        run_btn.pack(pady=25)
+        run_btn = ttk.Button(parent, text="Run Selected Command", command=self.run_selected_command, style='TButton')
+        run_btn.pack(pady=(25, 5))
+        self._build_diagnostics_row(screen)
         
         # Create and pack the loading label here for this menu
-        self.loading_label = ttk.Label(self.main_frame, text="", font=('Segoe UI', 11, 'italic'), foreground=self.accent_color, background=self.primary_bg)
-        self.loading_label.pack(pady=5)
-
-        # Output area
-        ttk.Label(self.main_frame, text="Command Output:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
-        
-        # Frame for output text and copy button
-        output_frame = ttk.Frame(self.main_frame, style='TFrame')
+        screen.loading_label = ttk.Label(parent, text="", font=('Segoe UI', 11, 'italic'), foreground=self.accent_color, background=self.primary_bg)
+        screen.loading_label.pack(pady=5)
+
+        # Output area (job list + one output tab per run)
+        self._build_output_area(screen)
+        self._preselect_group(screen)
+
+
+    def _build_diagnostics_row(self, screen):
+        """Builds the 'Collect Diagnostics' button and its progress label."""
+        row = ttk.Frame(screen.frame, style='TFrame')
+        row.pack(pady=(0, 20))
+        ttk.Button(row, text="Collect Diagnostics...", command=self.collect_diagnostics, style='TButton').pack(side=tk.LEFT)
+        screen.diagnostics_label = ttk.Label(row, text="", style='Info.TLabel')
+        screen.diagnostics_label.pack(side=tk.LEFT, padx=10)
+
+        # Repair playbooks: multi-step workflows for the selected version/distribution
+        row = ttk.Frame(screen.frame, style='TFrame')
+        row.pack(pady=(0, 10))
+        ttk.Label(row, text="Playbook:", style='TLabel').pack(side=tk.LEFT)
+        screen.playbook_var = tk.StringVar()
+        screen.playbook_combobox = ttk.Combobox(row, textvariable=screen.playbook_var, state="readonly", width=25, font=('Segoe UI', 11))
+        screen.playbook_combobox.pack(side=tk.LEFT, padx=5)
+        ttk.Button(row, text="Run Playbook", command=self.run_selected_playbook, style='TButton').pack(side=tk.LEFT, padx=5)
+        ttk.Button(row, text="Cancel Playbook", command=self.cancel_playbooks, style='TButton').pack(side=tk.LEFT)
+        screen.playbook_label = ttk.Label(screen.frame, text="", style='Info.TLabel')
+        screen.playbook_label.pack(pady=(0, 10))
+
+        # Watch mode: re-run the selected read-only command on an interval in its own tab
+        row = ttk.Frame(screen.frame, style='TFrame')
+        row.pack(pady=(0, 10))
+        ttk.Label(row, text="Watch every (s):", style='TLabel').pack(side=tk.LEFT)
+        screen.watch_interval_var = tk.StringVar(value="2")
+        ttk.Spinbox(row, from_=0.5, to=3600, increment=1, textvariable=screen.watch_interval_var, width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Button(row, text="Watch Command", command=self.watch_selected_command, style='TButton').pack(side=tk.LEFT, padx=5)
+        ttk.Button(row, text="Stop Watching", command=self.stop_selected_watch, style='TButton').pack(side=tk.LEFT)
+        ttk.Button(row, text="Take Snapshot", command=self.snapshot_selected_command, style='TButton').pack(side=tk.LEFT, padx=(20, 0))
+
+        if screen.key == LINUX:
+            # Journal analysis: journalctl -o json aggregated into one row per distinct message
+            row = ttk.Frame(screen.frame, style='TFrame')
+            row.pack(pady=(0, 10))
+            ttk.Label(row, text="Journal priority up to:", style='TLabel').pack(side=tk.LEFT)
+            screen.journal_priority_var = tk.StringVar(value="all")
+            ttk.Combobox(row, textvariable=screen.journal_priority_var, state="readonly", width=8,
+                         values=("all", "emerg", "alert", "crit", "err", "warning", "notice", "info", "debug")).pack(side=tk.LEFT, padx=5)
+            ttk.Label(row, text="Unit:", style='TLabel').pack(side=tk.LEFT)
+            screen.journal_unit_var = tk.StringVar()
+            ttk.Entry(row, textvariable=screen.journal_unit_var, width=18).pack(side=tk.LEFT, padx=5)
+            screen.journal_kernel_var = tk.BooleanVar(value=False)
+            ttk.Checkbutton(row, text="Kernel only", variable=screen.journal_kernel_var).pack(side=tk.LEFT, padx=5)
+            screen.journal_follow_var = tk.BooleanVar(value=False)
+            ttk.Checkbutton(row, text="Follow live", variable=screen.journal_follow_var).pack(side=tk.LEFT, padx=5)
+            ttk.Button(row, text="Analyze Journal", command=self.analyze_journal, style='TButton').pack(side=tk.LEFT, padx=5)
+
+    def _build_output_area(self, screen):
+        """Builds the job list, the per-job output tabs and the job controls of a screen."""
+        ttk.Label(screen.frame, text="Command Output:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
+
+        # Frame for the jobs/output on the left and the job buttons on the right
+        output_frame = ttk.Frame(screen.frame, style='TFrame')
         output_frame.pack(expand=True, fill=tk.BOTH, padx=15)
 
-        # Increased height for output text area
-        self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, width=80, height=20, font=('Consolas', 10), background=self.output_bg, foreground=self.output_fg, insertbackground=self.output_fg)
-        self.output_text.pack(side=tk.LEFT, expand=True, fill=tk.BOTH, padx=(0, 10))
-        self.output_text.config(state=tk.DISABLED) # Make it read-only
-        
-        copy_btn = ttk.Button(output_frame, text="Copy Output", command=self.copy_output, style='TButton')
-        copy_btn.pack(side=tk.RIGHT, anchor=tk.N, pady=5)
+        controls = ttk.Frame(output_frame, style='TFrame')
+        controls.pack(side=tk.RIGHT, anchor=tk.N, fill=tk.Y)
+        ttk.Button(controls, text="Cancel Job", command=self.cancel_selected_job, style='TButton').pack(fill=tk.X, pady=5)
+        ttk.Button(controls, text="Close Tab", command=self.close_selected_job, style='TButton').pack(fill=tk.X, pady=5)
+        ttk.Button(controls, text="Copy Output", command=self.copy_output, style='TButton').pack(fill=tk.X, pady=5)
+        ttk.Button(controls, text="Save Output...", command=self.save_output, style='TButton').pack(fill=tk.X, pady=5)
+        ttk.Button(controls, text="Refresh", command=self.refresh_selected_job, style='TButton').pack(fill=tk.X, pady=5)
+        ttk.Button(controls, text="Run Statistics", command=self.show_run_statistics, style='TButton').pack(fill=tk.X, pady=5)
+        ttk.Button(controls, text="Run History...", command=self.show_run_history, style='TButton').pack(fill=tk.X, pady=5)
+        screen.use_cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(controls, text="Use cached results\n(inventory commands)", variable=screen.use_cache_var).pack(anchor=tk.W, pady=(10, 0))
+        ttk.Label(controls, text="Timeout (s, 0 = none):", style='TLabel').pack(anchor=tk.W, pady=(15, 0))
+        screen.timeout_var = tk.StringVar(value="0")
+        ttk.Spinbox(controls, from_=0, to=86400, increment=30, textvariable=screen.timeout_var, width=8).pack(anchor=tk.W)
+
+        jobs_frame = ttk.Frame(output_frame, style='TFrame')
+        jobs_frame.pack(side=tk.LEFT, expand=True, fill=tk.BOTH, padx=(0, 10))
+
+        # Job list: state, runtime and exit code of every run started from this screen
+        screen.job_tree = ttk.Treeview(jobs_frame, columns=("command", "state", "runtime", "exit"), show="headings", height=4, selectmode="browse")
+        for column, heading, width in (("command", "Command", 320), ("state", "State", 90), ("runtime", "Runtime", 80), ("exit", "Exit Code", 80)):
+            screen.job_tree.heading(column, text=heading)
+            screen.job_tree.column(column, width=width, stretch=(column == "command"))
+        screen.job_tree.pack(fill=tk.X, pady=(0, 8))
+        screen.job_tree.bind("<<TreeviewSelect>>", lambda event: self._on_job_selected(screen))
+
+        # One tab per job, each with its own bounded console
+        screen.output_notebook = ttk.Notebook(jobs_frame)
+        screen.output_notebook.pack(expand=True, fill=tk.BOTH)
+        screen.output_notebook.bind("<<NotebookTabChanged>>", lambda event: self._on_tab_changed(screen))
+
+    def _add_job_tab(self, screen, job, table=None):
+        """Creates the output tab for a new job on a screen and selects it.
+
+        With a table (a wlfk_parsers parser name) the tab shows the parsed table and
+        can be switched to the raw output.
+        """
+        from wlfk_console import OutputConsole
+        tab = screen.output_notebook
+        if table:
+            from wlfk_table import TableView
+            tab = ttk.Frame(screen.output_notebook, style='TFrame')
+        console = OutputConsole(tab, max_lines=OUTPUT_MAX_LINES, font=('Consolas', 10), background=self.output_bg, foreground=self.output_fg, style='TFrame')
+        if table:
+            table_view = TableView(tab, table, self.job_manager.parsed(job), style='TFrame')
+            view = tk.StringVar(value="table")
+            show_view = lambda: (table_view if view.get() == "table" else console).tkraise()
+            switch = ttk.Frame(tab, style='TFrame')
+            ttk.Radiobutton(switch, text="Table", value="table", variable=view, command=show_view).pack(side=tk.LEFT)
+            ttk.Radiobutton(switch, text="Raw output", value="raw", variable=view, command=show_view).pack(side=tk.LEFT, padx=10)
+            switch.grid(row=0, column=0, sticky="w", pady=(0, 4))
+            console.grid(row=1, column=0, sticky="nsew")
+            table_view.grid(row=1, column=0, sticky="nsew")
+            tab.rowconfigure(1, weight=1)
+            tab.columnconfigure(0, weight=1)
+            self.job_tables[job.id] = table_view
+        else:
+            tab = console
+        screen.output_notebook.add(tab, text=f"#{job.id} {job.name}")
+        screen.output_notebook.select(tab)
+        self.job_consoles[job.id] = console
+        self.job_tabs[job.id] = tab
+        self.job_screens[job.id] = screen
+        return console
+
+    def _refresh_job_row(self, job):
+        """Inserts or updates a job's row in the job list of the screen it was started from."""
+        screen = self.job_screens.get(job.id)
+        if screen is None:
+            return
+        state = f"{job.state} (cached)" if job.cached_at is not None else job.state
+        values = (f"#{job.id} {job.name}", state, f"{job.runtime:.1f}s", "" if job.returncode is None else job.returncode)
+        row = str(job.id)
+        if screen.job_tree.exists(row):
+            screen.job_tree.item(row, values=values)
+        else:
+            screen.job_tree.insert("", 0, iid=row, values=values)
+
+    def _selected_job(self):
+        """Returns the job selected in the active screen's job list (kept in sync with its tabs), or None."""
+        screen = self.active_screen
+        if screen is None or screen.job_tree is None:
+            return None
+        selection = screen.job_tree.selection()
+        if not selection or self.job_manager is None:
+            return None
+        return self.job_manager.jobs.get(int(selection[0]))
+
+    def _on_job_selected(self, screen):
+        """Shows the output tab of the job picked in the job list."""
+        selection = screen.job_tree.selection()
+        tab = self.job_tabs.get(int(selection[0])) if selection else None
+        if tab is not None and screen.output_notebook.select() != str(tab):
+            screen.output_notebook.select(tab)
+
+    def _on_tab_changed(self, screen):
+        """Selects the job list row of the output tab that was brought to the front."""
+        if not screen.output_notebook.select():
+            return
+        selected = screen.output_notebook.nametowidget(screen.output_notebook.select())
+        for job_id, tab in self.job_tabs.items():
+            if tab is selected and screen.job_tree.exists(str(job_id)):
+                if screen.job_tree.selection() != (str(job_id),):
+                    screen.job_tree.selection_set(str(job_id))
+                break
 
+    def cancel_selected_job(self):
+        """Stops the selected job, killing its whole process group."""
+        job = self._selected_job()
+        if job is None or job.done:
+            messagebox.showinfo("Cancel Job", "Select a queued or running job to cancel.")
+            return
+        self.job_manager.cancel(job)
 
-    def update_windows_commands(self, event=None):
-        """Updates the command combobox based on the selected Windows version."""
-        version = self.selected_windows_version.get()
-        # Common Windows Fix Commands (placeholders)
-        # Note: Many of these require Administrator privileges.
-        self.windows_commands_options = {
-            "Windows Vista": {
-                "System File Checker (SFC)": "sfc /scannow",
-                "Check Disk (C:)": "chkdsk C: /f /r",
-                "Restore Point (System Restore)": "rstrui.exe", # Opens GUI
-                "Network Reset (Winsock)": "netsh winsock reset",
-                "IP Configuration Reset": "netsh int ip reset",
-                "Flush DNS Cache": "ipconfig /flushdns",
-                "View Network Config": "ipconfig /all",
-                "View Running Processes": "tasklist",
-                "View Active Network Connections": "netstat -ano",
-                "Disk Cleanup": "cleanmgr.exe", # Opens GUI
-                "System Configuration (msconfig)": "msconfig.exe", # Opens GUI
-                "Check System Health": "perfmon /report" # Generates system health report
-            },
-            "Windows 7": {
-                "System File Checker (SFC)": "sfc /scannow",
-                "Check Disk (C:)": "chkdsk C: /f /r",
-                "Deployment Image Servicing and Management (DISM)": "dism /online /cleanup-image /restorehealth",
-                "Restore Point (System Restore)": "rstrui.exe",
-                "Network Reset (Winsock)": "netsh winsock reset",
-                "IP Configuration Reset": "netsh int ip reset",
-                "Flush DNS Cache": "ipconfig /flushdns",
-                "View Network Config": "ipconfig /all",
-                "View Running Processes": "tasklist",
-                "View Active Network Connections": "netstat -ano",
-                "System Information": "msinfo32",
-                "Disk Cleanup": "cleanmgr.exe",
-                "System Configuration (msconfig)": "msconfig.exe",
-                "Event Viewer": "eventvwr.msc",
-                "Check System Health": "perfmon /report",
-                "Run Disk Defragmenter": "defrag C: /U /V"
-            },
-            "Windows 8/8.1": {
-                "System File Checker (SFC)": "sfc /scannow",
-                "Check Disk (C:)": "chkdsk C: /f /r",
-                "Deployment Image Servicing and Management (DISM)": "dism /online /cleanup-image /restorehealth",
-                "Restore Point (System Restore)": "rstrui.exe",
-                "Network Reset (Winsock)": "netsh winsock reset",
-                "IP Configuration Reset": "netsh int ip reset",
-                "Flush DNS Cache": "ipconfig /flushdns",
-                "View Network Config": "ipconfig /all",
-                "View Running Processes": "tasklist",
-                "View Active Network Connections": "netstat -ano",
-                "System Information": "msinfo32",
-                "Disk Cleanup": "cleanmgr.exe",
-                "System Configuration (msconfig)": "msconfig.exe",
-                "Event Viewer": "eventvwr.msc",
-                "Check System Health": "perfmon /report",
-                "Run Disk Defragmenter": "defrag C: /U /V"
-            },
-            "Windows 10": {
-                "System File Checker (SFC)": "sfc /scannow",
-                "Check Disk (C:)": "chkdsk C: /f /r",
-                "Deployment Image Servicing and Management (DISM)": "dism /online /cleanup-image /restorehealth",
-                "Restore Point (System Restore)": "rstrui.exe",
-                "Network Reset (Winsock)": "netsh winsock reset",
-                "IP Configuration Reset": "netsh int ip reset",
-                "Flush DNS Cache": "ipconfig /flushdns",
-                "View Network Config": "ipconfig /all",
-                "View Running Processes": "tasklist",
-                "View Active Network Connections": "netstat -ano",
-                "Power Troubleshooter": "msdt.exe -id PowerDiagnostic",
-                "Windows Update Troubleshooter": "msdt.exe -id WindowsUpdateDiagnostic",
-                "Battery Health Report (Laptops)": "powercfg /batteryreport",
-                "DirectX Diagnostic Tool": "dxdiag",
-                "Disk Cleanup": "cleanmgr.exe",
-                "System Configuration (msconfig)": "msconfig.exe",
-                "Event Viewer": "eventvwr.msc",
-                "Open Services": "services.msc",
-                "Open Device Manager": "devmgmt.msc",
-                "Check System Health": "perfmon /report",
-                "Run Disk Defragmenter": "defrag C: /U /V"
-            },
-            "Windows 11": {
-                "System File Checker (SFC)": "sfc /scannow",
-                "Check Disk (C:)": "chkdsk C: /f /r",
-                "Deployment Image Servicing and Management (DISM)": "dism /online /cleanup-image /restorehealth",
-                "Restore Point (System Restore)": "rstrui.exe",
-                "Network Reset (Winsock)": "netsh winsock reset",
-                "IP Configuration Reset": "netsh int ip reset",
-                "Flush DNS Cache": "ipconfig /flushdns",
-                "View Network Config": "ipconfig /all",
-                "View Running Processes": "tasklist",
-                "View Active Network Connections": "netstat -ano",
-                "Power Troubleshooter": "msdt.exe -id PowerDiagnostic",
-                "Windows Update Troubleshooter": "msdt.exe -id WindowsUpdateDiagnostic",
-                "Startup Repair": "shutdown /r /o /f /t 0", # Reboots into advanced startup options
-                "Battery Health Report (Laptops)": "powercfg /batteryreport",
-                "DirectX Diagnostic Tool": "dxdiag",
-                "Disk Cleanup": "cleanmgr.exe",
-                "System Configuration (msconfig)": "msconfig.exe",
-                "Event Viewer": "eventvwr.msc",
-                "Open Services": "services.msc",
-                "Open Device Manager": "devmgmt.msc",
-                "Check System Health": "perfmon /report",
-                "Run Disk Defragmenter": "defrag C: /U /V"
-            }
-        }
-        commands = list(self.windows_commands_options.get(version, {}).keys())
-        self.command_combobox['values'] = commands
+    def refresh_selected_job(self):
+        """Runs the selected job's command again in a new tab, bypassing (and updating) the result cache."""
+        job = self._selected_job()
+        if job is None or not job.done:
+            messagebox.showinfo("Refresh", "Select a finished job to run it again.")
+            return
+        if job.id in self.dirsize_views:
+            # A full rescan: the cache can't tell that a file grew in place.
+            self.analyze_directory_sizes(self.active_screen, job.timeout, root=self.dirsize_views[job.id][0],
+                                         refresh=True)
+            return
+        table_view = self.job_tables.get(job.id)
+        self._start_job(self.active_screen, job.name, job.command, timeout=job.timeout, launches_gui=job.launches_gui,
+                        probe=job.probe, cache_paths=job.cache_paths, refresh=True,
+                        table=table_view.table if table_view is not None else None)
+
+    def close_selected_job(self):
+        """Removes a finished job's tab and row (or stops and removes the selected watch tab)."""
+        watch = self._selected_watch()
+        if watch is not None:
+            self._stop_watch(watch)
+            watch[1].destroy()
+            return
+        job = self._selected_job()
+        if job is None:
+            return
+        if not job.done:
+            messagebox.showinfo("Close Tab", "Cancel the job or wait for it to finish before closing its tab.")
+            return
+        self.job_manager.forget(job)
+        self.job_consoles.pop(job.id, None)
+        self.job_tables.pop(job.id, None)
+        self.journal_views.pop(job.id, None)
+        self.dirsize_views.pop(job.id, None)
+        tab = self.job_tabs.pop(job.id, None)
+        if tab is not None:
+            tab.destroy()
+        screen = self.job_screens.pop(job.id, None)
+        if screen is not None and screen.job_tree.exists(str(job.id)):
+            screen.job_tree.delete(str(job.id))
+
+    def _build_command_picker(self, screen, variable):
+        """Builds the command search box and command combobox of a screen."""
+        ttk.Label(screen.frame, text="Select a Command to Run:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
+
+        search_frame = ttk.Frame(screen.frame, style='TFrame')
+        search_frame.pack(anchor=tk.W, padx=15)
+        ttk.Label(search_frame, text="Search:", style='TLabel').pack(side=tk.LEFT)
+        screen.command_search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=screen.command_search_var, font=('Segoe UI', 11), width=40).pack(side=tk.LEFT)
+        screen.command_search_var.trace_add("write", lambda *args: self._filter_commands(screen))
+
+        screen.command_combobox = ttk.Combobox(screen.frame, textvariable=variable, state="readonly", font=('Segoe UI', 11), width=70)
+        screen.command_combobox.set("Select a command")
+        screen.command_combobox.pack(pady=5, anchor=tk.W, padx=15)
+        screen.command_hint = ttk.Label(screen.frame, text="", style='Info.TLabel')
+        screen.command_hint.pack(anchor=tk.W, padx=15)
+        variable.trace_add("write", lambda *args: self._show_command_hint(screen))
+        # Commands that can't run here are greyed out in the dropdown. Its listbox is refilled
+        # every time it opens, so they are marked each time the popdown is mapped.
+        try:
+            popdown = screen.command_combobox.tk.call("ttk::combobox::PopdownWindow", screen.command_combobox)
+            mark = screen.command_combobox.register(lambda: self._grey_unavailable(screen, f"{popdown}.f.l"))
+            screen.command_combobox.tk.call("bind", popdown, "<Map>", "+" + mark)
+        except tk.TclError:
+            pass # A Tk without the ttk::combobox internals: the hint label still explains
+
+    def _grey_unavailable(self, screen, listbox):
+        for index, name in enumerate(screen.command_combobox.cget("values")):
+            if name in screen.unavailable:
+                self.master.tk.call(listbox, "itemconfigure", index, "-foreground", "#9aa0a6")
+
+    def _show_command_hint(self, screen):
+        reason = screen.unavailable.get(screen.command_combobox.get())
+        screen.command_hint.config(text=f"Can't run here: {reason}" if reason else "")
+
+    def _set_command_group(self, screen, group, select_first=True):
+        """Shows the commands of a catalog group; a lookup, the catalog itself is built once."""
+        screen.group = group
+        screen.unavailable = self.capabilities.unavailable(group) if self.capabilities is not None else {}
+        screen.command_search = CommandSearch(CATALOG.names(group))
+        self._filter_commands(screen, select_first=select_first)
+        if screen.playbook_combobox is not None:
+            from wlfk_playbooks import playbooks
+            names = [playbook.name for playbook in playbooks(group)]
+            screen.playbook_combobox['values'] = names
+            screen.playbook_var.set(names[0] if names else "No playbooks available")
+
+    def _filter_commands(self, screen, select_first=True):
+        """Narrows the command combobox to the names matching the search box, best match first."""
+        if screen.command_search is None: # No version/distro selected yet
+            return
+        commands = screen.command_search.search(screen.command_search_var.get())
+        screen.command_combobox['values'] = commands
+        self._show_command_hint(screen)
+        if not select_first:
+            return
         if commands:
-            self.command_combobox.set(commands[0]) # Set first command as default
+            screen.command_combobox.set(commands[0]) # Set best (or first) command as default
+        elif screen.command_search.names:
+            screen.command_combobox.set("No matching commands")
         else:
-            self.command_combobox.set("No commands available")
+            screen.command_combobox.set("No commands available")
+
+    def update_windows_commands(self, event=None):
+        """Updates the command combobox based on the selected Windows version."""
+        self._set_command_group(self.screens[WINDOWS], self.selected_windows_version.get())
 
     def show_linux_menu(self):
         """Displays the Linux specific menu with distribution selection and command execution."""
-        self.clear_frame(self.main_frame)
+        self._show_screen(LINUX, self._build_linux_menu)
 
-        ttk.Label(self.main_frame, text="Linux Fix Kit", style='Heading.TLabel').pack(pady=(10, 25))
+    def _build_linux_menu(self, screen):
+        """Builds the Linux screen (once)."""
+        parent = screen.frame
+
+        ttk.Label(parent, text="Linux Fix Kit", style='Heading.TLabel').pack(pady=(10, 25))
 
         # Back button
-        ttk.Button(self.main_frame, text="← Back to Main Menu", command=self.show_main_menu, style='TButton').pack(anchor=tk.NW, padx=15, pady=15)
+        ttk.Button(parent, text="← Back to Main Menu", command=self.show_main_menu, style='TButton').pack(anchor=tk.NW, padx=15, pady=15)
 
         # Linux Distros
-        ttk.Label(self.main_frame, text="Select Linux Distribution:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
-        self.linux_distros = ["Ubuntu/Debian", "Fedora/CentOS/RHEL", "Arch Linux", "OpenSUSE", "Generic Linux"]
+        ttk.Label(parent, text="Select Linux Distribution:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
+        self.linux_distros = LINUX_DISTROS
         self.selected_linux_distro = tk.StringVar()
-        self.distro_combobox = ttk.Combobox(self.main_frame, textvariable=self.selected_linux_distro, values=self.linux_distros, state="readonly", font=('Segoe UI', 11), width=35)
+        self.distro_combobox = ttk.Combobox(parent, textvariable=self.selected_linux_distro, values=self.linux_distros, state="readonly", font=('Segoe UI', 11), width=35)
         self.distro_combobox.set("Select a distribution") # Default text
         self.distro_combobox.pack(pady=5, anchor=tk.W, padx=15)
         self.distro_combobox.bind("<<ComboboxSelected>>", self.update_linux_commands)
 
-        # Command selection
-        ttk.Label(self.main_frame, text="Select a Command to Run:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
-        self.linux_commands_options = {} # Populated dynamically
+        # Command selection (with fuzzy search over the command names)
         self.selected_linux_command = tk.StringVar()
-        self.command_combobox = ttk.Combobox(self.main_frame, textvariable=self.selected_linux_command, state="readonly", font=('Segoe UI', 11), width=70)
-        self.command_combobox.set("Select a command")
-        self.command_combobox.pack(pady=5, anchor=tk.W, padx=15)
+        self._build_command_picker(screen, self.selected_linux_command)
 
         # Run Command Button
-        run_btn = ttk.Button(self.main_frame, text="Run Selected Command", command=self.run_selected_command, style='TButton')
-        run_btn.pack(pady=25)
+        run_btn = ttk.Button(parent, text="Run Selected Command", command=self.run_selected_command, style='TButton')
+        run_btn.pack(pady=(25, 5))
+        self._build_diagnostics_row(screen)
         
         # Create and pack the loading label here for this menu
-        self.loading_label = ttk.Label(self.main_frame, text="", font=('Segoe UI', 11, 'italic'), foreground=self.accent_color, background=self.primary_bg)
-        self.loading_label.pack(pady=5)
+        screen.loading_label = ttk.Label(parent, text="", font=('Segoe UI', 11, 'italic'), foreground=self.accent_color, background=self.primary_bg)
+        screen.loading_label.pack(pady=5)
 
-        # Output area
-        ttk.Label(self.main_frame, text="Command Output:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
-        
-        # Frame for output text and copy button
-        output_frame = ttk.Frame(self.main_frame, style='TFrame')
-        output_frame.pack(expand=True, fill=tk.BOTH, padx=15)
+        # Live monitor (sampled from /proc, so only on Linux itself)
+        if platform.system() == "Linux":
+            from wlfk_monitor import MonitorPanel # Only needed once the Linux screen is opened
+            ttk.Label(parent, text="Live Monitor:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
+            self.monitor_panel = MonitorPanel(parent, background=self.output_bg, foreground=self.output_fg)
+            self.monitor_panel.pack(fill=tk.X, padx=15)
 
-        # Increased height for output text area
-        self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, width=80, height=20, font=('Consolas', 10), background=self.output_bg, foreground=self.output_fg, insertbackground=self.output_fg)
-        self.output_text.pack(side=tk.LEFT, expand=True, fill=tk.BOTH, padx=(0, 10))
-        self.output_text.config(state=tk.DISABLED) # Make it read-only
-        
-        copy_btn = ttk.Button(output_frame, text="Copy Output", command=self.copy_output, style='TButton')
-        copy_btn.pack(side=tk.RIGHT, anchor=tk.N, pady=5)
+        # Output area (job list + one output tab per run)
+        self._build_output_area(screen)
+        self._preselect_group(screen)
 
 
     def update_linux_commands(self, event=None):
         """Updates the command combobox based on the selected Linux distribution."""
-        distro = self.selected_linux_distro.get()
-        # Common Linux Fix Commands (placeholders)
-        # Note: Many of these require root/sudo privileges.
-        self.linux_commands_options = {
-            "Ubuntu/Debian": {
-                "Update & Upgrade Packages": "sudo apt update && sudo apt upgrade -y",
-                "Clean APT Cache": "sudo apt clean && sudo apt autoremove -y",
-                "Fix Broken Packages": "sudo apt install -f",
-                "Reconfigure All Packages": "sudo dpkg --configure -a",
-                "Check Disk (e.g., /dev/sda1)": "echo 'Remember to unmount partition first: sudo umount /dev/sda1; sudo fsck /dev/sda1'",
-                "View System Journal": "journalctl -xe",
-                "Follow System Journal (Live)": "journalctl -f",
-                "View Running Processes": "ps aux",
-                "Restart Networking Service": "sudo systemctl restart networking",
-                "List Hardware": "sudo lshw -short",
-                "List Disk Partitions": "sudo fdisk -l",
-                "Fix Missing Packages": "sudo apt-get update --fix-missing",
-                "View Network Connections": "netstat -tulnp",
-                "Check Systemd Status": "systemctl status",
-                "List Installed Packages": "dpkg -l",
-                "Show Disk Usage (Graphical)": "gnome-disks", # Requires gnome-disks to be installed
-                "Check for Dead Processes": "ps aux | grep 'Z'", # Z for zombie processes
-                "Show Open Files": "lsof -i",
-                "Check CPU Usage": "top -bn1 | grep 'Cpu(s)' | sed 's/.*, *\\([0-9.]*\\)%*id.*/\\1/' | awk '{print 100 - $1}'"
-            },
-            "Fedora/CentOS/RHEL": {
-                "Update & Upgrade Packages": "sudo dnf update -y",
-                "Clean DNF Cache": "sudo dnf clean all",
-                "Check Disk (e.g., /dev/sda1)": "echo 'Remember to unmount partition first: sudo umount /dev/sda1; sudo fsck /dev/sda1'",
-                "View System Journal": "journalctl -xe",
-                "Follow System Journal (Live)": "journalctl -f",
-                "View Running Processes": "ps aux",
-                "Restart NetworkManager Service": "sudo systemctl restart NetworkManager",
-                "List Hardware": "sudo lshw -short",
-                "List Disk Partitions": "sudo fdisk -l",
-                "View Network Connections": "netstat -tulnp",
-                "Check Systemd Status": "systemctl status",
-                "List Installed Packages": "rpm -qa",
-                "Check for Dead Processes": "ps aux | grep 'Z'",
-                "Show Open Files": "lsof -i",
-                "Check CPU Usage": "top -bn1 | grep 'Cpu(s)' | sed 's/.*, *\\([0-9.]*\\)%*id.*/\\1/' | awk '{print 100 - $1}'"
-            },
-            "Arch Linux": {
-                "Update & Upgrade Packages": "sudo pacman -Syu",
-                "Clean Pacman Cache": "sudo pacman -Sc",
-                "Check Disk (e.g., /dev/sda1)": "echo 'Remember to unmount partition first: sudo umount /dev/sda1; sudo fsck /dev/sda1'",
-                "View System Journal": "journalctl -xe",
-                "Follow System Journal (Live)": "journalctl -f",
-                "View Running Processes": "ps aux",
-                "Restart NetworkManager Service": "sudo systemctl restart NetworkManager",
-                "List Hardware": "sudo lshw -short",
-                "List Disk Partitions": "sudo fdisk -l",
-                "View Network Connections": "netstat -tulnp",
-                "Check Systemd Status": "systemctl status",
-                "List Installed Packages": "pacman -Q",
-                "Check for Dead Processes": "ps aux | grep 'Z'",
-                "Show Open Files": "lsof -i",
-                "Check CPU Usage": "top -bn1 | grep 'Cpu(s)' | sed 's/.*, *\\([0-9.]*\\)%*id.*/\\1/' | awk '{print 100 - $1}'"
-            },
-            "OpenSUSE": {
-                "Update & Upgrade Packages": "sudo zypper update -y",
-                "Clean Zypper Cache": "sudo zypper clean",
-                "Check Disk (e.g., /dev/sda1)": "echo 'Remember to unmount partition first: sudo umount /dev/sda1; sudo fsck /dev/sda1'",
-                "View System Journal": "journalctl -xe",
-                "Follow System Journal (Live)": "journalctl -f",
-                "View Running Processes": "ps aux",
-                "Restart NetworkManager Service": "sudo systemctl restart NetworkManager",
-                "List Hardware": "sudo lshw -short",
-                "List Disk Partitions": "sudo fdisk -l",
-                "View Network Connections": "netstat -tulnp",
-                "Check Systemd Status": "systemctl status",
-                "List Installed Packages": "rpm -qa",
-                "Check for Dead Processes": "ps aux | grep 'Z'",
-                "Show Open Files": "lsof -i",
-                "Check CPU Usage": "top -bn1 | grep 'Cpu(s)' | sed 's/.*, *\\([0-9.]*\\)%*id.*/\\1/' | awk '{print 100 - $1}'"
-            },
-            "Generic Linux": {
-                "View Disk Usage": "df -h",
-                "View Memory Usage": "free -h",
-                "List Running Services": "systemctl list-units --type=service --state=running",
-                "View Network Interfaces": "ip a",
-                "Ping Google": "ping -c 4 google.com",
-                "Check DNS Resolution": "nslookup google.com",
-                "Check Uptime": "uptime",
-                "View Kernel Messages": "dmesg | tail",
-                "View CPU Info": "lscpu",
-                "View PCI Devices": "lspci -knn",
-                "View USB Devices": "lsusb -v",
-                "Check for Dead Processes": "ps aux | grep 'Z'",
-                "Show Open Files": "lsof -i",
-                "Check CPU Usage": "top -bn1 | grep 'Cpu(s)' | sed 's/.*, *\\([0-9.]*\\)%*id.*/\\1/' | awk '{print 100 - $1}'"
-            }
-        }
-        commands = list(self.linux_commands_options.get(distro, {}).keys())
-        self.command_combobox['values'] = commands
-        if commands:
-            self.command_combobox.set(commands[0]) # Set first command as default
-        else:
-            self.command_combobox.set("No commands available")
+        self._set_command_group(self.screens[LINUX], self.selected_linux_distro.get())
 
     def show_macos_menu(self):
         """Displays the macOS specific menu with command execution."""
-        self.clear_frame(self.main_frame)
+        self._show_screen(MACOS, self._build_macos_menu)
+
+    def _build_macos_menu(self, screen):
+        """Builds the macOS screen (once)."""
+        parent = screen.frame
 
-        ttk.Label(self.main_frame, text="macOS Fix Kit", style='Heading.TLabel').pack(pady=(10, 25))
+        ttk.Label(parent, text="macOS Fix Kit", style='Heading.TLabel').pack(pady=(10, 25))
 
         # Back button
-        ttk.Button(self.main_frame, text="← Back to Main Menu", command=self.show_main_menu, style='TButton').pack(anchor=tk.NW, padx=15, pady=15)
+        ttk.Button(parent, text="← Back to Main Menu", command=self.show_main_menu, style='TButton').pack(anchor=tk.NW, padx=15, pady=15)
 
         # Warning for non-macOS users
         if platform.system() != "Darwin": # 'Darwin' is the system name for macOS
-            ttk.Label(self.main_frame, text="NOTE: These commands are for macOS. Running them on Windows or Linux will likely result in 'command not found' errors.", 
+            ttk.Label(parent, text="NOTE: These commands are for macOS. Running them on Windows or Linux will likely result in 'command not found' errors.", 
                       font=('Segoe UI', 11, 'bold'), foreground='red', background=self.primary_bg).pack(pady=(5, 15), padx=15)
 
-        # Command selection
-        ttk.Label(self.main_frame, text="Select a Command to Run:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
-        self.macos_commands_options = {
-            "Software Updates (List)": "softwareupdate --list",
-            "Software Updates (Install All)": "sudo softwareupdate --install --all --restart", # May require restart
-            "List Disks and Partitions": "diskutil list",
-            "Verify Startup Disk": "diskutil verifyVolume /",
-            "Repair Disk Permissions (Older macOS)": "sudo diskutil repairPermissions /", # Less relevant in modern macOS
-            "Battery Status (Laptops)": "pmset -g batt",
-            "System Information": "system_profiler SPSoftwareDataType",
-            "Hardware Diagnostics": "system_profiler SPDiagnosticsDataType",
-            "Stream System Logs": "log stream --predicate 'processID == 0' --info", # Example, can be very verbose
-            "Flush DNS Cache": "sudo dscacheutil -flushcache; sudo killall -HUP mDNSResponder",
-            "List All Hardware Ports": "networksetup -listallhardwareports",
-            "Ping Google": "ping -c 4 google.com",
-            "Reset Spotlight Index": "sudo mdutil -E /",
-            "Check for Broken Homebrew Packages": "brew doctor", # Requires Homebrew
-            "Clean Homebrew Cache": "brew cleanup", # Requires Homebrew
-            "View Running Processes (Top)": "top -l 1 | head -n 10",
-            "Force Quit Application (Example: Safari)": "killall Safari", # Replace Safari with app name
-            "Show Network Configuration": "ifconfig", # or ipconfig for newer macOS
-            "List Installed Applications": "ls /Applications"
-        }
+        # Command selection (with fuzzy search over the command names)
         self.selected_macos_command = tk.StringVar()
-        self.command_combobox = ttk.Combobox(self.main_frame, textvariable=self.selected_macos_command, values=list(self.macos_commands_options.keys()), state="readonly", font=('Segoe UI', 11), width=70)
-        self.command_combobox.set("Select a command")
-        self.command_combobox.pack(pady=5, anchor=tk.W, padx=15)
+        self._build_command_picker(screen, self.selected_macos_command)
+        self._set_command_group(screen, MACOS, select_first=False)
 
         # Run Command Button
-        run_btn = ttk.Button(self.main_frame, text="Run Selected Command", command=self.run_selected_command, style='TButton')
-        run_btn.pack(pady=25)
+        run_btn = ttk.Button(parent, text="Run Selected Command", command=self.run_selected_command, style='TButton')
+        run_btn.pack(pady=(25, 5))
+        self._build_diagnostics_row(screen)
         
         # Create and pack the loading label here for this menu
-        self.loading_label = ttk.Label(self.main_frame, text="", font=('Segoe UI', 11, 'italic'), foreground=self.accent_color, background=self.primary_bg)
-        self.loading_label.pack(pady=5)
+        screen.loading_label = ttk.Label(parent, text="", font=('Segoe UI', 11, 'italic'), foreground=self.accent_color, background=self.primary_bg)
+        screen.loading_label.pack(pady=5)
 
-        # Output area
-        ttk.Label(self.main_frame, text="Command Output:", style='TLabel').pack(pady=(10, 5), anchor=tk.W, padx=15)
-        
-        # Frame for output text and copy button
-        output_frame = ttk.Frame(self.main_frame, style='TFrame')
-        output_frame.pack(expand=True, fill=tk.BOTH, padx=15)
-
-        # Increased height for output text area
-        self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, width=80, height=20, font=('Consolas', 10), background=self.output_bg, foreground=self.output_fg, insertbackground=self.output_fg)
-        self.output_text.pack(side=tk.LEFT, expand=True, fill=tk.BOTH, padx=(0, 10))
-        self.output_text.config(state=tk.DISABLED) # Make it read-only
-        
-        copy_btn = ttk.Button(output_frame, text="Copy Output", command=self.copy_output, style='TButton')
-        copy_btn.pack(side=tk.RIGHT, anchor=tk.N, pady=5)
+        # Output area (job list + one output tab per run)
+        self._build_output_area(screen)
 
 
     def run_selected_command(self):
-        """Executes the selected command in a separate thread."""
+        """Submits the selected command to the job manager as a new job."""
         selected_command_name = ""
         actual_command = ""
-        current_os_menu = ""
-
-        # Determine which menu is currently active to get the correct command
-        # Find the first Heading.TLabel widget in main_frame and get its text
-        for widget in self.main_frame.winfo_children():
-            if isinstance(widget, ttk.Label) and widget.cget('style') == 'Heading.TLabel':
-                current_os_menu = widget.cget("text")
-                break
+        entry = None
 
-        if not current_os_menu: # Fallback if heading label not found
-            # Try to infer from current OS if no menu title is found
-            current_platform_system = platform.system()
-            if current_platform_system == "Windows":
-                current_os_menu = "Windows Fix Kit"
-            elif current_platform_system == "Linux":
-                current_os_menu = "Linux Fix Kit"
-            elif current_platform_system == "Darwin": # macOS
-                current_os_menu = "macOS Fix Kit"
+        # The active screen knows which OS kit is shown
+        screen = self.active_screen
+        current_os_menu = screen.key if screen is not None else ""
 
-
-        if "Windows" in current_os_menu:
+        if current_os_menu == WINDOWS:
             version = self.selected_windows_version.get()
             selected_command_name = self.selected_windows_command.get()
-            actual_command = self.windows_commands_options.get(version, {}).get(selected_command_name, "")
+            entry = CATALOG.group(version).get(selected_command_name)
+            actual_command = entry.command if entry is not None else ""
             
             # Explicit warning if sudo is found in a Windows command
             if platform.system() == "Windows" and actual_command.strip().startswith("sudo"):
@@ -573,10 +788,11 @@ class WLFKTool:
                                      "If this command requires Administrator privileges, please ensure the WLFK Tool itself is run as Administrator.")
                 return
 
-        elif "Linux" in current_os_menu:
+        elif current_os_menu == LINUX:
             distro = self.selected_linux_distro.get()
             selected_command_name = self.selected_linux_command.get()
-            actual_command = self.linux_commands_options.get(distro, {}).get(selected_command_name, "")
+            entry = CATALOG.group(distro).get(selected_command_name)
+            actual_command = entry.command if entry is not None else ""
             
             # Explicit warning if a Linux command is run on non-Linux OS
             if platform.system() != "Linux":
@@ -587,9 +803,10 @@ class WLFKTool:
                                       "If this command requires root privileges, please ensure the WLFK Tool itself is run with 'sudo'.")
                 # Do not return, let the command attempt to run and show the error in output
                 
-        elif "macOS" in current_os_menu:
+        elif current_os_menu == MACOS:
             selected_command_name = self.selected_macos_command.get()
-            actual_command = self.macos_commands_options.get(selected_command_name, "")
+            entry = CATALOG.group(MACOS).get(selected_command_name)
+            actual_command = entry.command if entry is not None else ""
             
             # Explicit warning if a macOS command is run on non-macOS OS
             if platform.system() != "Darwin":
@@ -605,23 +822,282 @@ class WLFKTool:
             messagebox.showwarning("No Command Selected", "Please select a command to run.")
             return
 
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, f"Executing: {selected_command_name}\n")
-        self.output_text.insert(tk.END, f"Command: {actual_command}\n\n")
-        self.output_text.config(state=tk.DISABLED)
-        
-        # Start loading animation
-        self.loading_dots_count = 0
-        self._animate_loading_dots()
+        # Don't launch a process that is bound to fail (missing program, root needed)
+        reason = screen.unavailable.get(selected_command_name)
+        if reason:
+            messagebox.showwarning("Command Unavailable", f"'{selected_command_name}' can't run on this system: {reason}.")
+            return
+
+        try:
+            timeout = float(screen.timeout_var.get() or 0)
+        except ValueError:
+            messagebox.showwarning("Invalid Timeout", "The timeout must be a number of seconds (0 for no timeout).")
+            return
+
+        # Analyzed natively in the job worker process; the catalog's du command is the headless fallback.
+        if entry.analyzer == "directory-sizes":
+            self.analyze_directory_sizes(screen, timeout)
+            return
+
+        # GUI apps are only launched without waiting on their own OS (catalog metadata, no string scan).
+        # Entries with a native probe (free, df, uptime, ...) are answered from /proc without forking.
+        self._start_job(screen, selected_command_name, actual_command, timeout=timeout or None,
+                        launches_gui=entry.launches_gui and entry.runs_natively,
+                        probe=entry.native_probe,
+                        cache_paths=entry.cache_paths if screen.use_cache_var.get() else None,
+                        table=entry.table)
+
+    def _start_job(self, screen, name, command, table=None, **options):
+        """Submits a command as a new job with its own output tab and job list row."""
+        job = self._get_job_manager().submit(name, command, table=table, **options)
+        console = self._add_job_tab(screen, job, table)
+        console.append(f"Executing: {name}\n")
+        console.append(f"Command: {command}\n\n")
+        self._refresh_job_row(job)
+
+        # Start loading animation (one shared animation for all running jobs)
+        if self.loading_animation_id is None:
+            self.loading_dots_count = 0
+            self._animate_loading_dots()
+        return job
+
+    def snapshot_selected_command(self):
+        """Runs the selected read-only command and stores its output as a snapshot; what changed
+        since the command's previous snapshot is added below the output when it finishes."""
+        from wlfk_snapshots import can_snapshot
+        screen = self.active_screen
+        group = self._selected_group(screen)
+        name = screen.command_combobox.get()
+        entry = CATALOG.group(group).get(name) if group else None
+        if entry is None:
+            messagebox.showwarning("No Command Selected", "Please select a command to take a snapshot of.")
+            return
+        if not can_snapshot(entry):
+            messagebox.showwarning("Take Snapshot", "Only read-only commands that finish on their own can be snapshotted.")
+            return
+        reason = screen.unavailable.get(name)
+        if reason:
+            messagebox.showwarning("Command Unavailable", f"'{name}' can't run on this system: {reason}.")
+            return
+        try:
+            timeout = float(screen.timeout_var.get() or 0)
+        except ValueError:
+            messagebox.showwarning("Invalid Timeout", "The timeout must be a number of seconds (0 for no timeout).")
+            return
+        # Never served from the result cache: a snapshot is only useful if it is current.
+        job = self._start_job(screen, f"Snapshot: {entry.name}", entry.command, timeout=timeout or None,
+                              probe=entry.native_probe, table=entry.table)
+        self.snapshot_jobs[job.id] = (group, entry, [])
+
+    def analyze_journal(self):
+        """Streams journalctl -o json into a tab that shows one row per distinct message, with counts and rates."""
+        from wlfk_journal import journal_command, priority_number
+        from wlfk_table import JournalView
+        screen = self.active_screen
+        if platform.system() != "Linux":
+            messagebox.showwarning("Analyze Journal", "The systemd journal can only be analyzed on Linux.")
+            return
+        try:
+            timeout = float(screen.timeout_var.get() or 0)
+        except ValueError:
+            messagebox.showwarning("Invalid Timeout", "The timeout must be a number of seconds (0 for no timeout).")
+            return
+        max_priority = priority_number(screen.journal_priority_var.get())
+        units = screen.journal_unit_var.get().split()
+        kernel, follow = screen.journal_kernel_var.get(), screen.journal_follow_var.get()
+        command = journal_command(follow=follow, kernel=kernel, max_priority=max_priority, units=units)
+        name = "Journal Analysis" + (" (kernel)" if kernel else "") + (f": {' '.join(units)}" if units else "")
+        # The raw JSON isn't spooled: it is several times the size of the text journal and only the aggregate is shown.
+        # Aggregated in the job worker process; only the rows reach the view.
+        job = self._get_job_manager().submit(name, command, timeout=timeout or None, history=False,
+                                             journal=(max_priority, units))
+        view = JournalView(screen.output_notebook, self.job_manager.parsed(job), style='TFrame')
+        screen.output_notebook.add(view, text=f"#{job.id} {name}")
+        screen.output_notebook.select(view)
+        self.journal_views[job.id] = view
+        self.job_tabs[job.id] = view
+        self.job_screens[job.id] = screen
+        self._refresh_job_row(job)
+        if self.loading_animation_id is None:
+            self.loading_dots_count = 0
+            self._animate_loading_dots()
+
+    def analyze_directory_sizes(self, screen, timeout=0, root=None, refresh=False):
+        """Scans a directory tree in parallel into a tab that shows the largest directories first."""
+        from wlfk_table import DirectorySizeView
+        if root is None:
+            from tkinter import filedialog
+            root = filedialog.askdirectory(title="Analyze Directory Sizes", initialdir=os.sep, mustexist=True)
+            if not root:
+                return
+        name = f"Directory Sizes: {root}"
+        # Scanned in the job worker process (cached per directory unless refreshing); only the changed directories reach the view.
+        job = self._get_job_manager().submit(name, f"dirsize {root}", timeout=timeout or None, history=False,
+                                             scan=(root, refresh))
+        view = DirectorySizeView(screen.output_notebook, self.job_manager.parsed(job), style='TFrame')
+        screen.output_notebook.add(view, text=f"#{job.id} {name}")
+        screen.output_notebook.select(view)
+        self.dirsize_views[job.id] = (root, view)
+        self.job_tabs[job.id] = view
+        self.job_screens[job.id] = screen
+        self._refresh_job_row(job)
+        if self.loading_animation_id is None:
+            self.loading_dots_count = 0
+            self._animate_loading_dots()
+
+    def _finish_snapshot(self, job):
+        """Stores a finished snapshot run and appends the diff against the previous snapshot to its tab."""
+        from wlfk_snapshots import SnapshotStore
+        from wlfk_jobs import FINISHED
+        group, entry, output = self.snapshot_jobs.pop(job.id)
+        console = self.job_consoles.get(job.id)
+        if console is None:
+            return
+        if job.state != FINISHED:
+            console.append("\n=== No snapshot taken: the command did not finish successfully. ===\n")
+            return
+        if self.snapshot_store is None:
+            self.snapshot_store = SnapshotStore()
+        try:
+            snapshot = self.snapshot_store.take(group, entry, "".join(output))
+            previous = self.snapshot_store.previous(snapshot)
+            diff = self.snapshot_store.diff(previous, snapshot) if previous is not None else None
+        except (OSError, ValueError) as e:
+            console.append(f"\n=== Could not store the snapshot: {e} ===\n")
+            return
+        console.append(f"\n=== Snapshot {snapshot.id}: {snapshot.items} entries ===\n")
+        if diff is None:
+            console.append("First snapshot of this command; the next one will show what changed.\n")
+            return
+        taken = time.strftime("%Y-%m-%d %H:%M", time.localtime(previous.taken))
+        console.append(f"Since {taken}: {'unchanged' if diff.unchanged else diff.summary()}\n")
+        console.append("".join(line + "\n" for line in diff.report(SNAPSHOT_REPORT_LIMIT)))
+
+    def run_selected_playbook(self):
+        """Starts the selected playbook; each step gets its own job tab as it starts."""
+        screen = self.active_screen
+        group = self._selected_group(screen)
+        from wlfk_playbooks import find_playbook, PlaybookRun
+        playbook = find_playbook(group, screen.playbook_var.get()) if group else None
+        if playbook is None:
+            messagebox.showwarning("Run Playbook", "Please select a version or distribution and a playbook first.")
+            return
+        if any(run_screen is screen for run_screen, _ in self.playbook_runs):
+            messagebox.showinfo("Run Playbook", "A playbook is already running on this screen.")
+            return
+        steps = "\n".join(f"  - {step.command_name}" for step in playbook.steps)
+        if not messagebox.askyesno("Run Playbook", f"{playbook.description}\n\nSteps:\n{steps}\n\n"
+                                   "Independent steps run at the same time. Run it now?"):
+            return
+        try:
+            timeout = float(screen.timeout_var.get() or 0)
+        except ValueError:
+            messagebox.showwarning("Invalid Timeout", "The timeout must be a number of seconds (0 for no timeout).")
+            return
+        try:
+            run = PlaybookRun(playbook, group, self._get_job_manager(), timeout=timeout or None)
+        except ValueError as e:
+            messagebox.showerror("Run Playbook", str(e))
+            return
+        self.playbook_runs.append((screen, run))
+        self._start_playbook_jobs(screen, run, run.start())
+
+    def cancel_playbooks(self):
+        """Cancels the playbook running on the active screen (its running step is stopped, the rest skipped)."""
+        for screen, run in self.playbook_runs:
+            if screen is self.active_screen:
+                run.cancel()
+        self._poll_playbooks()
+
+    def _start_playbook_jobs(self, screen, run, jobs):
+        for job in jobs:
+            console = self._add_job_tab(screen, job, run.step_for(job).entry.table)
+            console.append(f"Playbook: {run.playbook.name}\nExecuting: {job.name}\n")
+            console.append(f"Command: {job.command}\n\n")
+            self._refresh_job_row(job)
+        if jobs and self.loading_animation_id is None:
+            self.loading_dots_count = 0
+            self._animate_loading_dots()
+
+    def _poll_playbooks(self):
+        """Starts due retries, updates the progress labels and forgets finished playbooks."""
+        for screen, run in list(self.playbook_runs):
+            self._start_playbook_jobs(screen, run, run.poll())
+            screen.playbook_label.config(text=run.progress())
+            if run.done:
+                self.playbook_runs.remove((screen, run))
+
+    def watch_selected_command(self):
+        """Re-runs the selected read-only command every few seconds in a tab that only redraws changed lines."""
+        from wlfk_watch import WatchSession, can_watch, MIN_WATCH_INTERVAL
+        screen = self.active_screen
+        group = self._selected_group(screen)
+        name = screen.command_combobox.get()
+        entry = CATALOG.group(group).get(name) if group else None
+        if entry is None:
+            messagebox.showwarning("No Command Selected", "Please select a command to watch.")
+            return
+        if not can_watch(entry):
+            messagebox.showwarning("Watch Command", "Only read-only commands that finish on their own can be watched.")
+            return
+        reason = screen.unavailable.get(name)
+        if reason:
+            messagebox.showwarning("Command Unavailable", f"'{name}' can't run on this system: {reason}.")
+            return
+        try:
+            interval = float(screen.watch_interval_var.get())
+            timeout = float(screen.timeout_var.get() or 0)
+        except ValueError:
+            messagebox.showwarning("Invalid Interval", "The interval and the timeout must be numbers of seconds.")
+            return
+        if interval < MIN_WATCH_INTERVAL:
+            messagebox.showwarning("Invalid Interval", f"The interval must be at least {MIN_WATCH_INTERVAL:g} seconds.")
+            return
+        from wlfk_console import WatchConsole
+        session = WatchSession(self._get_job_manager(), entry.name, entry.command, interval, timeout or None,
+                               probe=entry.native_probe)
+        view = WatchConsole(screen.output_notebook, font=('Consolas', 10), background=self.output_bg, foreground=self.output_fg, style='TFrame')
+        screen.output_notebook.add(view, text=f"Watch: {entry.name}")
+        screen.output_notebook.select(view)
+        session.start()
+        view.set_status(session.status())
+        self.watches.append((session, view))
+
+    def _selected_watch(self):
+        """The (session, view) of the watch tab shown on the active screen, or None."""
+        screen = self.active_screen
+        if screen is None or screen.output_notebook is None or not screen.output_notebook.select():
+            return None
+        selected = screen.output_notebook.select()
+        return next(((session, view) for session, view in self.watches if str(view) == selected), None)
+
+    def stop_selected_watch(self):
+        watch = self._selected_watch()
+        if watch is None:
+            messagebox.showinfo("Stop Watching", "Select the tab of a watched command first.")
+            return
+        self._stop_watch(watch)
 
-        # Run command in a separate thread to keep GUI responsive
-        threading.Thread(target=self._execute_command, args=(actual_command,)).start()
+    def _stop_watch(self, watch):
+        session, view = watch
+        session.stop()
+        view.set_status(session.status())
+        self.watches.remove(watch)
+        if session.job is not None:
+            self.stopped_watches.append(session)
 
     def _animate_loading_dots(self):
-        """Animates the loading dots."""
-        dots = "." * (self.loading_dots_count % 4)
-        self.loading_label.config(text=f"Executing command{dots} Please wait.")
+        """Animates the loading dots and keeps the job runtimes ticking."""
+        running = self.job_manager.running_count()
+        if not running:
+            self._stop_loading_animation()
+            return
+        for job in self.job_manager.jobs.values():
+            if not job.done:
+                self._refresh_job_row(job)
+        if self.loading_label is not None:
+            dots = "." * (self.loading_dots_count % 4)
+            self.loading_label.config(text=f"Running {running} job(s){dots} Please wait.")
         self.loading_dots_count += 1
         self.loading_animation_id = self.master.after(300, self._animate_loading_dots) # Update every 300ms
 
@@ -630,90 +1106,253 @@ class WLFKTool:
         if self.loading_animation_id:
             self.master.after_cancel(self.loading_animation_id)
             self.loading_animation_id = None
-        self.loading_label.config(text="") # Clear the loading text
-
-    def _execute_command(self, command):
-        """Internal method to execute the command using subprocess."""
+        for screen in self.screens.values():
+            if screen.loading_label is not None:
+                screen.loading_label.config(text="") # Clear the loading text
+
+    def _drain_output_queue(self):
+        """Moves everything reported by the job workers into the GUI in one batch per job."""
+        from wlfk_jobs import QUEUED, RUNNING
+        pending = {}
+        changed = {}
+        ended = set() # Jobs whose final state event was drained, i.e. whose output has all been drained too
         try:
-            shell_needed = True # Generally safer to use shell=True for complex commands or if on Windows
-
-            # For commands that launch a new GUI window, use subprocess.Popen to not wait for their completion.
-            gui_apps_windows = ["rstrui.exe", "msdt.exe", "msinfo32", "dxdiag", "cleanmgr.exe", "msconfig.exe", "eventvwr.msc", "services.msc", "devmgmt.msc"]
-            gui_apps_linux = ["gnome-disks"] # Add more as needed
-            gui_apps_macos = [] # macOS GUI apps are typically launched by 'open -a "App Name"' or just 'open /Applications/App.app'
-
-            current_platform = platform.system()
-
-            if current_platform == "Windows":
-                if any(app in command for app in gui_apps_windows):
-                    subprocess.Popen(command, shell=shell_needed) 
-                    self.master.after(0, self._update_output, f"\nLaunched '{command}'. Check for a new window or prompt.\n")
-                    self.master.after(0, self._stop_loading_animation) # Stop loading animation
-                    return
-            elif current_platform == "Linux":
-                if any(app in command for app in gui_apps_linux):
-                    subprocess.Popen(command, shell=shell_needed)
-                    self.master.after(0, self._update_output, f"\nLaunched '{command}'. Check for a new window or prompt.\n")
-                    self.master.after(0, self._stop_loading_animation) # Stop loading animation
-                    return
-            # No specific GUI app handling for macOS yet, commands are mostly terminal-based
-
-            # For other commands, use subprocess.run to capture output.
-            process = subprocess.run(
-                command,
-                shell=shell_needed,
-                capture_output=True,
-                text=True, # Capture output as text (decoded)
-                check=False # Don't raise exception for non-zero exit codes; we'll handle returncode manually
-            )
-
-            output = process.stdout
-            error = process.stderr
-
-            self.master.after(0, self._stop_loading_animation) # Stop loading animation
-
-            if output:
-                self.master.after(0, self._update_output, output)
-            if error:
-                self.master.after(0, self._update_output, f"\nERROR:\n{error}")
-            if process.returncode != 0:
-                self.master.after(0, self._update_output, f"\nCommand exited with code: {process.returncode}\n")
-                # Provide a more specific hint for permission errors
-                if ("Access is denied" in error or "requested operation requires elevation" in error or 
-                    "Operation not permitted" in error or "Permission denied" in error or 
-                    "EACCES" in error or "Permission denied" in process.stderr or 
-                    "sudo: command not found" in error): # Explicitly catch sudo not found
-                    self.master.after(0, self._update_output, "\n--- NOTE: This command likely requires Administrator/root privileges. Please ensure the WLFK Tool itself is run as Administrator (Windows) or with 'sudo' (Linux/macOS) for full functionality. ---\n")
-                elif "command not found" in error or "is not recognized as an internal or external command" in error or "No such file or directory" in error:
-                    self.master.after(0, self._update_output, f"\n--- ERROR: Command '{command.split(' ')[0]}' not found or invalid. Ensure it's correctly typed and available in your system's PATH. Also, verify you selected the correct OS type (Windows, Linux, macOS) for your current system. ---\n")
-
-
-        except FileNotFoundError:
-            self.master.after(0, self._stop_loading_animation) # Stop loading animation
-            self.master.after(0, self._update_output, f"\nError: Command '{command.split(' ')[0]}' not found. Make sure it's in your system's PATH.\n")
-        except Exception as e:
-            self.master.after(0, self._stop_loading_animation) # Stop loading animation
-            self.master.after(0, self._update_output, f"\nAn unexpected error occurred: {e}\n")
-
-    def _update_output(self, text):
-        """Updates the ScrolledText widget from the main thread."""
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.insert(tk.END, text)
-        self.output_text.see(tk.END) # Scroll to the end
-        self.output_text.config(state=tk.DISABLED)
+            while True:
+                job, kind, payload = self.job_manager.events.get_nowait()
+                if kind == "text":
+                    pending.setdefault(job.id, []).append(payload)
+                elif kind == "state":
+                    changed[job.id] = job
+                    if payload not in (QUEUED, RUNNING):
+                        ended.add(job.id)
+        except queue.Empty:
+            pass
+
+        for job_id, parts in pending.items():
+            self._update_output(job_id, "".join(parts))
+        for job in changed.values():
+            self._refresh_job_row(job)
+            if job.id in ended and job.id in self.job_tables:
+                self.job_tables[job.id].finish()
+            if job.id in ended and job.id in self.journal_views:
+                self.journal_views[job.id].finish()
+            if job.id in ended and job.id in self.snapshot_jobs:
+                self._finish_snapshot(job)
+            if job.id in ended:
+                for screen, run in self.playbook_runs:
+                    if run.owns(job):
+                        self._start_playbook_jobs(screen, run, run.job_finished(job))
+                for session, view in self.watches:
+                    if not session.owns(job):
+                        continue
+                    if session.job_finished(job):
+                        view.show(session.lines, session.opcodes, highlight=session.runs > 1)
+                    view.set_status(session.status()) # Also says when a cancelled run stopped the watch
+                for session in [session for session in self.stopped_watches if session.owns(job)]:
+                    session.job_finished(job)
+                    self.stopped_watches.remove(session)
+        if self.playbook_runs:
+            self._poll_playbooks()
+        for session, view in self.watches:
+            session.poll() # Starts the next run once it is due
+        if changed and not self.job_manager.running_count():
+            self._stop_loading_animation()
+
+        self.master.after(OUTPUT_POLL_INTERVAL_MS, self._drain_output_queue)
+
+    def _update_output(self, job_id, text):
+        """Appends text to a job's output console from the main thread (autoscroll is handled by the console)."""
+        for session, view in self.watches:
+            if session.job is not None and session.job.id == job_id:
+                session.feed(session.job, text)
+                return
+        if job_id in self.journal_views or job_id in self.dirsize_views:
+            return # Aggregated in the worker, which sends no text
+        if job_id in self.snapshot_jobs:
+            self.snapshot_jobs[job_id][2].append(text)
+        # Screens are cached, so this also works while another screen is shown.
+        console = self.job_consoles.get(job_id)
+        if console is not None:
+            console.append(text)
+        table_view = self.job_tables.get(job_id)
+        if table_view is not None:
+            table_view.feed(text)
 
     def copy_output(self):
         """Copies the content of the output text area to the clipboard."""
         try:
             self.master.clipboard_clear()
-            self.master.clipboard_append(self.output_text.get(1.0, tk.END))
+            job = self._selected_job()
+            console = self.job_consoles.get(job.id) if job is not None else None
+            if console is None:
+                messagebox.showinfo("Copy to Clipboard", "There is no command output to copy yet.")
+                return
+            self.master.clipboard_append(console.get_text())
             messagebox.showinfo("Copy to Clipboard", "Command output copied to clipboard!")
         except Exception as e:
             messagebox.showerror("Copy Error", f"Failed to copy to clipboard: {e}")
 
+    def save_output(self):
+        """Saves the selected job's complete output (from its spool file, not the console) to a file or .gz."""
+        job = self._selected_job()
+        if job is None or job.run_id is None:
+            messagebox.showinfo("Save Output", "There is no command output to save yet.")
+            return
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(title="Save Command Output", initialfile=f"wlfk-{job.run_id}.log",
+                                            filetypes=[("Log file", "*.log"), ("Gzip-compressed log", "*.gz")])
+        if not path:
+            return
+        import threading
+        result = []
+
+        def worker():
+            try:
+                result.append(self.job_manager.spool.export(job.run_id, path))
+            except OSError as e:
+                result.append(e)
+
+        def poll():
+            if thread.is_alive():
+                self.master.after(200, poll)
+            elif result and isinstance(result[0], int):
+                messagebox.showinfo("Save Output", f"Output saved to {path}.")
+            else:
+                messagebox.showerror("Save Output", f"Failed to save the output: {result[0] if result else 'unknown error'}")
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.master.after(200, poll)
+
+    def show_run_history(self):
+        """Opens the browser of past runs' output (read from the spool files on demand)."""
+        from wlfk_history import HistoryBrowser
+        from wlfk_spool import SpoolStore
+        store = self.job_manager.spool if self.job_manager is not None else SpoolStore()
+        HistoryBrowser(self.master, store, background=self.output_bg, foreground=self.output_fg)
+
+    def show_run_statistics(self):
+        """Opens a window with run count and p50/p95/max wall time per command from the run history."""
+        from wlfk_telemetry import TelemetryStore
+        # Only read here: the job worker process records the runs (within FLUSH_SECONDS of their end).
+        store = TelemetryStore()
+        try:
+            stats = store.stats()
+        except Exception as e:
+            messagebox.showerror("Run Statistics", f"Failed to read the run history: {e}")
+            return
+
+        def milliseconds(value):
+            if value is None:
+                return "-"
+            return f"{value / 1000.0:.2f}s" if value >= 1000 else f"{value:.0f}ms"
+
+        window = tk.Toplevel(self.master)
+        window.title("Run Statistics")
+        window.geometry("900x400")
+        window.configure(bg=self.primary_bg)
+        ttk.Label(window, text=f"Command runs recorded in {store.path} (cached results and built-in probes excluded)",
+                  style='Info.TLabel').pack(anchor=tk.W, padx=10, pady=(10, 5))
+        frame = ttk.Frame(window, style='TFrame')
+        frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=(0, 10))
+        columns = (("command", "Command", 330), ("runs", "Runs", 50), ("failed", "Failed", 55), ("p50", "p50", 70),
+                   ("p95", "p95", 70), ("max", "Max", 70), ("first", "First Byte", 80), ("rss", "Peak RSS", 80))
+        tree = ttk.Treeview(frame, columns=[column for column, _, _ in columns], show="headings")
+        for column, heading, width in columns:
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, stretch=(column == "command"), anchor=tk.W if column == "command" else tk.E)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        for entry in stats:
+            rss = f"{entry.max_rss_kb / 1024:.1f} MiB" if entry.max_rss_kb is not None else "-"
+            tree.insert("", tk.END, values=(f"{entry.name}: {entry.command}", entry.runs, entry.failures,
+                                            milliseconds(entry.p50_ms), milliseconds(entry.p95_ms),
+                                            milliseconds(entry.max_ms), milliseconds(entry.p50_first_output_ms), rss))
+        if not stats:
+            tree.insert("", tk.END, values=("No runs recorded yet.", "", "", "", "", "", "", ""))
+
+    def _selected_group(self, screen):
+        """The Windows version, Linux distribution or macOS chosen on a screen, or None."""
+        if screen.key == WINDOWS:
+            group = self.selected_windows_version.get()
+        elif screen.key == LINUX:
+            group = self.selected_linux_distro.get()
+        else:
+            group = screen.key
+        return group if group in CATALOG.groups else None
+
+    def collect_diagnostics(self):
+        """Runs every read-only command of the selected group in parallel into a .tar.gz bundle."""
+        screen = self.active_screen
+        group = self._selected_group(screen)
+        if group is None:
+            messagebox.showwarning("Collect Diagnostics", "Please select a version or distribution first.")
+            return
+        if self.diagnostics_cancel is not None:
+            messagebox.showinfo("Collect Diagnostics", "A diagnostics bundle is already being collected.")
+            return
+        import threading
+        from tkinter import filedialog
+        from wlfk_bundle import collect_diagnostics, default_bundle_name, diagnostic_entries
+        path = filedialog.asksaveasfilename(title="Save Diagnostics Bundle", initialfile=default_bundle_name(),
+                                            defaultextension=".tar.gz", filetypes=[("Compressed tar archive", "*.tar.gz")])
+        if not path:
+            return
+
+        # The worker only talks to the GUI through this queue, drained by _poll_diagnostics.
+        events = queue.Queue()
+        cancel = self.diagnostics_cancel = threading.Event()
+
+        def worker():
+            try:
+                manifest = collect_diagnostics(group, path, progress=lambda done, total, job: events.put(("progress", (done, total, job.name))),
+                                               cancel_event=cancel)
+                events.put(("done", manifest))
+            except Exception as e:
+                events.put(("error", e))
+
+        screen.diagnostics_label.config(text=f"Collecting diagnostics: 0/{len(diagnostic_entries(group))}...")
+        threading.Thread(target=worker, name="wlfk-diagnostics", daemon=True).start()
+        self._poll_diagnostics(screen, events, path)
+
+    def _poll_diagnostics(self, screen, events, path):
+        try:
+            while True:
+                kind, payload = events.get_nowait()
+                if kind == "progress":
+                    done, total, name = payload
+                    screen.diagnostics_label.config(text=f"Collecting diagnostics: {done}/{total} (finished: {name})")
+                    continue
+                self.diagnostics_cancel = None
+                if kind == "done":
+                    failed = sum(1 for record in payload["commands"] if record.get("exit_code") != 0)
+                    screen.diagnostics_label.config(text=f"Diagnostics saved in {payload['duration_s']:.1f}s")
+                    messagebox.showinfo("Collect Diagnostics", f"Saved {len(payload['commands'])} command outputs "
+                                        f"({failed} failed) and a manifest to:\n{path}")
+                else:
+                    screen.diagnostics_label.config(text="")
+                    messagebox.showerror("Collect Diagnostics", f"Could not write the diagnostics bundle: {payload}")
+                return
+        except queue.Empty:
+            pass
+        self.master.after(OUTPUT_POLL_INTERVAL_MS * 4, self._poll_diagnostics, screen, events, path)
+
+    def _on_close(self):
+        """Stops running jobs (their process groups would otherwise outlive the window) and exits."""
+        if self.diagnostics_cancel is not None:
+            self.diagnostics_cancel.set()
+        if self.job_manager is not None:
+            self.job_manager.shutdown()
+        self.master.destroy()
+
 
 # Main application entry point
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support() # The job worker process of frozen (PyInstaller) builds starts here
+    request_elevation()
     root = tk.Tk()
     app = WLFKTool(root)
     root.mainloop()
@@ -0,0 +1,95 @@
+"""Batch benchmark and regression check for the headless CLI (wlfk_cli.run_commands).
+
+Runs many fast commands (echo) in parallel, the way 'wlfk_cli.py batch --jobs N' does,
+and reports:
+    commands_per_s   how many commands were run and written per second
+    missing, wrong   commands without exactly one record, or whose record doesn't hold
+                     that command's own output; fast jobs often end before their earlier
+                     state events are read, which is where a consumer that trusts
+                     job.done instead of the final state event goes wrong
+
+Usage:
+    python benchmarks/bench_batch.py [--commands 40] [--jobs 4] [--rounds 5] [--json]
+
+The exit status is 1 when a round crashed or any record was missing or wrong.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wlfk_catalog import CatalogEntry, READ_ONLY
+from wlfk_cli import run_commands
+
+# Group the synthetic commands are reported under
+GROUP = "Generic Linux"
+
+
+def synthetic_commands(count):
+    """(group, CatalogEntry) pairs of commands that each print their own marker and exit at once."""
+    return [(GROUP, CatalogEntry(f"Echo {index}", f"echo marker-{index}", [GROUP], "System", {READ_ONLY}))
+            for index in range(count)]
+
+
+def measure_round(count, jobs):
+    out = io.StringIO()
+    started = time.perf_counter()
+    try:
+        status = run_commands(synthetic_commands(count), max_jobs=jobs, output_format="jsonl", out=out)
+    except Exception:
+        return {"crashed": traceback.format_exc(limit=3), "missing": count, "wrong": 0,
+                "seconds": time.perf_counter() - started}
+    seconds = time.perf_counter() - started
+    records = {}
+    for line in out.getvalue().splitlines():
+        record = json.loads(line)
+        records.setdefault(record["name"], []).append(record)
+    missing = wrong = 0
+    for index in range(count):
+        found = records.get(f"Echo {index}", [])
+        if len(found) != 1:
+            missing += 1
+        elif found[0]["output"] != f"marker-{index}\n":
+            wrong += 1
+    return {"status": status, "missing": missing, "wrong": wrong, "seconds": seconds}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many fast commands in parallel through the WLFK Tool CLI.")
+    parser.add_argument("--commands", type=int, default=40, help="commands per round (default: 40)")
+    parser.add_argument("--jobs", type=int, default=4, help="commands run at the same time (default: 4)")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds to run (default: 5)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    rounds = [measure_round(args.commands, args.jobs) for _ in range(args.rounds)]
+    seconds = sum(result["seconds"] for result in rounds)
+    results = {
+        "commands": args.commands,
+        "jobs": args.jobs,
+        "rounds": rounds,
+        "commands_per_s": round(args.commands * len(rounds) / seconds, 1),
+    }
+    failed = [result for result in rounds if result.get("crashed") or result["missing"] or result["wrong"]]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.rounds} rounds of {args.commands} commands, {args.jobs} at a time: "
+              f"{results['commands_per_s']:.0f} commands/s")
+        for number, result in enumerate(rounds, 1):
+            print(f"  round {number}: {result['seconds']:.2f}s, {result['missing']} missing, {result['wrong']} wrong")
+            if result.get("crashed"):
+                print(result["crashed"].rstrip())
+    if failed:
+        print(f"REGRESSION: {len(failed)} of {len(rounds)} rounds lost or mixed up command output", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Ingest benchmark for the journal analyzer (wlfk_journal).
+
+Feeds a fixture of journal JSON lines (journalctl -o json) through a JournalAnalyzer and
+reports:
+    records_per_s, mb_per_s   ingest throughput, in two modes:
+                              file    analyze_file() on the calling thread
+                              stream  64 KiB chunks through feed(), parsed on the shared
+                                      parser thread the way a running job's output is
+    distinct                  aggregated rows the records collapsed into
+    rows_ms                   cost of one rows() copy, i.e. what a UI refresh pays
+
+Usage:
+    python benchmarks/bench_journal.py [--fixture journal.json | --records 300000]
+                                       [--priority err] [--json] [--min-records-per-s 50000]
+
+Without --fixture a synthetic one is written to a temporary file: a few noisy units
+repeating messages that differ only in numbers, with every field journalctl writes by
+default. With --min-records-per-s the exit status is 1 when a mode ingests slower.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wlfk_journal import JournalAnalyzer, analyze_file, priority_number
+
+# Bytes handed to feed() at a time, like the job reader's chunks.
+CHUNK_SIZE = 64 * 1024
+# (unit, priority, message with {} for the varying numbers) of the synthetic fixture
+MESSAGES = [
+    ("nginx.service", 3, "upstream timed out (110: Connection timed out) while reading from 10.0.0.{}:{}"),
+    ("sshd.service", 6, "Accepted publickey for user{} from 192.168.1.{} port {}"),
+    ("kernel", 4, "usb 1-{}: device descriptor read/64, error -{}"),
+    ("cron.service", 6, "pam_unix(cron:session): session opened for user root(uid={}) by (uid={})"),
+    ("NetworkManager.service", 5, "<info>  [{}.{}] dhcp4 (wlan0): state changed new lease"),
+    ("systemd-journald.service", 4, "Suppressed {} messages from user@{}.service"),
+]
+
+
+def write_fixture(path, records, seed=1):
+    """Writes synthetic journal JSON lines formatted the way journalctl does."""
+    generator = random.Random(seed)
+    start = int(time.time() * 1e6) - records * 1000
+    with open(path, "w", encoding="utf-8") as fixture:
+        for index in range(records):
+            unit, priority, message = generator.choice(MESSAGES)
+            numbers = [generator.randint(1, 65000) for _ in range(message.count("{}"))]
+            record = {
+                "__CURSOR": f"s=6f0b2c;i={index:x};b=2f5e;m={index:x};t={start + index * 1000:x};x=7a3e",
+                "__REALTIME_TIMESTAMP": str(start + index * 1000),
+                "__MONOTONIC_TIMESTAMP": str(index * 1000),
+                "_BOOT_ID": "2f5e0d7c9b1a4e3f8d6c5b4a39281706",
+                "PRIORITY": str(priority),
+                "_TRANSPORT": "kernel" if unit == "kernel" else "journal",
+                "SYSLOG_IDENTIFIER": unit.split(".")[0],
+                "_PID": str(generator.randint(1, 30000)),
+                "_HOSTNAME": "bench-host",
+                "_MACHINE_ID": "9c1d3e5f7a9b0c2d4e6f8a0b1c3d5e7f",
+                "MESSAGE": message.format(*numbers),
+            }
+            if unit != "kernel":
+                record.update(_SYSTEMD_UNIT=unit, _SYSTEMD_CGROUP=f"/system.slice/{unit}", _COMM=unit.split(".")[0],
+                              _EXE=f"/usr/sbin/{unit.split('.')[0]}")
+            fixture.write(json.dumps(record, separators=(", ", " : ")) + "\n")
+
+
+def measure_file(path, max_priority):
+    started = time.perf_counter()
+    analyzer = analyze_file(path, max_priority)
+    return analyzer, time.perf_counter() - started
+
+
+def measure_stream(path, max_priority):
+    analyzer = JournalAnalyzer(max_priority)
+    with open(path, encoding="utf-8", errors="replace") as fixture:
+        started = time.perf_counter()
+        while True:
+            chunk = fixture.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            analyzer.feed(chunk)
+    analyzer.finish()
+    while not analyzer.finished:
+        time.sleep(0.001)
+    return analyzer, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure WLFK Tool journal analyzer ingest throughput.")
+    parser.add_argument("--fixture", help="journal JSON lines to feed (default: a synthetic fixture)")
+    parser.add_argument("--records", type=int, default=300000, help="records in the synthetic fixture (default: 300000)")
+    parser.add_argument("--priority", default="", help="only keep records up to this priority, e.g. err")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--min-records-per-s", type=float, help="fail if a mode ingests fewer records per second")
+    args = parser.parse_args(argv)
+    max_priority = priority_number(args.priority)
+
+    path = args.fixture
+    if path is None:
+        handle, path = tempfile.mkstemp(prefix="wlfk-journal-", suffix=".json")
+        os.close(handle)
+        write_fixture(path, args.records)
+    try:
+        size = os.path.getsize(path)
+        results = {"fixture_bytes": size, "max_priority": max_priority, "modes": []}
+        for mode, measure in (("file", measure_file), ("stream", measure_stream)):
+            analyzer, seconds = measure(path, max_priority)
+            started = time.perf_counter()
+            rows = analyzer.rows()
+            rows_ms = (time.perf_counter() - started) * 1000
+            results["modes"].append({
+                "mode": mode,
+                "records": analyzer.records,
+                "matched": analyzer.matched,
+                "malformed": analyzer.malformed,
+                "distinct": len(rows),
+                "seconds": round(seconds, 4),
+                "records_per_s": round(analyzer.records / seconds, 1),
+                "mb_per_s": round(size / seconds / 1e6, 2),
+                "rows_ms": round(rows_ms, 3),
+            })
+    finally:
+        if args.fixture is None:
+            os.remove(path)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Fixture: {size / 1e6:.1f} MB" + (f", priority <= {max_priority}" if max_priority is not None else ""))
+        for result in results["modes"]:
+            print(f"  {result['mode']:<7} {result['records_per_s']:>11.0f} records/s {result['mb_per_s']:>7.1f} MB/s  "
+                  f"{result['records']} records -> {result['distinct']} rows, rows() {result['rows_ms']:.2f} ms")
+
+    status = 0
+    if args.min_records_per_s is not None:
+        for result in results["modes"]:
+            if result["records_per_s"] < args.min_records_per_s:
+                print(f"REGRESSION: {result['mode']} ingest {result['records_per_s']:.0f} records/s < "
+                      f"{args.min_records_per_s:.0f}", file=sys.stderr)
+                status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
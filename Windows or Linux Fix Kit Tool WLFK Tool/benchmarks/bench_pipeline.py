@@ -0,0 +1,323 @@
+"""Throughput and latency benchmark for the command execution and output pipeline (Linux).
+
+Each case runs a synthetic local command in a fresh interpreter, in one or both modes:
+    headless  JobManager only; the output events are consumed like wlfk_cli does
+    gui       the real WLFKTool window: jobs are started with _start_job, run in its job
+              worker process (wlfk_worker) and their output goes through
+              _drain_output_queue into the OutputConsole
+
+and reports:
+    mb_per_s, lines_per_s   output throughput from submitting the job until the
+                            last chunk was consumed (shown in the console in gui mode);
+                            raw_bytes is what the command wrote before carriage-return
+                            redraws were collapsed (wlfk_terminal)
+    latency_ms              for the 'dribble' case: time from the command printing
+                            a timestamped line until it was consumed / appended
+    peak_rss_kb             peak resident memory of the interpreter (the command
+                            itself not included, nor the job worker process in gui
+                            mode), next to baseline_rss_kb before the run
+    stalls                  gui mode: Tk event-loop gaps longer than STALL_MS, and the
+                            longest gap, measured with a STALL_TICK_MS heartbeat
+
+Usage:
+    python benchmarks/bench_pipeline.py [--cases seq,dribble] [--mode headless|gui|all]
+                                        [--json] [--output results.json]
+                                        [--baseline old.json [--tolerance 0.2]]
+
+GUI cases need a display; when none is set and Xvfb is installed, one is started for
+the run. Results are JSON (--json prints them, --output writes them), so runs of
+different output strategies can be compared: with --baseline the exit status is 1
+when a case's throughput dropped by more than --tolerance against that earlier file.
+"""
+import argparse
+import json
+import os
+import platform
+import queue
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Timestamped lines printed by the dribble case start with this marker.
+STAMP_MARKER = "@stamp "
+# Heartbeat interval and the gap that counts as a stall of the Tk event loop.
+STALL_TICK_MS = 10
+STALL_MS = 100
+# A case is abandoned after this long.
+CASE_TIMEOUT = 300
+
+# name -> (shell command, description)
+CASES = {
+    "seq": ("seq 1 1000000", "1M short lines as fast as possible"),
+    "long-lines": ("for burst in 1 2 3 4 5; do yes \"$(head -c 8000 /dev/zero | tr '\\0' x)\" | head -n 2000; "
+                   "sleep 0.2; done", "bursts of 8 KB lines"),
+    "dribble": (f"for i in $(seq 1 100); do echo \"{STAMP_MARKER}$(date +%s.%N)\"; sleep 0.02; done",
+                "one timestamped line every 20 ms"),
+    "cr-progress": ("awk 'BEGIN { for (i = 0; i < 200000; i++) printf \"\\rprogress %6d %3d%%\", i, i % 100; "
+                    "print \"\" }'", "200k carriage-return progress updates"),
+}
+MODES = ("headless", "gui")
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Meter:
+    """Counts consumed output and the latency of timestamped lines."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.lines = 0
+        self.chunks = 0
+        self.latencies = []
+        self.last = None
+
+    def consume(self, text):
+        now = time.time()
+        self.last = time.perf_counter()
+        self.bytes += len(text.encode("utf-8"))
+        self.lines += text.count("\n")
+        self.chunks += 1
+        if STAMP_MARKER in text:
+            for line in text.splitlines():
+                if line.startswith(STAMP_MARKER):
+                    self.latencies.append((now - float(line[len(STAMP_MARKER):])) * 1000)
+
+    def result(self, started, case, mode):
+        seconds = max(1e-9, (self.last or time.perf_counter()) - started)
+        result = {
+            "case": case,
+            "mode": mode,
+            "bytes": self.bytes,
+            "lines": self.lines,
+            "chunks": self.chunks,
+            "seconds": round(seconds, 4),
+            "mb_per_s": round(self.bytes / seconds / 1e6, 3),
+            "lines_per_s": round(self.lines / seconds, 1),
+            "latency_ms": None,
+        }
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            result["latency_ms"] = {
+                "median": round(statistics.median(ordered), 2),
+                "p95": round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 2),
+                "max": round(ordered[-1], 2),
+            }
+        return result
+
+
+def run_headless(case):
+    """One case on a bare JobManager (child interpreter)."""
+    from wlfk_jobs import JobManager
+    baseline = peak_rss_kb()
+    manager = JobManager(max_jobs=1)
+    meter = Meter()
+    started = time.perf_counter()
+    job = manager.submit(case, CASES[case][0], timeout=CASE_TIMEOUT)
+    while True:
+        try:
+            _, kind, payload = manager.events.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if kind == "text":
+            meter.consume(payload)
+        elif job.done:
+            break
+    manager.shutdown()
+    result = meter.result(started, case, "headless")
+    result.update(exit_code=job.returncode, raw_bytes=job.stdout_bytes + job.stderr_bytes, baseline_rss_kb=baseline,
+                  peak_rss_kb=peak_rss_kb(), stalls=None)
+    return result
+
+
+def run_gui(case):
+    """One case through the real window (child interpreter with a display)."""
+    import tkinter as tk
+    import WLFK1
+    from wlfk_catalog import LINUX
+    root = tk.Tk()
+    app = WLFK1.WLFKTool(root)
+    app.show_linux_menu()
+    root.update()
+    baseline = peak_rss_kb()
+
+    meter = Meter()
+    update_output = app._update_output
+
+    def measured_update_output(job_id, text):
+        update_output(job_id, text)
+        meter.consume(text)
+
+    app._update_output = measured_update_output
+    gaps = []
+    state = {"tick": None, "job": None, "result": None}
+
+    def heartbeat():
+        now = time.perf_counter()
+        if state["tick"] is not None:
+            gaps.append((now - state["tick"]) * 1000 - STALL_TICK_MS)
+        state["tick"] = now
+        root.after(STALL_TICK_MS, heartbeat)
+
+    def check_done():
+        job = state["job"]
+        if job.done and app.job_manager.events.empty():
+            root.update_idletasks() # Include the final redraw
+            result = meter.result(started, case, "gui")
+            stalls = [gap for gap in gaps if gap > STALL_MS]
+            result.update(exit_code=job.returncode, raw_bytes=job.stdout_bytes + job.stderr_bytes,
+                          baseline_rss_kb=baseline, peak_rss_kb=peak_rss_kb(),
+                          stalls={"count": len(stalls), "max_gap_ms": round(max(gaps, default=0.0), 1),
+                                  "threshold_ms": STALL_MS})
+            state["result"] = result
+            root.destroy()
+        else:
+            root.after(20, check_done)
+
+    started = time.perf_counter()
+    app._start_job(app.screens[LINUX], case, CASES[case][0], timeout=CASE_TIMEOUT)
+    state["job"] = next(iter(app.job_manager.jobs.values()))
+    meter.last = None # The header lines written by _start_job don't count
+    root.after(STALL_TICK_MS, heartbeat)
+    root.after(20, check_done)
+    root.after(CASE_TIMEOUT * 1000, root.destroy)
+    root.mainloop()
+    app.job_manager.shutdown()
+    if state["result"] is None:
+        raise RuntimeError("timed out")
+    return state["result"]
+
+
+def run_child(case, mode):
+    sys.path.insert(0, TOOL_DIR)
+    result = run_headless(case) if mode == "headless" else run_gui(case)
+    print(json.dumps(result))
+
+
+def start_virtual_display():
+    """Starts Xvfb on a free display number; returns (process, DISPLAY) or (None, None)."""
+    if not shutil.which("Xvfb"):
+        return None, None
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        process = subprocess.Popen(["Xvfb", f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                return process, f":{number}"
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+        process.kill()
+    return None, None
+
+
+def run_case(case, mode, environment):
+    """Runs one case/mode pair in a fresh interpreter and returns its result."""
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", case, mode],
+                             capture_output=True, text=True, env=environment, timeout=CASE_TIMEOUT + 30, check=False)
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        return {"case": case, "mode": mode, "error": process.stderr.strip().splitlines()[-1:] or f"exit {process.returncode}"}
+    return json.loads(lines[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Lists the cases whose throughput dropped by more than tolerance against the baseline results."""
+    before = {(result["case"], result["mode"]): result for result in baseline.get("results", []) if "mb_per_s" in result}
+    regressions = []
+    for result in results:
+        old = before.get((result["case"], result["mode"]))
+        if old and "mb_per_s" in result and result["mb_per_s"] < old["mb_per_s"] * (1 - tolerance):
+            regressions.append(f"{result['case']}/{result['mode']}: {result['mb_per_s']:.2f} MB/s < "
+                               f"{old['mb_per_s']:.2f} MB/s baseline")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure WLFK Tool output throughput, latency, memory and Tk stalls.")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"comma-separated cases (default: {','.join(CASES)})")
+    parser.add_argument("--mode", choices=MODES + ("all",), default="all", help="headless, gui or all (default)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--baseline", help="earlier --output file to compare throughput against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop vs. --baseline (default: 0.2)")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        run_child(*args.child)
+        return 0
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    modes = MODES if args.mode == "all" else (args.mode,)
+
+    # Keep the benchmark's runs out of the user's run history (wlfk_telemetry).
+    environment = dict(os.environ, XDG_CACHE_HOME=tempfile.mkdtemp(prefix="wlfk-bench-"))
+    notes = []
+    xvfb = None
+    if "gui" in modes and not environment.get("DISPLAY"):
+        xvfb, display = start_virtual_display()
+        if display:
+            environment["DISPLAY"] = display
+            notes.append(f"gui cases ran under Xvfb {display}")
+        else:
+            modes = tuple(mode for mode in modes if mode != "gui")
+            notes.append("gui cases skipped: no display and no Xvfb")
+
+    try:
+        results = [run_case(case, mode, environment) for case in cases for mode in modes]
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+        shutil.rmtree(environment["XDG_CACHE_HOME"], ignore_errors=True)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if notes:
+        report["note"] = "; ".join(notes)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'case':<12} {'mode':<9} {'MB/s':>8} {'lines/s':>11} {'latency p95':>12} {'peak RSS':>10} {'stalls':>7}")
+        for result in results:
+            if "error" in result:
+                print(f"{result['case']:<12} {result['mode']:<9} error: {result['error']}")
+                continue
+            latency = f"{result['latency_ms']['p95']:.1f}ms" if result["latency_ms"] else "-"
+            stalls = result["stalls"]
+            stalls = f"{stalls['count']}" if stalls else "-"
+            print(f"{result['case']:<12} {result['mode']:<9} {result['mb_per_s']:>8.2f} {result['lines_per_s']:>11.0f} "
+                  f"{latency:>12} {result['peak_rss_kb'] / 1024:>9.1f}M {stalls:>7}")
+        if notes:
+            print(f"  note: {report['note']}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            for regression in compare(results, json.load(baseline_file), args.tolerance):
+                print(f"REGRESSION: {regression}", file=sys.stderr)
+                status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
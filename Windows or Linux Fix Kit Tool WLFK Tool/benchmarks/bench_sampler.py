@@ -0,0 +1,73 @@
+"""Overhead benchmark for the live monitor's background sampler (Linux only).
+
+Runs a SystemSampler for a while and reports the CPU time its thread used as a
+percentage of one core, plus the cost of a single sample.
+
+Usage:
+    python benchmarks/bench_sampler.py [--seconds 10] [--interval 1.0] [--json] [--max-overhead-percent 1.0]
+
+With --max-overhead-percent the exit status is 1 when the measured overhead
+exceeds the limit.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wlfk_sampler import SystemSampler, METRICS
+
+
+def time_samples(count=200):
+    """Returns per-sample CPU times in milliseconds, measured on the calling thread."""
+    sampler = SystemSampler()
+    times = []
+    for _ in range(count):
+        start = time.thread_time()
+        sampler._sample()
+        times.append((time.thread_time() - start) * 1000)
+    for proc_file in sampler._files.values(): # Normally closed by the sampler thread
+        proc_file.close()
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the CPU overhead of the WLFK Tool live monitor sampler.")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to run the sampler (default: 10)")
+    parser.add_argument("--interval", type=float, default=1.0, help="sampling interval in seconds (default: 1.0)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--max-overhead-percent", type=float, help="fail if the sampler uses more than this % of a core")
+    args = parser.parse_args(argv)
+
+    sample_ms = time_samples()
+    sampler = SystemSampler(interval=args.interval)
+    sampler.start()
+    time.sleep(args.seconds)
+    overhead = sampler.overhead_percent()
+    sampler.stop()
+    results = {
+        "seconds": args.seconds,
+        "interval_s": args.interval,
+        "samples": sampler.count,
+        "overhead_percent": round(overhead, 4),
+        "sample_cpu_ms": {"median": round(statistics.median(sample_ms), 3), "max": round(max(sample_ms), 3)},
+        "latest": {metric: sampler.latest(metric) for metric in METRICS},
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Sampler overhead over {args.seconds:g}s at {args.interval:g}s interval: "
+              f"{results['overhead_percent']:.4f}% of one core ({results['samples']} samples)")
+        print(f"  one sample: {results['sample_cpu_ms']['median']:.3f} ms CPU median, {results['sample_cpu_ms']['max']:.3f} ms max")
+
+    if args.max_overhead_percent is not None and overhead > args.max_overhead_percent:
+        print(f"REGRESSION: overhead {overhead:.4f}% > {args.max_overhead_percent:.4f}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
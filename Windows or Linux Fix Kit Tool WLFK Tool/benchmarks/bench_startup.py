@@ -0,0 +1,121 @@
+"""Startup benchmark for the WLFK Tool GUI.
+
+Each sample runs in a fresh interpreter and measures:
+    import_ms       time to import WLFK1 (including tkinter and the catalog)
+    construct_ms    time to create the Tk root and build WLFKTool
+    first_frame_ms  time from before the import until the main window has been
+                    mapped and its first redraw has run
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--json] [--max-first-frame-ms 400]
+
+Without a display only import_ms is reported. With --max-first-frame-ms (or
+--max-import-ms) the exit status is 1 when the median exceeds the limit, so the
+benchmark can be used to catch startup regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON object.
+_SAMPLE = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, TOOL_DIR)
+import WLFK1
+imported = time.perf_counter()
+result = {"import_ms": (imported - start) * 1000}
+try:
+    import tkinter as tk
+    root = tk.Tk()
+except Exception as e:
+    result["error"] = f"no display: {e}"
+else:
+    app = WLFK1.WLFKTool(root)
+    constructed = time.perf_counter()
+    result["construct_ms"] = (constructed - imported) * 1000
+
+    def on_map(event):
+        if event.widget is root:
+            # Redraws are idle callbacks too; this one runs after the first frame is drawn.
+            root.after_idle(on_first_frame)
+
+    def on_first_frame():
+        if "first_frame_ms" not in result:
+            result["first_frame_ms"] = (time.perf_counter() - start) * 1000
+            root.after(0, root.destroy)
+
+    root.bind("<Map>", on_map)
+    root.after(10000, root.destroy) # Give up if the window never maps
+    root.mainloop()
+print(json.dumps(result))
+"""
+
+
+def run_sample():
+    """Runs one fresh-interpreter sample and returns its measurements."""
+    code = _SAMPLE.replace("TOOL_DIR", repr(TOOL_DIR))
+    process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=False)
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        raise RuntimeError(f"sample failed ({process.returncode}): {process.stderr.strip()}")
+    return json.loads(lines[-1])
+
+
+def summarize(samples, key):
+    values = [sample[key] for sample in samples if key in sample]
+    if not values:
+        return None
+    return {
+        "median": round(statistics.median(values), 2),
+        "min": round(min(values), 2),
+        "max": round(max(values), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure WLFK Tool import time and time-to-first-frame.")
+    parser.add_argument("--runs", type=int, default=10, help="fresh-interpreter samples to take (default: 10)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--max-import-ms", type=float, help="fail if the median import time exceeds this")
+    parser.add_argument("--max-first-frame-ms", type=float, help="fail if the median time-to-first-frame exceeds this")
+    args = parser.parse_args(argv)
+
+    samples = [run_sample() for _ in range(max(1, args.runs))]
+    results = {
+        "runs": len(samples),
+        "python": sys.version.split()[0],
+        "import_ms": summarize(samples, "import_ms"),
+        "construct_ms": summarize(samples, "construct_ms"),
+        "first_frame_ms": summarize(samples, "first_frame_ms"),
+    }
+    errors = sorted({sample["error"] for sample in samples if "error" in sample})
+    if errors:
+        results["note"] = "; ".join(errors)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"WLFK Tool startup, {results['runs']} runs (median / min / max, ms)")
+        for key in ("import_ms", "construct_ms", "first_frame_ms"):
+            stats = results[key]
+            shown = f"{stats['median']:.1f} / {stats['min']:.1f} / {stats['max']:.1f}" if stats else "n/a"
+            print(f"  {key:<15} {shown}")
+        if errors:
+            print(f"  note: {results['note']}")
+
+    status = 0
+    for key, limit in (("import_ms", args.max_import_ms), ("first_frame_ms", args.max_first_frame_ms)):
+        if limit is not None and results[key] is not None and results[key]["median"] > limit:
+            print(f"REGRESSION: median {key} {results[key]['median']:.1f} > {limit:.1f}", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,494 @@
+# Privilege broker: a helper started once per session with root rights (through pkexec, or
+# an administrator prompt on macOS) that runs the catalog's 'sudo ...' commands for the tool
+# over a local Unix socket. Root commands then neither start and authenticate sudo on every
+# run nor hang on a password prompt nobody can answer without a TTY. The helper only runs
+# commands on its own allowlist, built from the catalog; a client can't widen it.
+#
+# Testing without root: start a stand-in helper as a normal user
+#     python3 wlfk_broker.py serve --socket /tmp/wlfk-test/broker.sock
+# and point the tool at it with WLFK_BROKER_SOCKET=/tmp/wlfk-test/broker.sock; commands
+# then run unprivileged. This module must not import tkinter.
+import argparse
+import itertools
+import json
+import os
+import platform
+import re
+import shlex
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+from wlfk_catalog import CATALOG, NEEDS_ROOT, WINDOWS
+from wlfk_jobs import READ_CHUNK_SIZE, ChildWaiter, kill_process_group, process_group_kwargs
+
+# An already running helper to use instead of starting one (e.g. a non-root stand-in).
+SOCKET_ENV = "WLFK_BROKER_SOCKET"
+# How long the user has to answer the password prompt before the helper counts as unavailable.
+HELPER_START_SECONDS = 120
+# The helper exits once it has had no client for this long (and never waits longer for the first one).
+IDLE_EXIT_SECONDS = 60
+
+# Frames in both directions: kind, request id, payload length, then the payload.
+HEADER = struct.Struct("!BII")
+MAX_PAYLOAD = 1024 * 1024
+RUN = 1 # Client: run the command in the payload (UTF-8)
+CANCEL = 2 # Client: kill the request's process group
+STDOUT = 3 # Helper: raw output bytes; an empty payload ends the stream
+STDERR = 4
+EXIT = 5 # Helper: JSON {"returncode", "rusage": [user s, system s, max RSS] or null}; always the last frame
+REJECTED = 6 # Helper: the command is not allowed or could not start (payload: the reason)
+# Exit status reported for a rejected command or a lost helper (a shell's "cannot execute").
+REJECTED_EXIT_CODE = 126
+
+# 'sudo' at the start of the command and of every command in a list or pipeline.
+_SUDO_PATTERN = re.compile(r"(^|&&|\|\||[;|])(\s*)sudo\s+")
+
+
+class BrokerError(Exception):
+    """The helper can't be reached or started; the command should be run directly."""
+
+
+def allowed_commands():
+    """The commands the helper runs: catalog entries for Linux/macOS that need root and don't open a window."""
+    return frozenset(entry.command for entry in CATALOG.by_tag.get(NEEDS_ROOT, ())
+                     if entry.os != WINDOWS and not entry.launches_gui)
+
+
+def unprivileged_command(command):
+    """The command without its 'sudo' prefixes, as the (already root) helper runs it."""
+    return _SUDO_PATTERN.sub(r"\1\2", command)
+
+
+def default_socket_path():
+    """Socket in a per-user directory (XDG_RUNTIME_DIR, or the temp directory)."""
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"wlfk-{os.getuid()}", "broker.sock")
+
+
+def elevation_available():
+    """True if a helper is configured, or one can be started with root rights from the GUI."""
+    if os.environ.get(SOCKET_ENV):
+        return True
+    if platform.system() == "Darwin":
+        return shutil.which("osascript") is not None
+    return platform.system() == "Linux" and shutil.which("pkexec") is not None
+
+
+def _private_directory(path, owner):
+    """Checks that path is a directory only owner (or root) can write to."""
+    stat = os.lstat(path)
+    if not os.path.isdir(path) or os.path.islink(path) or stat.st_uid not in (owner, 0) or stat.st_mode & 0o022:
+        raise BrokerError(f"{path} is not a private directory")
+
+
+def _send(sock, lock, kind, request_id, payload=b""):
+    with lock:
+        sock.sendall(HEADER.pack(kind, request_id, len(payload)) + payload)
+
+
+def _receive(sock):
+    """Reads one frame; returns (kind, request id, payload), or None once the peer is gone."""
+    header = _receive_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    kind, request_id, length = HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        return None # Not our protocol
+    payload = _receive_exactly(sock, length)
+    if payload is None:
+        return None
+    return kind, request_id, payload
+
+
+def _receive_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        try:
+            chunk = sock.recv(size - len(data))
+        except OSError:
+            return None
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+# --- Helper side ---
+class BrokerServer:
+    """The helper: accepts clients on a Unix socket and runs their allowed commands.
+
+    Every client gets its own thread; every command runs in its own process group with
+    its output forwarded as raw bytes (decoding stays with the client). When a client
+    disconnects, whatever it still had running is killed.
+    """
+
+    def __init__(self, socket_path, allowed_uid=None, commands=None, idle_exit=IDLE_EXIT_SECONDS):
+        self.socket_path = socket_path
+        self.allowed_uid = os.getuid() if allowed_uid is None else allowed_uid
+        self.commands = allowed_commands() if commands is None else frozenset(commands)
+        self.idle_exit = idle_exit
+        self._clients = 0
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        directory = os.path.dirname(self.socket_path)
+        _private_directory(directory, self.allowed_uid)
+        if os.path.lexists(self.socket_path):
+            os.unlink(self.socket_path) # Left behind by a helper that was killed
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            listener.bind(self.socket_path)
+            if os.geteuid() == 0 and self.allowed_uid != 0:
+                os.chown(self.socket_path, self.allowed_uid, -1)
+            os.chmod(self.socket_path, 0o600)
+            listener.listen()
+            listener.settimeout(self.idle_exit)
+            while True:
+                try:
+                    connection, _ = listener.accept()
+                except socket.timeout:
+                    with self._lock:
+                        if self._clients == 0:
+                            return
+                    continue
+                if not self._peer_allowed(connection):
+                    connection.close()
+                    continue
+                with self._lock:
+                    self._clients += 1
+                threading.Thread(target=self._serve_client, args=(connection,), daemon=True).start()
+        finally:
+            listener.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def _peer_allowed(self, connection):
+        """Only the user the helper was started for (or root) may use it; elsewhere the socket's mode decides."""
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        _, uid, _ = struct.unpack("3i", credentials)
+        return uid in (self.allowed_uid, 0)
+
+    def _serve_client(self, connection):
+        session = _Session(connection)
+        try:
+            while True:
+                frame = _receive(connection)
+                if frame is None:
+                    break
+                kind, request_id, payload = frame
+                if kind == RUN:
+                    with session.lock:
+                        session.processes[request_id] = None # Starting
+                    threading.Thread(target=self._run, args=(session, request_id, payload.decode("utf-8", "replace")),
+                                     daemon=True).start()
+                elif kind == CANCEL:
+                    session.cancel(request_id)
+        finally:
+            with session.lock:
+                session.closed = True
+                running = [entry for entry in session.processes.values() if entry is not None]
+            for process, waiter in running:
+                kill_process_group(process, waiter.exited)
+            connection.close()
+            with self._lock:
+                self._clients -= 1
+
+    def _run(self, session, request_id, command):
+        send = lambda kind, payload=b"": session.send(kind, request_id, payload)
+        try:
+            if command not in self.commands:
+                send(REJECTED, f"Refused by the privileged helper: {command!r} is not a catalog command that needs root.".encode())
+                return
+            try:
+                process = subprocess.Popen(unprivileged_command(command), shell=True, stdin=subprocess.DEVNULL,
+                                           stdout=subprocess.PIPE, stderr=subprocess.PIPE, **process_group_kwargs())
+            except OSError as e:
+                send(REJECTED, f"The privileged helper could not start the command: {e}".encode())
+                return
+            waiter = ChildWaiter(process)
+            with session.lock:
+                session.processes[request_id] = (process, waiter)
+                # Cancelled while starting, or the client left meanwhile
+                stop = request_id in session.cancelled or session.closed
+            if stop:
+                threading.Thread(target=kill_process_group, args=(process, waiter.exited), daemon=True).start()
+            readers = [threading.Thread(target=self._forward, args=(stream, kind, send), daemon=True)
+                       for stream, kind in ((process.stdout, STDOUT), (process.stderr, STDERR))]
+            for reader in readers:
+                reader.start()
+            waiter.exited.wait()
+            for reader in readers:
+                reader.join()
+            rusage = waiter.rusage
+            usage = None if rusage is None else [rusage.ru_utime, rusage.ru_stime, rusage.ru_maxrss]
+            send(EXIT, json.dumps({"returncode": process.returncode, "rusage": usage}).encode())
+        except OSError:
+            pass # The client is gone; _serve_client kills what is left
+        finally:
+            with session.lock:
+                session.processes.pop(request_id, None)
+                session.cancelled.discard(request_id)
+
+    @staticmethod
+    def _forward(stream, kind, send):
+        client_gone = False
+        try:
+            while True:
+                chunk = stream.read1(READ_CHUNK_SIZE)
+                if not client_gone:
+                    try:
+                        send(kind, chunk)
+                    except OSError:
+                        client_gone = True # Keep draining the pipe so the command isn't blocked
+                if not chunk:
+                    break
+        finally:
+            stream.close()
+
+
+class _Session:
+    """One client connection on the helper side."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.send_lock = threading.Lock()
+        self.lock = threading.Lock() # Guards processes, cancelled and closed
+        self.processes = {} # request id -> (Popen, ChildWaiter), or None while it starts
+        self.cancelled = set() # Requests cancelled while they were starting
+        self.closed = False
+
+    def send(self, kind, request_id, payload=b""):
+        _send(self.connection, self.send_lock, kind, request_id, payload)
+
+    def cancel(self, request_id):
+        with self.lock:
+            if request_id not in self.processes:
+                return # Already finished
+            entry = self.processes[request_id]
+            if entry is None:
+                self.cancelled.add(request_id)
+                return
+        process, waiter = entry
+        threading.Thread(target=kill_process_group, args=(process, waiter.exited), daemon=True).start()
+
+
+# --- Tool side ---
+class RemoteProcess:
+    """A command running in the helper: output arrives through the callbacks, then `exited` is set."""
+
+    def __init__(self, client, request_id, on_stdout, on_stderr):
+        self.client = client
+        self.request_id = request_id
+        self.streams = {STDOUT: on_stdout, STDERR: on_stderr}
+        self.exited = threading.Event()
+        self.returncode = None
+        self.rusage = None # Like resource.struct_rusage: ru_utime, ru_stime, ru_maxrss
+        self.error = None # Why the helper didn't run the command, or lost it
+
+    def cancel(self):
+        try:
+            self.client.send(CANCEL, self.request_id)
+        except OSError:
+            pass # Lost connection; _finish() has been or will be called
+
+    def _finish(self, returncode, error=None, rusage=None):
+        # A stream the helper didn't end (rejected command, lost connection) is ended here.
+        for kind, callback in self.streams.items():
+            if callback is not None:
+                callback(b"")
+        self.streams = {}
+        self.returncode = returncode
+        self.error = error
+        if rusage is not None:
+            self.rusage = SimpleNamespace(ru_utime=rusage[0], ru_stime=rusage[1], ru_maxrss=rusage[2])
+        self.exited.set()
+
+
+class BrokerClient:
+    """One connection to the helper; any number of commands run over it at once."""
+
+    def __init__(self, socket_path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(socket_path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.alive = True
+        self._send_lock = threading.Lock()
+        self._requests = {} # request id -> RemoteProcess
+        self._ids = itertools.count(1)
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def send(self, kind, request_id, payload=b""):
+        _send(self.sock, self._send_lock, kind, request_id, payload)
+
+    def run(self, command, on_stdout, on_stderr):
+        remote = RemoteProcess(self, next(self._ids), on_stdout, on_stderr)
+        self._requests[remote.request_id] = remote
+        try:
+            self.send(RUN, remote.request_id, command.encode("utf-8"))
+        except OSError as e:
+            self._requests.pop(remote.request_id, None)
+            raise BrokerError(f"lost the connection to the helper: {e}")
+        return remote
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def _read(self):
+        """Dispatches the helper's frames to the RemoteProcesses (on this client's own thread)."""
+        while True:
+            frame = _receive(self.sock)
+            if frame is None:
+                break
+            kind, request_id, payload = frame
+            remote = self._requests.get(request_id)
+            if remote is None:
+                continue
+            if kind in (STDOUT, STDERR):
+                callback = remote.streams.pop(kind, None) if not payload else remote.streams.get(kind)
+                if callback is not None:
+                    callback(payload)
+            elif kind == EXIT:
+                status = json.loads(payload)
+                del self._requests[request_id]
+                remote._finish(status["returncode"], rusage=status.get("rusage"))
+            elif kind == REJECTED:
+                del self._requests[request_id]
+                remote._finish(REJECTED_EXIT_CODE, payload.decode("utf-8", "replace"))
+        self.alive = False
+        for remote in list(self._requests.values()):
+            remote._finish(REJECTED_EXIT_CODE, "Lost the connection to the privileged helper; the command was stopped.")
+        self._requests.clear()
+
+
+class PrivilegeBroker:
+    """The tool's side of the broker: starts the helper on first use and hands it root commands.
+
+    If the helper can't be started (no pkexec, the password prompt was dismissed, ...)
+    the broker stays unavailable for the session and the commands run directly, as
+    without a broker.
+    """
+
+    def __init__(self, socket_path=None):
+        configured = os.environ.get(SOCKET_ENV)
+        self.socket_path = socket_path or configured or default_socket_path()
+        self.launch = not (socket_path or configured) # A helper given to us is never replaced by a new one
+        self.commands = allowed_commands()
+        self.unavailable = None # Why the helper couldn't be started
+        self._client = None
+        self._lock = threading.Lock()
+
+    def handles(self, command):
+        return command in self.commands and self.unavailable is None
+
+    def run(self, command, on_stdout, on_stderr):
+        """Starts a command in the helper and returns its RemoteProcess; raises BrokerError."""
+        return self._connect().run(command, on_stdout, on_stderr)
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def _connect(self):
+        # Jobs that need the helper while it is being started wait here for it.
+        with self._lock:
+            if self.unavailable is not None:
+                raise BrokerError(self.unavailable)
+            if self._client is not None and self._client.alive:
+                return self._client
+            try:
+                self._client = BrokerClient(self.socket_path)
+                return self._client
+            except OSError as e:
+                if not self.launch:
+                    self.unavailable = f"cannot connect to {self.socket_path}: {e.strerror or e}"
+                    raise BrokerError(self.unavailable)
+            try:
+                self._client = self._start_helper()
+            except BrokerError as e:
+                self.unavailable = str(e)
+                raise
+            return self._client
+
+    def _start_helper(self):
+        directory = os.path.dirname(self.socket_path)
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            _private_directory(directory, os.getuid())
+        except OSError as e:
+            raise BrokerError(f"cannot create {directory}: {e.strerror or e}")
+        command = elevated_helper_command(self.socket_path)
+        if command is None:
+            raise BrokerError("no way to start it with root rights (pkexec not installed)")
+        try:
+            launcher = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError as e:
+            raise BrokerError(f"cannot run {command[0]}: {e.strerror or e}")
+        deadline = time.monotonic() + HELPER_START_SECONDS
+        while time.monotonic() < deadline:
+            try:
+                return BrokerClient(self.socket_path)
+            except OSError:
+                pass
+            # pkexec keeps running as the helper's parent; osascript returns once it started it.
+            if launcher.poll() not in (None, 0):
+                raise BrokerError(f"the password prompt was dismissed or failed (exit code {launcher.returncode})")
+            time.sleep(0.1)
+        launcher.kill()
+        raise BrokerError(f"the helper did not start within {HELPER_START_SECONDS} seconds")
+
+
+def elevated_helper_command(socket_path):
+    """argv that starts the helper for this user with root rights, or None if there's no way to."""
+    helper = [sys.executable, os.path.abspath(__file__), "serve", "--socket", socket_path, "--uid", str(os.getuid())]
+    if platform.system() == "Darwin" and shutil.which("osascript"):
+        shell_command = " ".join(shlex.quote(argument) for argument in helper) + " >/dev/null 2>&1 &"
+        script = shell_command.replace("\\", "\\\\").replace('"', '\\"')
+        return ["osascript", "-e", f'do shell script "{script}" with administrator privileges']
+    pkexec = shutil.which("pkexec")
+    if platform.system() == "Linux" and pkexec:
+        return [pkexec] + helper
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="wlfk_broker.py", description="Privileged helper for the WLFK Tool.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    serve_parser = subparsers.add_parser("serve", help="run the helper (started by the tool, or by hand as a stand-in)")
+    serve_parser.add_argument("--socket", default=None, help="socket path (default: the tool's per-user path)")
+    serve_parser.add_argument("--uid", type=int, default=None, help="user allowed to connect (default: the current one)")
+    serve_parser.add_argument("--idle-exit", type=float, default=IDLE_EXIT_SECONDS,
+                              help=f"exit after this many seconds without a client (default: {IDLE_EXIT_SECONDS})")
+    args = parser.parse_args(argv)
+    socket_path = args.socket or default_socket_path()
+    if args.socket is None:
+        os.makedirs(os.path.dirname(socket_path), mode=0o700, exist_ok=True)
+    try:
+        BrokerServer(socket_path, args.uid, idle_exit=args.idle_exit).serve_forever()
+    except (OSError, BrokerError) as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
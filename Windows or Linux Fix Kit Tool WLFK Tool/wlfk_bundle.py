@@ -0,0 +1,110 @@
+# "Collect diagnostics": runs every read-only catalog command of one group (Windows
+# version, Linux distro or macOS) in parallel and streams the outputs into a .tar.gz
+# with a manifest of timings and exit codes. This module must not import tkinter.
+import json
+import platform
+import queue
+import re
+import tarfile
+import tempfile
+import time
+from io import BytesIO
+
+from wlfk_catalog import CATALOG, READ_ONLY, FOLLOWS, LAUNCHES_GUI
+from wlfk_jobs import JobManager, QUEUED, RUNNING
+
+# Commands run at the same time; the bundle takes about as long as its slowest command.
+DEFAULT_BUNDLE_JOBS = 8
+# Per-command limit so one hung command can't hold up the whole bundle.
+DEFAULT_BUNDLE_TIMEOUT = 120.0
+
+
+def diagnostic_entries(group):
+    """The read-only commands of a group that exit on their own and print to stdout."""
+    return CATALOG.select(group=group, tags=(READ_ONLY,), exclude_tags=(FOLLOWS, LAUNCHES_GUI))
+
+
+def default_bundle_name():
+    return f"wlfk-diagnostics-{platform.node() or 'host'}-{time.strftime('%Y%m%d-%H%M%S')}.tar.gz"
+
+
+def _file_name(index, name):
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-").lower()
+    return f"{index:02d}-{slug}.txt"
+
+
+def collect_diagnostics(group, path, max_jobs=DEFAULT_BUNDLE_JOBS, timeout=DEFAULT_BUNDLE_TIMEOUT,
+                        progress=None, cancel_event=None):
+    """Runs diagnostic_entries(group) and writes them to a gzip-compressed tar at path.
+
+    Output is spooled to one temporary file per command while it runs and copied into
+    the archive as soon as that command finishes, so nothing is held in memory and the
+    archive is written while slower commands are still running. progress(done, total, job)
+    is called (from this thread) after each command. Setting cancel_event stops the
+    remaining commands; what finished so far is still archived. Returns the manifest.
+    """
+    entries = diagnostic_entries(group)
+    root = default_bundle_name()[:-len(".tar.gz")]
+    manifest = {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "group": group,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "max_jobs": max_jobs,
+        "timeout_s": timeout,
+        "commands": [],
+    }
+    started = time.monotonic()
+    manager = JobManager(max_jobs=max_jobs)
+    spools = {} # job id -> (temporary file, manifest record)
+    cancelled = False
+    try:
+        with tarfile.open(path, "w:gz") as archive:
+            for index, entry in enumerate(entries, 1):
+                job = manager.submit(entry.name, entry.command, timeout=timeout, probe=entry.native_probe)
+                record = {"name": entry.name, "command": entry.command, "file": _file_name(index, entry.name)}
+                manifest["commands"].append(record)
+                spool = tempfile.TemporaryFile()
+                spool.write(f"# {entry.name}\n$ {entry.command}\n\n".encode("utf-8"))
+                spools[job.id] = (spool, record)
+
+            done = 0
+            while done < len(entries):
+                if cancel_event is not None and cancel_event.is_set() and not cancelled:
+                    manager.cancel_all()
+                    cancelled = True
+                try:
+                    job, kind, payload = manager.events.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                spool, record = spools[job.id]
+                if kind == "text":
+                    spool.write(payload.encode("utf-8", "replace"))
+                    continue
+                # Events are queued in order, so the final state event comes after all of the job's text.
+                if payload in (QUEUED, RUNNING):
+                    continue
+                record.update(state=job.state, exit_code=job.returncode, duration_s=round(job.runtime, 3),
+                              bytes=spool.tell())
+                info = tarfile.TarInfo(f"{root}/{record['file']}")
+                info.size = spool.tell()
+                info.mtime = time.time()
+                spool.seek(0)
+                archive.addfile(info, spool)
+                spool.close()
+                done += 1
+                if progress is not None:
+                    progress(done, len(entries), job)
+
+            manifest["duration_s"] = round(time.monotonic() - started, 3)
+            manifest["cancelled"] = cancelled
+            data = json.dumps(manifest, indent=2).encode("utf-8")
+            info = tarfile.TarInfo(f"{root}/manifest.json")
+            info.size = len(data)
+            info.mtime = time.time()
+            archive.addfile(info, BytesIO(data))
+    finally:
+        manager.shutdown()
+        for spool, _ in spools.values():
+            spool.close()
+    return manifest
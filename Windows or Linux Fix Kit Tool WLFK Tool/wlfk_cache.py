@@ -0,0 +1,136 @@
+# Opt-in cache of read-only inventory command results (package lists, lscpu, lspci, ...).
+# Results are keyed by host and command, expire after a TTL, and are dropped early when a
+# file that changes with the inventory (e.g. /var/lib/dpkg/status) has changed.
+# This module must not import tkinter.
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+
+# Seconds a cached result stays valid when nothing it depends on has changed.
+DEFAULT_TTL = 15 * 60
+
+
+def default_cache_dir():
+    """Per-user directory for WLFK Tool caches (XDG_CACHE_HOME, or LOCALAPPDATA on Windows)."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "wlfk")
+
+
+def change_signature(paths):
+    """Cheap fingerprint of the given files/directories: their mtimes and sizes.
+
+    A directory also contributes the entries directly inside it, since database files
+    (rpmdb.sqlite and its -wal, pacman's local/) are rewritten in place or added to.
+    Paths that don't exist are skipped, so one list can cover several distributions.
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append([path, stat.st_mtime_ns, stat.st_size])
+        if os.path.isdir(path):
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            entry_stat = entry.stat(follow_symlinks=False)
+                            signature.append([entry.path, entry_stat.st_mtime_ns, entry_stat.st_size])
+            except OSError:
+                pass
+    signature.sort()
+    return signature
+
+
+class CachedResult:
+    """A cached command result."""
+
+    def __init__(self, host, command, output, created, signature):
+        self.host = host
+        self.command = command
+        self.output = output
+        self.created = created # time.time() when the command finished
+        self.signature = signature
+
+    @property
+    def age(self):
+        return max(0.0, time.time() - self.created)
+
+
+class ResultCache:
+    """Command results on disk (one JSON file per host+command), with an in-memory front.
+
+    Only successful runs are stored. A hit costs a dict lookup plus a few stat() calls
+    for the change signature; the command and its package database scan are skipped.
+    """
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL, host=None):
+        self.directory = directory or os.path.join(default_cache_dir(), "results")
+        self.ttl = ttl
+        self.host = host or platform.node()
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def signature(self, paths):
+        """Change signature to store with a result; see change_signature()."""
+        return change_signature(paths)
+
+    def _key(self, command):
+        return hashlib.sha1(f"{self.host}\0{command}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, command, paths=()):
+        """Returns the CachedResult for command, or None if missing, expired or invalidated."""
+        key = self._key(command)
+        with self._lock:
+            result = self._memory.get(key)
+        if result is None:
+            try:
+                with open(self._path(key), encoding="utf-8") as cache_file:
+                    data = json.load(cache_file)
+                result = CachedResult(data["host"], data["command"], data["output"], data["created"], data["signature"])
+            except (OSError, ValueError, KeyError):
+                return None
+            with self._lock:
+                self._memory[key] = result
+        if result.host != self.host or result.command != command:
+            return None
+        if result.age > self.ttl or result.signature != change_signature(paths):
+            self.invalidate(command)
+            return None
+        return result
+
+    def put(self, command, output, signature):
+        """Stores a successful result. signature must be taken *before* the command ran,
+        so a change made while it was running still invalidates the entry."""
+        key = self._key(command)
+        result = CachedResult(self.host, command, output, time.time(), signature)
+        with self._lock:
+            self._memory[key] = result
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temporary = self._path(key) + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as cache_file:
+                json.dump(vars(result), cache_file)
+            os.replace(temporary, self._path(key)) # Readers never see a half-written file
+        except OSError:
+            pass # The in-memory copy still works for this session
+        return result
+
+    def invalidate(self, command):
+        key = self._key(command)
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -0,0 +1,246 @@
+# Capability probe run once at startup (on a background thread in the GUI): which catalog
+# group this machine is (/etc/os-release, the Windows build), which of the programs the
+# catalog commands call are installed, and whether the tool runs as root. The program
+# lookup is cached on disk and redone when a PATH directory or os-release changes, i.e.
+# after a package is installed or removed. This module must not import tkinter.
+import json
+import os
+import platform
+import shlex
+import sys
+
+from wlfk_cache import default_cache_dir
+from wlfk_catalog import CATALOG, MACOS, WINDOWS, LINUX_DISTROS
+
+OS_RELEASE_PATHS = ("/etc/os-release", "/usr/lib/os-release")
+CACHE_FILE = "capabilities.json"
+# /etc/os-release IDs (ID and ID_LIKE) of each distribution group, most specific first.
+DISTRO_IDS = [
+    ("Ubuntu/Debian", ("ubuntu", "debian", "linuxmint", "pop", "raspbian")),
+    ("Fedora/CentOS/RHEL", ("fedora", "rhel", "centos", "rocky", "almalinux")),
+    ("Arch Linux", ("arch", "manjaro", "endeavouros")),
+    ("OpenSUSE", ("suse", "sles")),
+]
+# Shell built-ins that appear in catalog commands; they are never looked up in PATH.
+SHELL_BUILTINS = frozenset(("echo", "cd", "exit", "true", "false", ":", "test", "[", "set", "export"))
+# Separators between the commands of a shell list or pipeline.
+_SHELL_OPERATORS = frozenset(("|", "||", "&&", ";", "&", "(", ")"))
+
+
+def parse_os_release(paths=OS_RELEASE_PATHS):
+    """The KEY=value pairs of the first os-release file found, or {}."""
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as os_release:
+                text = os_release.read()
+        except OSError:
+            continue
+        fields = {}
+        for line in text.splitlines():
+            key, sep, value = line.partition("=")
+            if not sep or line.startswith("#"):
+                continue
+            try:
+                value = shlex.split(value)[0] if value.strip() else ""
+            except (ValueError, IndexError):
+                value = value.strip().strip("\"'")
+            fields[key.strip()] = value
+        return fields
+    return {}
+
+
+def detect_distro(os_release):
+    """Catalog group for an os-release dict: its ID, then its ID_LIKE, else 'Generic Linux'."""
+    ids = [os_release.get("ID", "").lower()] + os_release.get("ID_LIKE", "").lower().split()
+    for distro_id in ids:
+        if distro_id.startswith("opensuse"): # opensuse-leap, opensuse-tumbleweed, ...
+            return "OpenSUSE"
+        for group, known in DISTRO_IDS:
+            if distro_id in known:
+                return group
+    return LINUX_DISTROS[-1]
+
+
+def detect_windows_version():
+    """Catalog group of the running Windows version, or None if it isn't one the catalog knows."""
+    release = platform.release()
+    if release == "10":
+        # Windows 11 still reports release 10; its builds start at 22000.
+        return "Windows 11" if sys.getwindowsversion().build >= 22000 else "Windows 10"
+    return {"Vista": "Windows Vista", "7": "Windows 7", "8": "Windows 8/8.1", "8.1": "Windows 8/8.1",
+            "11": "Windows 11"}.get(release)
+
+
+def command_programs(command):
+    """The programs a shell command line runs: the first word of every command in its lists
+    and pipelines, past 'sudo' and VAR=value assignments (built-ins are left out)."""
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    programs = []
+    expect_program = True
+    try:
+        for token in lexer:
+            if token in _SHELL_OPERATORS:
+                expect_program = True
+            elif expect_program:
+                if token == "sudo" or ("=" in token and not token.startswith("=")):
+                    continue
+                if token not in SHELL_BUILTINS and token not in programs:
+                    programs.append(token)
+                expect_program = False
+    except ValueError:
+        pass # Unbalanced quotes: keep what was found
+    return programs
+
+
+def _path_directories(path=None):
+    path = os.environ.get("PATH", os.defpath) if path is None else path
+    directories = []
+    for directory in path.split(os.pathsep):
+        if directory and directory not in directories:
+            directories.append(directory)
+    return directories
+
+
+def resolve_programs(names, path=None):
+    """{name: full path or None}, like shutil.which() for each name, but listing every PATH
+    directory once instead of stat()ing every candidate."""
+    windows = os.name == "nt"
+    extensions = [""]
+    if windows:
+        extensions += [extension.lower() for extension in os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(";")]
+    found = {}
+    remaining = [name for name in names if os.sep not in name and "/" not in name]
+    for name in names:
+        if name not in remaining: # A path: check it directly
+            found[name] = name if os.access(name, os.X_OK) else None
+    for directory in _path_directories(path):
+        if not remaining:
+            break
+        try:
+            entries = os.listdir(directory)
+        except OSError:
+            continue
+        entries = {entry.lower() for entry in entries} if windows else set(entries)
+        for name in list(remaining):
+            for extension in extensions:
+                candidate = (name + extension).lower() if windows else name + extension
+                if candidate not in entries:
+                    continue
+                full_path = os.path.join(directory, candidate)
+                if windows or (os.access(full_path, os.X_OK) and not os.path.isdir(full_path)):
+                    found[name] = full_path
+                    remaining.remove(name)
+                    break
+    found.update((name, None) for name in remaining)
+    return found
+
+
+def environment_signature(path=None):
+    """What the cached lookup depends on: PATH and the mtimes of its directories and of os-release."""
+    signature = [["PATH", os.environ.get("PATH", os.defpath) if path is None else path]]
+    for directory in list(_path_directories(path)) + list(OS_RELEASE_PATHS):
+        try:
+            signature.append([directory, os.stat(directory).st_mtime_ns])
+        except OSError:
+            signature.append([directory, None])
+    return signature
+
+
+def is_root():
+    """True if running as Administrator (Windows) or with effective UID 0."""
+    if os.name == "nt":
+        try:
+            import ctypes
+            return bool(ctypes.windll.shell32.IsUserAnAdmin())
+        except Exception:
+            return False
+    return os.geteuid() == 0
+
+
+class Capabilities:
+    """What the probe found out about this machine."""
+
+    def __init__(self, group, os_release, programs, root, elevation, cached=False):
+        self.group = group # Catalog group of this machine (version/distro/macOS), or None
+        self.os_release = os_release
+        self.programs = programs # program name -> full path, or None if not installed
+        self.root = root
+        self.elevation = elevation # Root commands can run through the privileged helper (wlfk_broker)
+        self.cached = cached # The program lookup came from the on-disk cache
+
+    def missing(self, entry):
+        """Programs an entry's command runs that aren't installed (only for this OS's entries)."""
+        if not entry.runs_natively or entry.native_probe:
+            return [] # Answered in-process, or meant for another OS (warned about when run)
+        return [program for program in command_programs(entry.command) if self.programs.get(program, "") is None]
+
+    def unavailable_reason(self, entry):
+        """Why an entry can't run here, or None."""
+        missing = self.missing(entry)
+        if missing:
+            return f"not installed: {', '.join(missing)}"
+        if entry.needs_root and entry.runs_natively and entry.os != WINDOWS and not (self.root or self.elevation):
+            return "needs root (run the tool with sudo)"
+        return None
+
+    def unavailable(self, group):
+        """{command name: reason} for the commands of a group that can't run here."""
+        reasons = {}
+        for name, entry in CATALOG.group(group).items():
+            reason = self.unavailable_reason(entry)
+            if reason:
+                reasons[name] = reason
+        return reasons
+
+
+def catalog_programs():
+    """Every program the catalog commands for this OS run."""
+    programs = []
+    for entry in CATALOG.entries:
+        if entry.runs_natively:
+            programs.extend(program for program in command_programs(entry.command) if program not in programs)
+    return programs
+
+
+def detect_capabilities(cache_path=None, refresh=False):
+    """Probes the machine, reusing the cached program lookup while PATH and os-release are unchanged."""
+    cache_path = cache_path or os.path.join(default_cache_dir(), CACHE_FILE)
+    system = platform.system()
+    signature = environment_signature()
+    needed = catalog_programs()
+    cached = None
+    if not refresh:
+        try:
+            with open(cache_path, encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+            if cached.get("signature") != signature or any(program not in cached["programs"] for program in needed):
+                cached = None
+        except (OSError, ValueError, KeyError, AttributeError):
+            cached = None
+    if cached is not None:
+        os_release, programs = cached["os_release"], cached["programs"]
+    else:
+        os_release = parse_os_release() if system == "Linux" else {}
+        programs = resolve_programs(needed)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path + ".tmp", "w", encoding="utf-8") as cache_file:
+                json.dump({"signature": signature, "os_release": os_release, "programs": programs}, cache_file)
+            os.replace(cache_path + ".tmp", cache_path)
+        except OSError:
+            pass # Probed again next time
+    if system == "Linux":
+        group = detect_distro(os_release)
+    elif system == "Windows":
+        group = detect_windows_version()
+    elif system == "Darwin":
+        group = MACOS
+    else:
+        group = None
+    root = is_root()
+    elevation = False
+    if not root and os.name != "nt":
+        from wlfk_broker import elevation_available
+        elevation = elevation_available()
+    return Capabilities(group, os_release, programs, root, elevation, cached=cached is not None)
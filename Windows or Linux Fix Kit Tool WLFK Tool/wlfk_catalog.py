@@ -0,0 +1,323 @@
+# Command catalog shared by the GUI (WLFK1.py) and the headless CLI (wlfk_cli.py).
+# It is declared once below, built into an indexed Catalog at import time, and then
+# only looked up. This module must not import tkinter.
+import platform
+
+WINDOWS_VERSIONS = ["Windows Vista", "Windows 7", "Windows 8/8.1", "Windows 10", "Windows 11"]
+LINUX_DISTROS = ["Ubuntu/Debian", "Fedora/CentOS/RHEL", "Arch Linux", "OpenSUSE", "Generic Linux"]
+MACOS = "macOS" # macOS has a single command list
+
+# Operating systems, and the platform.system() name each one runs on
+WINDOWS = "Windows"
+LINUX = "Linux"
+OS_PLATFORMS = {WINDOWS: "Windows", LINUX: "Linux", MACOS: "Darwin"}
+
+# Tags
+READ_ONLY = "read-only" # Only reports on the system
+MUTATING = "mutating" # Changes the system (repairs, updates, cleanups, restarts)
+NEEDS_ROOT = "needs-root" # Needs Administrator/root; added automatically for 'sudo ...' commands
+LAUNCHES_GUI = "launches-gui" # Opens its own window; launched without waiting for it
+FOLLOWS = "follows" # Never exits on its own (e.g. 'journalctl -f')
+
+# Group shorthands used by the declarations below
+_WINDOWS_ALL = WINDOWS_VERSIONS
+_WINDOWS_7_UP = WINDOWS_VERSIONS[1:]
+_WINDOWS_7_8 = ["Windows 7", "Windows 8/8.1"]
+_WINDOWS_10_UP = ["Windows 10", "Windows 11"]
+_LINUX_DISTROS = LINUX_DISTROS[:4] # Every distro except "Generic Linux"
+_LINUX_ALL = LINUX_DISTROS
+_RPM_DISTROS = ["Fedora/CentOS/RHEL", "OpenSUSE"]
+_NM_DISTROS = ["Fedora/CentOS/RHEL", "Arch Linux", "OpenSUSE"]
+_MACOS = [MACOS]
+
+# Package databases whose change invalidates a cached package listing
+_DPKG_DB = ("/var/lib/dpkg/status",)
+_RPM_DB = ("/var/lib/rpm", "/usr/lib/sysimage/rpm")
+_PACMAN_DB = ("/var/lib/pacman/local",)
+
+
+class CatalogEntry:
+    """One catalog command. An entry shared by several groups (versions/distros) exists once."""
+
+    def __init__(self, name, command, groups, category, tags, probe=None, cache_paths=None, table=None, analyzer=None):
+        self.name = name
+        self.command = command
+        self.probe = probe # Name of a wlfk_probes probe that produces the same output natively
+        # Results may be cached (wlfk_cache); the cache is invalidated when one of these paths changes.
+        # None means never cache; an empty tuple means cache with the TTL only.
+        self.cache_paths = cache_paths
+        self.table = table # Name of a wlfk_parsers parser that turns the output into table rows
+        # Built-in analyzer the GUI opens instead of running the command (which stays the headless equivalent)
+        self.analyzer = analyzer
+        self.groups = list(groups)
+        self.category = category
+        self.tags = frozenset(tags)
+        if groups[0] in WINDOWS_VERSIONS:
+            self.os = WINDOWS
+        elif groups[0] in LINUX_DISTROS:
+            self.os = LINUX
+        else:
+            self.os = MACOS
+
+    def __repr__(self):
+        return f"CatalogEntry({self.name!r}, {self.command!r})"
+
+    @property
+    def read_only(self):
+        return READ_ONLY in self.tags
+
+    @property
+    def needs_root(self):
+        return NEEDS_ROOT in self.tags
+
+    @property
+    def launches_gui(self):
+        return LAUNCHES_GUI in self.tags
+
+    @property
+    def follows(self):
+        return FOLLOWS in self.tags
+
+    @property
+    def cacheable(self):
+        return self.cache_paths is not None
+
+    @property
+    def runs_natively(self):
+        """True if this entry is meant for the OS the tool is running on."""
+        return OS_PLATFORMS[self.os] == platform.system()
+
+    @property
+    def native_probe(self):
+        """The probe to run in-process instead of the command, or None (probes only exist for Linux)."""
+        return self.probe if self.os == LINUX and self.runs_natively else None
+
+
+def _entry(name, command, groups, category, *tags, probe=None, cache_paths=None, table=None, analyzer=None):
+    tags = set(tags)
+    if command.startswith("sudo "):
+        tags.add(NEEDS_ROOT)
+    return CatalogEntry(name, command, groups, category, tags, probe, cache_paths, table, analyzer)
+
+
+# --- Declarations ---
+# Each command is declared once with every group it belongs to. Within a group, commands
+# are listed in declaration order.
+_ENTRIES = [
+    # Windows
+    # Note: Many of these require Administrator privileges.
+    _entry("System File Checker (SFC)", "sfc /scannow", _WINDOWS_ALL, "Repair", MUTATING, NEEDS_ROOT),
+    _entry("Check Disk (C:)", "chkdsk C: /f /r", _WINDOWS_ALL, "Disks", MUTATING, NEEDS_ROOT),
+    _entry("Deployment Image Servicing and Management (DISM)", "dism /online /cleanup-image /restorehealth", _WINDOWS_7_UP, "Repair", MUTATING, NEEDS_ROOT),
+    _entry("Restore Point (System Restore)", "rstrui.exe", _WINDOWS_ALL, "Repair", MUTATING, LAUNCHES_GUI), # Opens GUI
+    _entry("Network Reset (Winsock)", "netsh winsock reset", _WINDOWS_ALL, "Network", MUTATING, NEEDS_ROOT),
+    _entry("IP Configuration Reset", "netsh int ip reset", _WINDOWS_ALL, "Network", MUTATING, NEEDS_ROOT),
+    _entry("Flush DNS Cache", "ipconfig /flushdns", _WINDOWS_ALL, "Network", MUTATING),
+    _entry("View Network Config", "ipconfig /all", _WINDOWS_ALL, "Network", READ_ONLY),
+    _entry("View Running Processes", "tasklist", _WINDOWS_ALL, "Processes", READ_ONLY),
+    _entry("View Active Network Connections", "netstat -ano", _WINDOWS_ALL, "Network", READ_ONLY),
+    _entry("System Information", "msinfo32", _WINDOWS_7_8, "System", READ_ONLY, LAUNCHES_GUI),
+    _entry("Power Troubleshooter", "msdt.exe -id PowerDiagnostic", _WINDOWS_10_UP, "Repair", MUTATING, LAUNCHES_GUI),
+    _entry("Windows Update Troubleshooter", "msdt.exe -id WindowsUpdateDiagnostic", _WINDOWS_10_UP, "Repair", MUTATING, LAUNCHES_GUI),
+    _entry("Startup Repair", "shutdown /r /o /f /t 0", ["Windows 11"], "Repair", MUTATING, NEEDS_ROOT), # Reboots into advanced startup options
+    _entry("Battery Health Report (Laptops)", "powercfg /batteryreport", _WINDOWS_10_UP, "Hardware", READ_ONLY),
+    _entry("DirectX Diagnostic Tool", "dxdiag", _WINDOWS_10_UP, "Hardware", READ_ONLY, LAUNCHES_GUI),
+    _entry("Disk Cleanup", "cleanmgr.exe", _WINDOWS_ALL, "Disks", MUTATING, LAUNCHES_GUI), # Opens GUI
+    _entry("System Configuration (msconfig)", "msconfig.exe", _WINDOWS_ALL, "System", MUTATING, LAUNCHES_GUI), # Opens GUI
+    _entry("Event Viewer", "eventvwr.msc", _WINDOWS_7_UP, "Logs", READ_ONLY, LAUNCHES_GUI),
+    _entry("Open Services", "services.msc", _WINDOWS_10_UP, "Services", MUTATING, LAUNCHES_GUI),
+    _entry("Open Device Manager", "devmgmt.msc", _WINDOWS_10_UP, "Hardware", MUTATING, LAUNCHES_GUI),
+    _entry("Check System Health", "perfmon /report", _WINDOWS_ALL, "System", READ_ONLY), # Generates system health report
+    _entry("Run Disk Defragmenter", "defrag C: /U /V", _WINDOWS_7_UP, "Disks", MUTATING, NEEDS_ROOT),
+
+    # Linux
+    # Note: Many of these require root/sudo privileges.
+    _entry("Update & Upgrade Packages", "sudo apt update && sudo apt upgrade -y", ["Ubuntu/Debian"], "Packages", MUTATING),
+    _entry("Update & Upgrade Packages", "sudo dnf update -y", ["Fedora/CentOS/RHEL"], "Packages", MUTATING),
+    _entry("Update & Upgrade Packages", "sudo pacman -Syu", ["Arch Linux"], "Packages", MUTATING),
+    _entry("Update & Upgrade Packages", "sudo zypper update -y", ["OpenSUSE"], "Packages", MUTATING),
+    _entry("Clean APT Cache", "sudo apt clean && sudo apt autoremove -y", ["Ubuntu/Debian"], "Packages", MUTATING),
+    _entry("Clean DNF Cache", "sudo dnf clean all", ["Fedora/CentOS/RHEL"], "Packages", MUTATING),
+    _entry("Clean Pacman Cache", "sudo pacman -Sc", ["Arch Linux"], "Packages", MUTATING),
+    _entry("Clean Zypper Cache", "sudo zypper clean", ["OpenSUSE"], "Packages", MUTATING),
+    _entry("Fix Broken Packages", "sudo apt install -f", ["Ubuntu/Debian"], "Packages", MUTATING),
+    _entry("Reconfigure All Packages", "sudo dpkg --configure -a", ["Ubuntu/Debian"], "Packages", MUTATING),
+    _entry("Check Disk (e.g., /dev/sda1)", "echo 'Remember to unmount partition first: sudo umount /dev/sda1; sudo fsck /dev/sda1'", _LINUX_DISTROS, "Disks", READ_ONLY),
+    _entry("View System Journal", "journalctl -xe", _LINUX_DISTROS, "Logs", READ_ONLY),
+    _entry("Follow System Journal (Live)", "journalctl -f", _LINUX_DISTROS, "Logs", READ_ONLY, FOLLOWS),
+    _entry("View Running Processes", "ps aux", _LINUX_DISTROS, "Processes", READ_ONLY, table="processes"),
+    _entry("Restart Networking Service", "sudo systemctl restart networking", ["Ubuntu/Debian"], "Network", MUTATING),
+    _entry("Restart NetworkManager Service", "sudo systemctl restart NetworkManager", _NM_DISTROS, "Network", MUTATING),
+    _entry("List Hardware", "sudo lshw -short", _LINUX_DISTROS, "Hardware", READ_ONLY, cache_paths=()),
+    _entry("List Disk Partitions", "sudo fdisk -l", _LINUX_DISTROS, "Disks", READ_ONLY),
+    _entry("Fix Missing Packages", "sudo apt-get update --fix-missing", ["Ubuntu/Debian"], "Packages", MUTATING),
+    _entry("View Network Connections", "netstat -tulnp", _LINUX_DISTROS, "Network", READ_ONLY, table="netstat"),
+    _entry("Check Systemd Status", "systemctl status", _LINUX_DISTROS, "Services", READ_ONLY),
+    _entry("List Installed Packages", "dpkg -l", ["Ubuntu/Debian"], "Packages", READ_ONLY, cache_paths=_DPKG_DB, table="dpkg"),
+    _entry("List Installed Packages", "rpm -qa", _RPM_DISTROS, "Packages", READ_ONLY, cache_paths=_RPM_DB, table="rpm"),
+    _entry("List Installed Packages", "pacman -Q", ["Arch Linux"], "Packages", READ_ONLY, cache_paths=_PACMAN_DB, table="pacman"),
+    _entry("Analyze Directory Sizes", "du -xh -d 1 / 2>/dev/null | sort -rh | head -n 30", _LINUX_ALL, "Disks", READ_ONLY,
+           analyzer="directory-sizes"), # The GUI scans a chosen directory natively (wlfk_dirsize)
+    _entry("View Disk Usage", "df -h", ["Generic Linux"], "Disks", READ_ONLY, probe="disk-usage", table="disk-usage"),
+    _entry("View Memory Usage", "free -h", ["Generic Linux"], "System", READ_ONLY, probe="memory"),
+    _entry("List Running Services", "systemctl list-units --type=service --state=running", ["Generic Linux"], "Services", READ_ONLY),
+    _entry("View Network Interfaces", "ip a", ["Generic Linux"], "Network", READ_ONLY),
+    _entry("Ping Google", "ping -c 4 google.com", ["Generic Linux"], "Network", READ_ONLY),
+    _entry("Check DNS Resolution", "nslookup google.com", ["Generic Linux"], "Network", READ_ONLY),
+    _entry("Check Uptime", "uptime", ["Generic Linux"], "System", READ_ONLY, probe="uptime"),
+    _entry("View Kernel Messages", "dmesg | tail", ["Generic Linux"], "Logs", READ_ONLY),
+    _entry("View CPU Info", "lscpu", ["Generic Linux"], "Hardware", READ_ONLY, probe="cpu-info", cache_paths=()),
+    _entry("View PCI Devices", "lspci -knn", ["Generic Linux"], "Hardware", READ_ONLY, cache_paths=()),
+    _entry("View USB Devices", "lsusb -v", ["Generic Linux"], "Hardware", READ_ONLY, cache_paths=()),
+    _entry("Check for Dead Processes", "ps aux | grep 'Z'", _LINUX_ALL, "Processes", READ_ONLY), # Z for zombie processes
+    _entry("Show Open Files", "lsof -i", _LINUX_ALL, "Processes", READ_ONLY, table="open-files"),
+    _entry("Check CPU Usage", "top -bn1 | grep 'Cpu(s)' | sed 's/.*, *\\([0-9.]*\\)%*id.*/\\1/' | awk '{print 100 - $1}'", _LINUX_ALL, "System", READ_ONLY, probe="cpu-usage"),
+
+    # macOS
+    _entry("Software Updates (List)", "softwareupdate --list", _MACOS, "Packages", READ_ONLY),
+    _entry("Software Updates (Install All)", "sudo softwareupdate --install --all --restart", _MACOS, "Packages", MUTATING), # May require restart
+    _entry("List Disks and Partitions", "diskutil list", _MACOS, "Disks", READ_ONLY),
+    _entry("Verify Startup Disk", "diskutil verifyVolume /", _MACOS, "Disks", READ_ONLY),
+    _entry("Repair Disk Permissions (Older macOS)", "sudo diskutil repairPermissions /", _MACOS, "Disks", MUTATING), # Less relevant in modern macOS
+    _entry("Battery Status (Laptops)", "pmset -g batt", _MACOS, "Hardware", READ_ONLY),
+    _entry("System Information", "system_profiler SPSoftwareDataType", _MACOS, "System", READ_ONLY),
+    _entry("Hardware Diagnostics", "system_profiler SPDiagnosticsDataType", _MACOS, "Hardware", READ_ONLY),
+    _entry("Stream System Logs", "log stream --predicate 'processID == 0' --info", _MACOS, "Logs", READ_ONLY, FOLLOWS), # Example, can be very verbose
+    _entry("Flush DNS Cache", "sudo dscacheutil -flushcache; sudo killall -HUP mDNSResponder", _MACOS, "Network", MUTATING),
+    _entry("List All Hardware Ports", "networksetup -listallhardwareports", _MACOS, "Network", READ_ONLY),
+    _entry("Ping Google", "ping -c 4 google.com", _MACOS, "Network", READ_ONLY),
+    _entry("Reset Spotlight Index", "sudo mdutil -E /", _MACOS, "System", MUTATING),
+    _entry("Check for Broken Homebrew Packages", "brew doctor", _MACOS, "Packages", READ_ONLY), # Requires Homebrew
+    _entry("Clean Homebrew Cache", "brew cleanup", _MACOS, "Packages", MUTATING), # Requires Homebrew
+    _entry("View Running Processes (Top)", "top -l 1 | head -n 10", _MACOS, "Processes", READ_ONLY),
+    _entry("Force Quit Application (Example: Safari)", "killall Safari", _MACOS, "Processes", MUTATING), # Replace Safari with app name
+    _entry("Show Network Configuration", "ifconfig", _MACOS, "Network", READ_ONLY), # or ipconfig for newer macOS
+    _entry("List Installed Applications", "ls /Applications", _MACOS, "System", READ_ONLY),
+]
+
+
+def fuzzy_score(query, text):
+    """Scores query as a case-insensitive subsequence of text; higher is better, None if it doesn't match."""
+    query = query.lower()
+    text = text.lower()
+    if not query:
+        return 0
+    position = text.find(query)
+    if position >= 0:
+        # Plain substring matches always outrank scattered ones; earlier and word-start is better.
+        at_word_start = position == 0 or not text[position - 1].isalnum()
+        return 1000 + (100 if at_word_start else 0) - position
+    score = 0
+    last = -1
+    for char in query:
+        index = text.find(char, last + 1)
+        if index < 0:
+            return None
+        if index == last + 1:
+            score += 5 # Consecutive characters
+        if index == 0 or not text[index - 1].isalnum():
+            score += 10 # Start of a word
+        score -= index - last - 1 # Skipped characters
+        last = index
+    return score
+
+
+class CommandSearch:
+    """Incremental fuzzy search over a list of command names.
+
+    When the new query extends the previous one only the previous matches are
+    re-scored, since anything that didn't match before can't match now.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self._query = ""
+        self._candidates = self.names
+
+    def search(self, query):
+        """Returns the matching names, best match first (catalog order for an empty query)."""
+        query = query.strip().lower()
+        if not query:
+            self._query = ""
+            self._candidates = self.names
+            return list(self.names)
+        candidates = self._candidates if self._query and query.startswith(self._query) else self.names
+        scored = []
+        for index, name in enumerate(candidates):
+            score = fuzzy_score(query, name)
+            if score is not None:
+                scored.append((-score, index, name))
+        self._query = query
+        self._candidates = [name for _, _, name in scored] # Still in catalog order
+        return [name for _, _, name in sorted(scored)]
+
+
+class Catalog:
+    """All catalog entries, indexed by OS, group (version/distro), category, tag and command."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.groups = {} # group -> {command name: entry}, in declaration order
+        self.by_os = {}
+        self.by_category = {}
+        self.by_tag = {}
+        self.by_command = {} # command string -> entries using it
+        for entry in self.entries:
+            for group in entry.groups:
+                self.groups.setdefault(group, {})[entry.name] = entry
+            self.by_os.setdefault(entry.os, []).append(entry)
+            self.by_category.setdefault(entry.category, []).append(entry)
+            for tag in entry.tags:
+                self.by_tag.setdefault(tag, []).append(entry)
+            self.by_command.setdefault(entry.command, []).append(entry)
+
+    def group(self, group):
+        """Returns {command name: entry} for a Windows version, Linux distro or macOS (empty if unknown)."""
+        return self.groups.get(group, {})
+
+    def names(self, group):
+        return list(self.group(group))
+
+    def find(self, group, name):
+        """Looks up an entry by group and command name, case-insensitively. Returns None if unknown."""
+        commands = self.groups.get(group)
+        if commands is None:
+            group = group.strip().lower()
+            commands = next((entries for group_name, entries in self.groups.items() if group_name.lower() == group), {})
+        entry = commands.get(name)
+        if entry is None:
+            name = name.strip().lower()
+            entry = next((entry for entry_name, entry in commands.items() if entry_name.lower() == name), None)
+        return entry
+
+    def group_name(self, group):
+        """Returns the catalog spelling of a group name (matched case-insensitively), or None."""
+        group = group.strip().lower()
+        return next((group_name for group_name in self.groups if group_name.lower() == group), None)
+
+    def search(self, query, group=None):
+        """Fuzzy-searches command names, in one group or across the whole catalog. Returns entries."""
+        entries = list(self.group(group).values()) if group else self.entries
+        scored = []
+        for index, entry in enumerate(entries):
+            score = fuzzy_score(query, entry.name)
+            if score is not None:
+                scored.append((-score, index, entry))
+        return [entry for _, _, entry in sorted(scored, key=lambda item: item[:2])]
+
+    def select(self, group=None, os_name=None, category=None, tags=(), exclude_tags=()):
+        """Returns the entries matching every given filter."""
+        if group:
+            entries = list(self.group(group).values())
+        elif os_name:
+            entries = self.by_os.get(os_name, [])
+        else:
+            entries = self.entries
+        return [entry for entry in entries
+                if (category is None or entry.category == category)
+                and all(tag in entry.tags for tag in tags)
+                and not any(tag in entry.tags for tag in exclude_tags)]
+
+
+# Built once at import; everything else only looks entries up.
+CATALOG = Catalog(_ENTRIES)
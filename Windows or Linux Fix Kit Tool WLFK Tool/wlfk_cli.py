@@ -0,0 +1,652 @@
+"""Headless WLFK Tool: runs catalog commands without a display.
+
+Examples:
+    python wlfk_cli.py list --group "Generic Linux"
+    python wlfk_cli.py run "Generic Linux" "View Disk Usage"
+    python wlfk_cli.py batch commands.txt --format jsonl --jobs 4
+    python wlfk_cli.py run "Ubuntu/Debian" "List Installed Packages" --cache
+    python wlfk_cli.py collect "Generic Linux" -o diagnostics.tar.gz
+    python wlfk_cli.py stats --days 30
+    python wlfk_cli.py probe
+    python wlfk_cli.py playbook "Ubuntu/Debian" "Fix Packages"
+    python wlfk_cli.py watch "Generic Linux" "View Memory Usage" --interval 5
+    python wlfk_cli.py snapshot take "Ubuntu/Debian" "List Installed Packages"
+    python wlfk_cli.py snapshot diff "Ubuntu/Debian" "List Installed Packages"
+    python wlfk_cli.py journal --priority warning --unit nginx.service
+    python wlfk_cli.py journal --file saved-journal.json --top 50
+    python wlfk_cli.py dirsize /var --depth 2
+
+A batch file has one "Group / Command Name" per line; blank lines and lines
+starting with '#' are ignored. This module must not import tkinter.
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import time
+
+from wlfk_catalog import CATALOG
+from wlfk_jobs import JobManager, QUEUED, RUNNING, FINISHED, CANCELLED
+
+
+def parse_batch_file(path):
+    """Reads (group, name) pairs from a batch file."""
+    entries = []
+    with open(path, encoding="utf-8") as batch_file:
+        for line_number, line in enumerate(batch_file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            group, separator, name = line.partition(" / ")
+            if not separator:
+                raise ValueError(f"{path}:{line_number}: expected 'Group / Command Name', got {line!r}")
+            entries.append((group, name))
+    return entries
+
+
+def resolve(entries):
+    """Maps (group, name) pairs to (group, CatalogEntry); raises ValueError for unknown names."""
+    resolved = []
+    for group, name in entries:
+        entry = CATALOG.find(group, name)
+        if entry is None:
+            raise ValueError(f"Unknown command: {group!r} / {name!r} (see 'wlfk_cli.py list')")
+        resolved.append((CATALOG.group_name(group), entry))
+    return resolved
+
+
+def run_commands(commands, output_format="text", max_jobs=1, timeout=None, out=sys.stdout, cache=None, refresh=False,
+                 telemetry=None, encoding=None, broker=None):
+    """Runs (group, CatalogEntry) pairs on a JobManager and writes one result per command. Returns the exit status.
+
+    With a wlfk_cache.ResultCache, cacheable inventory commands are served from it;
+    refresh re-runs them anyway and stores the new result. With a
+    wlfk_telemetry.TelemetryStore, every run is added to the run history. encoding
+    overrides the output encoding (default: wlfk_terminal.default_encoding()). With a
+    wlfk_broker.PrivilegeBroker, commands that need root run in its privileged helper.
+    """
+    manager = JobManager(max_jobs=max_jobs, cache=cache, telemetry=telemetry, broker=broker)
+    jobs = {}
+    outputs = {}
+    for group, entry in commands:
+        job = manager.submit(entry.name, entry.command, timeout=timeout, launches_gui=entry.launches_gui and entry.runs_natively,
+                             probe=entry.native_probe, cache_paths=entry.cache_paths, refresh=refresh,
+                             encoding=encoding)
+        jobs[job.id] = (group, job)
+        outputs[job.id] = []
+
+    # With a single worker, text output can be streamed as it arrives; otherwise
+    # each job's output is written in one block when it finishes.
+    stream_text = output_format == "text" and max_jobs == 1
+    remaining = len(jobs)
+    status = 0
+    try:
+        while remaining:
+            try:
+                job, kind, payload = manager.events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            group = jobs[job.id][0]
+            if kind == "text":
+                if stream_text:
+                    out.write(payload)
+                    out.flush()
+                else:
+                    outputs[job.id].append(payload)
+            elif kind == "state":
+                if stream_text and payload == RUNNING:
+                    # Print the header before any of the job's output.
+                    out.write(f"=== {group} / {job.name}: {job.command}\n")
+                if payload not in (QUEUED, RUNNING): # job.done may already be true for an older event
+                    remaining -= 1
+                    if job.state != FINISHED:
+                        status = 1
+                    write_result(out, output_format, group, job, "".join(outputs.pop(job.id)), stream_text)
+    except KeyboardInterrupt:
+        manager.shutdown()
+        return 130
+    manager.shutdown()
+    return status
+
+
+def write_result(out, output_format, group, job, output, streamed):
+    """Writes one finished job as a text block or a JSON Lines record."""
+    exit_code = job.returncode
+    if output_format == "jsonl":
+        record = {
+            "group": group,
+            "name": job.name,
+            "command": job.command,
+            "state": job.state,
+            "exit_code": exit_code,
+            "duration_s": round(job.runtime, 3),
+            "cached": job.cached_at is not None,
+            "output": output,
+        }
+        out.write(json.dumps(record) + "\n")
+    else:
+        if not streamed:
+            out.write(f"=== {group} / {job.name}: {job.command}\n{output}")
+            if output and not output.endswith("\n"):
+                out.write("\n")
+        cached = " (cached)" if job.cached_at is not None else ""
+        out.write(f"--- {job.state}{cached}, exit code {exit_code}, {job.runtime:.2f}s\n\n")
+    out.flush()
+
+
+def list_commands(group=None, search=None, out=sys.stdout):
+    """Prints the catalog, optionally for one group only and/or fuzzy-filtered by command name."""
+    for group_name, commands in CATALOG.groups.items():
+        if group and group_name.lower() != group.strip().lower():
+            continue
+        entries = CATALOG.search(search, group_name) if search else list(commands.values())
+        if not entries:
+            continue
+        out.write(f"{group_name}\n")
+        for entry in entries:
+            out.write(f"    {entry.name}: {entry.command}  [{entry.category}; {', '.join(sorted(entry.tags))}]\n")
+
+
+def show_capabilities(refresh=False, out=sys.stdout):
+    """Prints the detected group and the commands of it that can't run on this machine."""
+    from wlfk_capabilities import detect_capabilities
+    capabilities = detect_capabilities(refresh=refresh)
+    name = capabilities.os_release.get("PRETTY_NAME")
+    out.write(f"Group: {capabilities.group or 'unknown'}" + (f" ({name})" if name else "") + "\n")
+    out.write(f"Root: {'yes' if capabilities.root else 'no'}; privileged helper: "
+              f"{'available' if capabilities.elevation else 'not available'}\n")
+    found = sum(1 for path in capabilities.programs.values() if path)
+    out.write(f"Programs: {found} of {len(capabilities.programs)} found"
+              f"{' (cached lookup)' if capabilities.cached else ''}\n")
+    if capabilities.group:
+        unavailable = capabilities.unavailable(capabilities.group)
+        out.write(f"Unavailable commands: {len(unavailable)}\n")
+        for command_name, reason in unavailable.items():
+            out.write(f"    {command_name}: {reason}\n")
+    return 0
+
+
+def collect(group, path=None, max_jobs=None, timeout=None, out=sys.stdout):
+    """Writes a diagnostics bundle for a group and prints one progress line per command."""
+    from wlfk_bundle import collect_diagnostics, default_bundle_name, DEFAULT_BUNDLE_JOBS, DEFAULT_BUNDLE_TIMEOUT
+    path = path or default_bundle_name()
+
+    def progress(done, total, job):
+        out.write(f"[{done}/{total}] {job.state:<9} {job.name} ({job.runtime:.2f}s, exit code {job.returncode})\n")
+        out.flush()
+
+    manifest = collect_diagnostics(group, path, max_jobs or DEFAULT_BUNDLE_JOBS, timeout or DEFAULT_BUNDLE_TIMEOUT, progress)
+    out.write(f"Wrote {path}: {len(manifest['commands'])} commands in {manifest['duration_s']:.2f}s\n")
+    return 0
+
+
+def run_playbook(group, name=None, timeout=None, verbose=False, out=sys.stdout, broker=None):
+    """Lists a group's playbooks, or runs one and prints a line per finished step. Returns the exit status."""
+    from wlfk_playbooks import playbooks, find_playbook, PlaybookRun, STEP_RUNNING
+    from wlfk_jobs import DEFAULT_MAX_JOBS
+    if name is None:
+        for playbook in playbooks(group):
+            out.write(f"{playbook.name}: {playbook.description}\n")
+            for step in playbook.steps:
+                after = f" (after {', '.join(step.after)}, {step.when})" if step.after else ""
+                out.write(f"    {step.key}: {step.command_name}{after}\n")
+        return 0
+    playbook = find_playbook(group, name)
+    if playbook is None:
+        raise ValueError(f"Unknown playbook: {group!r} / {name!r} (see 'wlfk_cli.py playbook {group!r}')")
+    manager = JobManager(max_jobs=DEFAULT_MAX_JOBS, broker=broker)
+    run = PlaybookRun(playbook, group, manager, timeout)
+    outputs = {}
+
+    def started(jobs):
+        for job in jobs:
+            outputs[job.id] = []
+            out.write(f"--> {job.name}: {job.command}\n")
+        out.flush()
+
+    def handle(job, kind, payload):
+        if kind == "text":
+            outputs.setdefault(job.id, []).append(payload)
+        elif payload not in (QUEUED, RUNNING) and run.owns(job): # job.done may already be true for an older event
+            step = run.step_for(job)
+            if step.job is not job or step.state != STEP_RUNNING:
+                return # Not an attempt the run is waiting for
+            new_jobs = run.job_finished(job)
+            out.write(f"<-- {step.state:<10} {job.name} ({job.runtime:.2f}s, exit code {job.returncode})\n")
+            if verbose:
+                out.write("".join(outputs.pop(job.id, [])).rstrip("\n") + "\n")
+            started(new_jobs)
+
+    try:
+        started(run.start())
+        while not run.done:
+            try:
+                event = manager.events.get(timeout=0.2)
+            except queue.Empty:
+                started(run.poll())
+                continue
+            handle(*event)
+        # Whatever is still queued (e.g. output of cancelled steps) is read before the summary.
+        while True:
+            try:
+                event = manager.events.get_nowait()
+            except queue.Empty:
+                break
+            handle(*event)
+    except KeyboardInterrupt:
+        run.cancel()
+        manager.shutdown()
+        return 130
+    manager.shutdown()
+    out.write(run.progress() + "\n")
+    for key, step in run.steps.items():
+        out.write(f"    {step.state:<10} {key}: {step.entry.name}" + (f" ({step.attempts} attempts)" if step.attempts > 1 else "") + "\n")
+    return 0 if run.succeeded else 1
+
+
+def watch_command(group, name, interval=None, timeout=None, count=None, out=sys.stdout):
+    """Re-runs a read-only command on an interval, printing its output once and then only the
+    lines that changed. Runs until interrupted (or count runs, or a run is cancelled). Returns the exit status."""
+    from wlfk_watch import WatchSession, can_watch, DEFAULT_WATCH_INTERVAL
+    entry = CATALOG.find(group, name)
+    if entry is None:
+        raise ValueError(f"Unknown command: {group!r} / {name!r} (see 'wlfk_cli.py list')")
+    if not can_watch(entry):
+        raise ValueError(f"{entry.name!r} can't be watched: only read-only commands that finish on their own can")
+    manager = JobManager(max_jobs=1)
+    session = WatchSession(manager, entry.name, entry.command, interval or DEFAULT_WATCH_INTERVAL, timeout,
+                           probe=entry.native_probe)
+    try:
+        session.start()
+        while count is None or session.runs < count:
+            try:
+                job, kind, payload = manager.events.get(timeout=0.1)
+            except queue.Empty:
+                session.poll()
+                continue
+            if kind == "text":
+                session.feed(job, payload)
+            elif payload in (QUEUED, RUNNING) or not session.owns(job):
+                continue
+            elif session.job_finished(job):
+                out.write(f"--- {session.status()}\n")
+                if session.runs == 1:
+                    out.writelines(line + "\n" for line in session.lines)
+                for _, _, _, j1, j2 in session.opcodes if session.runs > 1 else ():
+                    out.writelines(f"{number + 1:>5}| {session.lines[number]}\n" for number in range(j1, j2))
+                out.flush()
+            elif session.stopped: # The run was cancelled, which ends the watch
+                out.write(f"--- {session.status()}\n")
+                break
+    except KeyboardInterrupt:
+        pass
+    session.stop()
+    manager.shutdown()
+    return 1 if session.stop_reason else 0
+
+
+def take_snapshots(commands, timeout=None, limit=None, out=sys.stdout, broker=None):
+    """Runs (group, CatalogEntry) pairs, stores their output as snapshots and prints what
+    changed since each command's previous snapshot. Returns the exit status."""
+    from wlfk_snapshots import SnapshotStore, can_snapshot
+    for group, entry in commands:
+        if not can_snapshot(entry):
+            raise ValueError(f"{entry.name!r} can't be snapshotted: only read-only commands that finish on their own can")
+    store = SnapshotStore()
+    manager = JobManager(max_jobs=len(commands), broker=broker)
+    jobs = {}
+    for group, entry in commands:
+        job = manager.submit(entry.name, entry.command, timeout=timeout, probe=entry.native_probe)
+        jobs[job.id] = (group, entry, [])
+    status = 0
+    try:
+        while jobs:
+            job, kind, payload = manager.events.get()
+            if kind == "text":
+                jobs[job.id][2].append(payload)
+            elif payload not in (QUEUED, RUNNING): # job.done may already be true for an older event
+                group, entry, output = jobs.pop(job.id)
+                if job.state != FINISHED:
+                    out.write(f"=== {group} / {entry.name}: {job.state}, exit code {job.returncode}; no snapshot taken\n")
+                    status = 1
+                    continue
+                snapshot = store.take(group, entry, "".join(output))
+                previous = store.previous(snapshot)
+                out.write(f"=== {group} / {entry.name}: snapshot {snapshot.id} ({snapshot.items} entries, {snapshot.mode} diff)\n")
+                write_snapshot_diff(out, store, previous, snapshot, limit)
+    except KeyboardInterrupt:
+        manager.shutdown()
+        return 130
+    manager.shutdown()
+    return status
+
+
+def write_snapshot_diff(out, store, old, new, limit=None):
+    if old is None:
+        out.write("--- first snapshot of this command\n")
+        return
+    diff = store.diff(old, new)
+    taken = time.strftime("%Y-%m-%d %H:%M", time.localtime(old.taken))
+    out.write(f"--- since {old.id} ({taken}): {'unchanged' if diff.unchanged else diff.summary()}\n")
+    out.writelines(line + "\n" for line in diff.report(limit))
+    out.flush()
+
+
+def show_snapshots(group=None, name=None, action="list", old_id=None, new_id=None, limit=None, out=sys.stdout):
+    """Lists the snapshots (of a group or one command), or prints the diff between two of
+    them: by default the command's last two. Returns the exit status."""
+    from wlfk_snapshots import SnapshotStore
+    store = SnapshotStore()
+    if action == "list":
+        for snapshot in store.snapshots(group, name):
+            taken = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot.taken))
+            out.write(f"{snapshot.id}  {taken}  {snapshot.group} / {snapshot.name}: {snapshot.items} entries, "
+                      f"{snapshot.hash[:12]}\n")
+        return 0
+    snapshots = store.snapshots(group, name)
+    old, new = snapshots[-2:] if group and name and len(snapshots) >= 2 else (None, None)
+    if old_id:
+        old = store.find(old_id)
+        new = store.find(new_id) if new_id else (store.snapshots(old.group, old.name)[-1] if old else None)
+    if old is None or new is None:
+        raise ValueError("Need two snapshots to compare: give two snapshot ids, or a command with at least two snapshots")
+    if (old.group, old.name) != (new.group, new.name):
+        raise ValueError(f"{old.id} and {new.id} are snapshots of different commands")
+    out.write(f"=== {new.group} / {new.name}: {old.id} -> {new.id}\n")
+    write_snapshot_diff(out, store, old, new, limit)
+    return 0
+
+
+def write_journal_rows(out, analyzer, top=None, sort="count"):
+    from wlfk_journal import PRIORITIES, RATE_WINDOW
+    rows = analyzer.rows(sort=sort)
+    out.write(f"{analyzer.records} records ({analyzer.matched} matched) -> {len(rows)} distinct messages\n")
+    if analyzer.malformed:
+        out.write(f"{analyzer.malformed} lines were not journal JSON, the last: {analyzer.last_malformed}\n")
+    out.write(f"{'PRIORITY':<8} {'COUNT':>8} {f'/{RATE_WINDOW}s':>6} {'LAST':<8} {'UNIT':<24} MESSAGE\n")
+    for priority, unit, count, rate, last, message in rows[:top]:
+        out.write(f"{PRIORITIES[priority] if priority < len(PRIORITIES) else priority:<8} {count:>8} {rate:>6} "
+                  f"{time.strftime('%H:%M:%S', time.localtime(last)):<8} {unit:<24} {message}\n")
+    out.flush()
+
+
+def analyze_journal(path=None, priority=None, units=(), kernel=False, follow=False, top=None, sort="count",
+                    interval=2.0, out=sys.stdout):
+    """Aggregates journalctl -o json (or a saved file of it) into one line per distinct
+    message and prints them; with follow, reprints them every interval seconds until
+    interrupted. Returns the exit status."""
+    from wlfk_journal import JournalAnalyzer, analyze_file, journal_command, priority_number
+    max_priority = priority_number(priority or "")
+    if path:
+        write_journal_rows(out, analyze_file(path, max_priority, units), top, sort)
+        return 0
+    analyzer = JournalAnalyzer(max_priority, units)
+    manager = JobManager(max_jobs=1)
+    job = manager.submit("Journal Analysis", journal_command(follow, kernel, max_priority, units), history=False)
+    next_print = time.monotonic() + interval
+    try:
+        while True:
+            try:
+                _, kind, payload = manager.events.get(timeout=0.2)
+            except queue.Empty:
+                kind = payload = None
+            if kind == "text":
+                analyzer.feed(payload)
+            elif kind == "state" and payload not in (QUEUED, RUNNING):
+                break
+            if follow and time.monotonic() >= next_print:
+                next_print = time.monotonic() + interval
+                out.write(f"\n=== {time.strftime('%H:%M:%S')}\n")
+                write_journal_rows(out, analyzer, top, sort)
+    except KeyboardInterrupt:
+        manager.cancel(job)
+    analyzer.finish()
+    while not analyzer.finished:
+        time.sleep(0.01)
+    manager.shutdown()
+    write_journal_rows(out, analyzer, top, sort)
+    return 0 if job.state in (FINISHED, CANCELLED) else 1
+
+
+def analyze_directory_sizes(root, depth=1, top=20, refresh=False, use_cache=True, out=sys.stdout):
+    """Scans a directory tree (see wlfk_dirsize) and prints its largest directories down to depth
+    levels, top per directory. Returns the exit status."""
+    from wlfk_dirsize import DirectoryCache, DirectoryScan, format_size
+    scan = DirectoryScan(root, DirectoryCache() if use_cache else None, refresh=refresh)
+    try:
+        complete = scan.run()
+    except OSError as e:
+        out.write(f"Cannot scan {root}: {e}\n")
+        return 1
+    total = scan.nodes[0].size or 1
+    for level, node in scan.largest(depth, top):
+        out.write(f"{format_size(node.size):>8} {node.size / total:>5.0%}  {'  ' * level}{scan.path(node.id)}\n")
+    out.write(f"{scan.summary()}, scanned in {scan.seconds:.1f}s\n")
+    if scan.last_error:
+        out.write(f"Last unreadable directory: {scan.last_error}\n")
+    return 0 if complete else 1
+
+
+def _format_ms(value):
+    if value is None:
+        return "-"
+    return f"{value / 1000.0:.2f}s" if value >= 1000 else f"{value:.0f}ms"
+
+
+def show_stats(host=None, days=None, output_format="text", out=sys.stdout):
+    """Prints run count and p50/p95/max wall time per catalog entry from the run history."""
+    from wlfk_telemetry import TelemetryStore
+    since = time.time() - days * 86400 if days else None
+    stats = TelemetryStore().stats(host=host, since=since)
+    if output_format == "jsonl":
+        for entry in stats:
+            out.write(json.dumps(vars(entry)) + "\n")
+        return 0
+    if not stats:
+        out.write("No runs recorded yet.\n")
+        return 0
+    out.write(f"{'Runs':>6} {'Failed':>6} {'p50':>8} {'p95':>8} {'max':>8} {'1st byte':>8} {'peak RSS':>9}  Command\n")
+    for entry in stats:
+        rss = f"{entry.max_rss_kb / 1024:.1f}M" if entry.max_rss_kb is not None else "-"
+        out.write(f"{entry.runs:>6} {entry.failures:>6} {_format_ms(entry.p50_ms):>8} {_format_ms(entry.p95_ms):>8} "
+                  f"{_format_ms(entry.max_ms):>8} {_format_ms(entry.p50_first_output_ms):>8} {rss:>9}  "
+                  f"{entry.name}: {entry.command}\n")
+    return 0
+
+
+def make_broker(enabled):
+    """A wlfk_broker.PrivilegeBroker for --broker (None when off, or already running as root)."""
+    if not enabled or not hasattr(os, "geteuid") or os.geteuid() == 0:
+        return None
+    from wlfk_broker import PrivilegeBroker
+    return PrivilegeBroker()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="wlfk_cli.py", description="Run WLFK Tool catalog commands without a GUI.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list catalog groups and commands")
+    list_parser.add_argument("--group", help="only list this Windows version, Linux distribution or 'macOS'")
+    list_parser.add_argument("--search", help="fuzzy-match command names, best match first")
+
+    def add_broker_option(subparser):
+        subparser.add_argument("--broker", action="store_true", help="run 'sudo ...' commands in the privileged helper "
+                               "(started once via pkexec/osascript, or the one at $WLFK_BROKER_SOCKET)")
+
+    def add_run_options(subparser):
+        subparser.add_argument("--format", choices=("text", "jsonl"), default="text", help="result format (default: text)")
+        subparser.add_argument("--jobs", type=int, default=1, help="commands to run in parallel (default: 1)")
+        subparser.add_argument("--timeout", type=float, default=None, help="per-command wall-clock timeout in seconds")
+        subparser.add_argument("--cache", action="store_true", help="reuse cached results of inventory commands (package lists, lscpu, ...)")
+        subparser.add_argument("--refresh", action="store_true", help="with --cache: re-run cached commands and update the cache")
+        subparser.add_argument("--encoding", help="decode command output with this encoding, e.g. cp850 "
+                               "(default: the OEM code page on Windows, the locale's encoding elsewhere)")
+        subparser.add_argument("--no-history", action="store_true", help="don't add these runs to the run history used by 'stats'")
+        add_broker_option(subparser)
+
+    run_parser = subparsers.add_parser("run", help="run one catalog command by name")
+    run_parser.add_argument("group", help="Windows version, Linux distribution or 'macOS', e.g. 'Generic Linux'")
+    run_parser.add_argument("name", help="command name, e.g. 'View Disk Usage'")
+    add_run_options(run_parser)
+
+    batch_parser = subparsers.add_parser("batch", help="run every 'Group / Command Name' listed in a file")
+    batch_parser.add_argument("file", help="batch file, one 'Group / Command Name' per line")
+    add_run_options(batch_parser)
+
+    collect_parser = subparsers.add_parser("collect", help="run every read-only command of a group into a .tar.gz bundle")
+    collect_parser.add_argument("group", help="Windows version, Linux distribution or 'macOS'")
+    collect_parser.add_argument("-o", "--output", help="archive path (default: wlfk-diagnostics-<host>-<time>.tar.gz)")
+    collect_parser.add_argument("--jobs", type=int, help="commands to run in parallel (default: 8)")
+    collect_parser.add_argument("--timeout", type=float, help="per-command timeout in seconds (default: 120)")
+
+    playbook_parser = subparsers.add_parser("playbook", help="list or run the repair playbooks (multi-step workflows) of a group")
+    playbook_parser.add_argument("group", help="Windows version or Linux distribution, e.g. 'Ubuntu/Debian'")
+    playbook_parser.add_argument("name", nargs="?", help="playbook to run, e.g. 'Fix Packages' (omit to list them)")
+    playbook_parser.add_argument("--timeout", type=float, help="per-step timeout in seconds")
+    playbook_parser.add_argument("--verbose", action="store_true", help="print each step's output when it finishes")
+    add_broker_option(playbook_parser)
+
+    probe_parser = subparsers.add_parser("probe", help="detect this machine's group and which of its commands can't run")
+    probe_parser.add_argument("--refresh", action="store_true", help="look the programs up again instead of using the cache")
+
+    watch_parser = subparsers.add_parser("watch", help="re-run a read-only command on an interval, printing only changed lines")
+    watch_parser.add_argument("group", help="Windows version, Linux distribution or 'macOS'")
+    watch_parser.add_argument("name", help="command name, e.g. 'View Memory Usage'")
+    watch_parser.add_argument("--interval", type=float, help="seconds between runs (default: 2; slower commands back off)")
+    watch_parser.add_argument("--timeout", type=float, help="per-run timeout in seconds")
+    watch_parser.add_argument("--count", type=int, help="stop after this many runs (default: until Ctrl+C)")
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="store read-only command output and show what changed since")
+    snapshot_parser.add_argument("snapshot_action", choices=("take", "list", "diff"),
+                                 help="take: run the commands and store snapshots; list; diff: compare two snapshots")
+    snapshot_parser.add_argument("group", nargs="?", help="Windows version, Linux distribution or 'macOS'")
+    snapshot_parser.add_argument("names", nargs="*", help="command name(s), e.g. 'List Installed Packages'")
+    snapshot_parser.add_argument("--from", dest="old", help="diff: snapshot id (or unique prefix) to compare from")
+    snapshot_parser.add_argument("--to", dest="new", help="diff: snapshot id to compare to (default: the latest)")
+    snapshot_parser.add_argument("--limit", type=int, help="print at most this many added/removed/changed entries each")
+    snapshot_parser.add_argument("--timeout", type=float, help="take: per-command timeout in seconds")
+    add_broker_option(snapshot_parser)
+
+    journal_parser = subparsers.add_parser("journal", help="collapse the systemd journal into distinct messages with counts and rates")
+    journal_parser.add_argument("--file", help="analyze saved 'journalctl -o json' output instead of running journalctl")
+    journal_parser.add_argument("--priority", help="only records up to this priority (emerg, alert, crit, err, warning, notice, info, debug)")
+    journal_parser.add_argument("--unit", action="append", default=[], help="only records of this unit (repeatable)")
+    journal_parser.add_argument("--kernel", action="store_true", help="only kernel messages (like dmesg)")
+    journal_parser.add_argument("--follow", action="store_true", help="keep reading new records, reprinting the summary every 2s")
+    journal_parser.add_argument("--top", type=int, default=30, help="print this many messages (default: 30)")
+    journal_parser.add_argument("--sort", choices=("count", "rate", "last", "priority"), default="count",
+                                help="order of the messages (default: count)")
+
+    dirsize_parser = subparsers.add_parser("dirsize", help="show which directories take the space (like du, cached)")
+    dirsize_parser.add_argument("root", nargs="?", default=os.sep, help="directory to scan (default: the root directory)")
+    dirsize_parser.add_argument("--depth", type=int, default=1, help="levels of subdirectories to print (default: 1)")
+    dirsize_parser.add_argument("--top", type=int, default=20, help="largest subdirectories printed per directory (default: 20)")
+    dirsize_parser.add_argument("--refresh", action="store_true", help="list every directory again, ignoring (but updating) the cache")
+    dirsize_parser.add_argument("--no-cache", action="store_true", help="neither read nor write the directory cache")
+
+    stats_parser = subparsers.add_parser("stats", help="show run counts and p50/p95/max durations per command")
+    stats_parser.add_argument("--host", help="only runs recorded on this host name")
+    stats_parser.add_argument("--days", type=float, help="only runs from the last N days")
+    stats_parser.add_argument("--format", choices=("text", "jsonl"), default="text", help="result format (default: text)")
+    return parser
+
+
+def main(argv=None):
+    try:
+        return _main(argv)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head): point stdout at devnull so the flush at exit
+        # doesn't fail again, and exit without a traceback.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+
+
+def _main(argv):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.action == "list":
+        list_commands(args.group, args.search)
+        return 0
+    if args.action == "playbook":
+        group = CATALOG.group_name(args.group)
+        if group is None:
+            parser.error(f"Unknown group: {args.group!r} (see 'wlfk_cli.py list')")
+        try:
+            return run_playbook(group, args.name, args.timeout, args.verbose, broker=make_broker(args.broker))
+        except ValueError as e:
+            parser.error(str(e))
+    if args.action == "probe":
+        return show_capabilities(args.refresh)
+    if args.action == "snapshot":
+        group = args.group and CATALOG.group_name(args.group)
+        if args.group and group is None:
+            parser.error(f"Unknown group: {args.group!r} (see 'wlfk_cli.py list')")
+        try:
+            if args.snapshot_action == "take":
+                if not args.names:
+                    parser.error("snapshot take needs a group and at least one command name")
+                return take_snapshots(resolve((group, name) for name in args.names), args.timeout, args.limit,
+                                      broker=make_broker(args.broker))
+            if len(args.names) > 1:
+                parser.error(f"snapshot {args.snapshot_action} takes one command name")
+            name = args.names[0] if args.names else None
+            entry = CATALOG.find(group, name) if group and name else None
+            if name and entry is None:
+                parser.error(f"Unknown command: {args.group!r} / {name!r} (see 'wlfk_cli.py list')")
+            return show_snapshots(group, entry.name if entry else None, args.snapshot_action, args.old, args.new,
+                                  args.limit)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.action == "journal":
+        try:
+            return analyze_journal(args.file, args.priority, args.unit, args.kernel, args.follow, args.top, args.sort)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.action == "dirsize":
+        return analyze_directory_sizes(args.root, args.depth, args.top, args.refresh, not args.no_cache)
+    if args.action == "watch":
+        group = CATALOG.group_name(args.group)
+        if group is None:
+            parser.error(f"Unknown group: {args.group!r} (see 'wlfk_cli.py list')")
+        try:
+            return watch_command(group, args.name, args.interval, args.timeout, args.count)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.action == "stats":
+        return show_stats(args.host, args.days, args.format)
+    if args.action == "collect":
+        group = CATALOG.group_name(args.group)
+        if group is None:
+            parser.error(f"Unknown group: {args.group!r} (see 'wlfk_cli.py list')")
+        try:
+            return collect(group, args.output, args.jobs and max(1, args.jobs), args.timeout)
+        except KeyboardInterrupt:
+            return 130
+    try:
+        entries = [(args.group, args.name)] if args.action == "run" else parse_batch_file(args.file)
+        commands = resolve(entries)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    cache = None
+    if args.cache:
+        from wlfk_cache import ResultCache
+        cache = ResultCache()
+    telemetry = None
+    if not args.no_history:
+        from wlfk_telemetry import TelemetryStore
+        telemetry = TelemetryStore()
+    if args.encoding:
+        import codecs
+        try:
+            codecs.lookup(args.encoding)
+        except LookupError:
+            parser.error(f"Unknown encoding: {args.encoding!r}")
+    return run_commands(commands, args.format, max(1, args.jobs), args.timeout, cache=cache, refresh=args.refresh,
+                        telemetry=telemetry, encoding=args.encoding, broker=make_broker(args.broker))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
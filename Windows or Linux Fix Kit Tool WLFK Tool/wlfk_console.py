@@ -0,0 +1,477 @@
+import bisect
+import queue
+import re
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+# Default number of lines kept by an OutputConsole before the oldest are dropped.
+DEFAULT_MAX_LINES = 50000
+# Lines rendered above/below the visible rows so small scrolls don't need a redraw.
+OVERSCAN_LINES = 20
+# Lines the search worker scans before checking whether its search was superseded.
+SEARCH_CHUNK_LINES = 20000
+# Typing pause before a search starts, and how often a console checks for search results.
+SEARCH_DELAY_MS = 200
+SEARCH_POLL_MS = 50
+# Lines highlighted automatically (only the rendered window is ever checked).
+ERROR_PATTERN = re.compile(r"^ERROR:|\b(errors?|fail(ed|ure)?|fatal|critical|denied|panic|segfault)\b", re.IGNORECASE)
+WARNING_PATTERN = re.compile(r"\b(warn(ing|ings)?|deprecated)\b", re.IGNORECASE)
+
+
+class LineBuffer:
+    """Ring buffer of output lines with a fixed maximum size.
+
+    Old lines are trimmed in bulk (once the buffer overshoots by ~10%) so the cost of
+    dropping lines is amortised instead of paid on every append.
+    """
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES):
+        self.max_lines = max(1, max_lines)
+        self._slack = max(1, self.max_lines // 10)
+        self._lines = []
+        self.partial = "" # Text after the last newline, still being written
+        self.dropped = 0 # Number of lines trimmed from the front so far
+
+    def __len__(self):
+        """Number of lines, counting an unfinished last line."""
+        return len(self._lines) + (1 if self.partial else 0)
+
+    def append(self, text):
+        """Adds text, splitting it into lines. Returns the number of completed lines."""
+        if not text:
+            return 0
+        parts = (self.partial + text).split("\n")
+        if "\r" in text:
+            # A carriage return redraws the line: only what follows the last one is kept
+            # (wlfk_terminal.TerminalDecoder sends the whole redrawn line after it).
+            parts = [part[part.rfind("\r") + 1:] for part in parts]
+        self.partial = parts.pop()
+        self._lines.extend(parts)
+        if len(self._lines) > self.max_lines + self._slack:
+            excess = len(self._lines) - self.max_lines
+            del self._lines[:excess]
+            self.dropped += excess
+        return len(parts)
+
+    def clear(self):
+        """Removes every line."""
+        self._lines = []
+        self.partial = ""
+        self.dropped = 0
+
+    def lines_from(self, line_number):
+        """Returns a copy of the completed lines from absolute line number on (counting dropped lines)."""
+        return self._lines[max(0, line_number - self.dropped):]
+
+    def line(self, line_number):
+        """Returns the completed line with the given absolute line number."""
+        return self._lines[line_number - self.dropped]
+
+    def slice(self, start, stop):
+        """Returns lines[start:stop], including the unfinished last line."""
+        lines = self._lines[start:stop]
+        if self.partial and stop > len(self._lines):
+            lines.append(self.partial)
+        return lines
+
+    def text(self):
+        """Returns the whole buffer as one string."""
+        return "\n".join(self.slice(0, len(self)))
+
+
+class _Search:
+    """One search query; replaced (and cancelled) whenever the query changes."""
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.cancelled = False
+        self.results = queue.Queue() # (absolute line numbers of matches, first line number not scanned)
+
+
+class SearchWorker:
+    """Background thread shared by every console that scans buffered lines for a pattern."""
+
+    def __init__(self):
+        self.requests = queue.Queue()
+        threading.Thread(target=self._loop, name="wlfk-search", daemon=True).start()
+
+    def submit(self, search, lines, first_line_number):
+        self.requests.put((search, lines, first_line_number))
+
+    def _loop(self):
+        while True:
+            search, lines, first = self.requests.get()
+            matches = []
+            found = search.matcher.search
+            for offset in range(0, len(lines), SEARCH_CHUNK_LINES):
+                if search.cancelled:
+                    break
+                base = first + offset
+                chunk = lines[offset:offset + SEARCH_CHUNK_LINES]
+                matches.extend([base + index for index, line in enumerate(chunk) if found(line)])
+            else:
+                search.results.put((matches, first + len(lines)))
+
+
+_search_worker = None
+
+
+def search_worker():
+    global _search_worker
+    if _search_worker is None:
+        _search_worker = SearchWorker()
+    return _search_worker
+
+
+class OutputConsole(ttk.Frame):
+    """Read-only output console backed by a LineBuffer.
+
+    Only the lines around the viewport are ever inserted into the Text widget, so
+    memory and redraw cost stay flat no matter how much a command prints. The
+    vertical scrollbar is driven by the buffer rather than by the Text widget.
+
+    The search bar matches lines on the shared SearchWorker thread; the console keeps
+    the absolute line numbers of the matches and only scans lines appended since.
+    With "Only matching lines" the matches become the view instead of the buffer.
+    Error/warning/match highlighting is applied to the rendered window only.
+    """
+
+    def __init__(self, master, max_lines=DEFAULT_MAX_LINES, background='#1e1e1e', foreground='#00ff00',
+                 font=('Consolas', 10), **kwargs):
+        super().__init__(master, **kwargs)
+        self.buffer = LineBuffer(max_lines)
+        self.top = 0 # View index of the first visible line
+        self.rows = 20 # Visible rows, refreshed on <Configure>
+        self._rendered = None # What the Text widget currently shows, see _render()
+        self._render_pending = False
+        self.autoscroll = tk.BooleanVar(value=True)
+
+        # Search state
+        self.search_var = tk.StringVar()
+        self.regex_var = tk.BooleanVar(value=False)
+        self.filter_var = tk.BooleanVar(value=False)
+        self._search = None # Current _Search, None without a query
+        self._matches = [] # Absolute line numbers of matching lines, ascending
+        self._scanned = 0 # Absolute line number of the first line not yet searched
+        self._scan_pending = False
+        self._poll_id = None
+        self._search_after_id = None
+        self._current_match = -1 # Index into _matches of the match Next/Previous moved to
+        self._view_version = 0 # Bumped whenever the matches or the search change
+
+        search_bar = ttk.Frame(self)
+        ttk.Label(search_bar, text="Find:").pack(side=tk.LEFT)
+        self.search_entry = ttk.Entry(search_bar, textvariable=self.search_var, width=30)
+        self.search_entry.pack(side=tk.LEFT, padx=(4, 8))
+        ttk.Checkbutton(search_bar, text="Regex", variable=self.regex_var, command=self._start_search).pack(side=tk.LEFT)
+        ttk.Checkbutton(search_bar, text="Only matching lines", variable=self.filter_var, command=self._on_filter_toggled).pack(side=tk.LEFT, padx=8)
+        ttk.Button(search_bar, text="Previous", command=lambda: self.find_next(-1)).pack(side=tk.LEFT)
+        ttk.Button(search_bar, text="Next", command=self.find_next).pack(side=tk.LEFT, padx=4)
+        self.search_status = ttk.Label(search_bar, text="")
+        self.search_status.pack(side=tk.LEFT, padx=8)
+        self.search_var.trace_add("write", lambda *args: self._schedule_search())
+        self.search_entry.bind("<Return>", lambda event: self.find_next())
+        self.search_entry.bind("<Shift-Return>", lambda event: self.find_next(-1))
+
+        self.text = tk.Text(self, wrap=tk.NONE, width=80, height=20, font=font, background=background,
+                            foreground=foreground, insertbackground=foreground, state=tk.DISABLED)
+        self.text.tag_configure("error", foreground='#ff6b6b')
+        self.text.tag_configure("warning", foreground='#ffb74d')
+        self.text.tag_configure("match", background='#806600', foreground='#ffffff')
+        self.text.tag_raise("match")
+        self.vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.hbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.config(xscrollcommand=self.hbar.set)
+
+        autoscroll_check = ttk.Checkbutton(self, text="Autoscroll", variable=self.autoscroll, command=self._on_autoscroll_toggled)
+
+        search_bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 4))
+        self.text.grid(row=1, column=0, sticky="nsew")
+        self.vbar.grid(row=1, column=1, sticky="ns")
+        self.hbar.grid(row=2, column=0, sticky="ew")
+        autoscroll_check.grid(row=3, column=0, sticky="w", pady=(4, 0))
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.text.bind("<Configure>", self._on_configure)
+        self.text.bind("<MouseWheel>", self._on_mousewheel) # Windows/macOS
+        self.text.bind("<Button-4>", lambda event: self._scroll_by(-3)) # X11 wheel up
+        self.text.bind("<Button-5>", lambda event: self._scroll_by(3)) # X11 wheel down
+        self.text.bind("<Prior>", lambda event: self._scroll_by(-self.rows))
+        self.text.bind("<Next>", lambda event: self._scroll_by(self.rows))
+        self.text.bind("<Control-f>", lambda event: self.search_entry.focus_set())
+
+    # --- Public API ---
+
+    def append(self, text):
+        """Adds text to the console; the redraw is coalesced to the next idle moment."""
+        self.buffer.append(text)
+        if self._search is not None:
+            self._scan_new_lines()
+        self._schedule_render()
+
+    def clear(self):
+        """Removes all output."""
+        self.buffer.clear()
+        self.top = 0
+        self._start_search()
+
+    def get_text(self):
+        """Returns everything currently held in the buffer (not just what is visible)."""
+        text = self.buffer.text()
+        if self.buffer.dropped:
+            text = f"[{self.buffer.dropped} earlier lines discarded]\n{text}"
+        return text
+
+    def set_max_lines(self, max_lines):
+        """Changes the buffer size; takes effect on the next append."""
+        self.buffer.max_lines = max(1, max_lines)
+        self.buffer._slack = max(1, self.buffer.max_lines // 10)
+
+    def yview(self, *args):
+        """Scrollbar callback: 'moveto fraction' or 'scroll n units|pages'."""
+        total = self._view_length()
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.rows
+            self._scroll_by(amount)
+
+    def find_next(self, step=1):
+        """Scrolls to the next (step=1) or previous (step=-1) matching line."""
+        self._prune_matches()
+        if not self._matches:
+            return "break"
+        if not 0 <= self._current_match < len(self._matches):
+            # Start from the first match after (or before) the top of the viewport.
+            if self._filtering():
+                position = self.top
+            else:
+                position = bisect.bisect_left(self._matches, self.buffer.dropped + self.top)
+            self._current_match = position if step > 0 else position - 1
+        else:
+            self._current_match += step
+        self._current_match %= len(self._matches)
+        index = self._current_match if self._filtering() else self._matches[self._current_match] - self.buffer.dropped
+        self._scroll_to(index - self.rows // 3)
+        self.search_status.config(text=f"{self._current_match + 1} of {len(self._matches)} matching lines")
+        return "break"
+
+    # --- Search ---
+
+    def _schedule_search(self):
+        # Coalesce keystrokes: only the query typed last is searched.
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(SEARCH_DELAY_MS, self._start_search)
+
+    def _start_search(self):
+        """Drops the previous matches and searches the whole buffer for the current query."""
+        self._search_after_id = None
+        if self._search is not None:
+            self._search.cancelled = True
+        self._search = None
+        self._matches = []
+        self._scanned = self.buffer.dropped
+        self._scan_pending = False
+        self._current_match = -1
+        self._view_version += 1
+        query = self.search_var.get()
+        if query:
+            try:
+                matcher = re.compile(query if self.regex_var.get() else re.escape(query), re.IGNORECASE)
+            except re.error as e:
+                self.search_status.config(text=f"Invalid pattern: {e}")
+            else:
+                self._search = _Search(matcher)
+                self.search_status.config(text="Searching...")
+                self._scan_new_lines()
+        else:
+            self.search_status.config(text="")
+        self._schedule_render()
+
+    def _scan_new_lines(self):
+        """Hands the completed lines that haven't been searched yet to the worker (one batch at a time)."""
+        if self._scan_pending:
+            return
+        lines = self.buffer.lines_from(self._scanned)
+        if not lines:
+            return
+        self._scan_pending = True
+        search_worker().submit(self._search, lines, max(self._scanned, self.buffer.dropped))
+        if self._poll_id is None:
+            self._poll_id = self.after(SEARCH_POLL_MS, self._poll_search)
+
+    def _poll_search(self):
+        self._poll_id = None
+        search = self._search
+        if search is None or not self._scan_pending or not self.winfo_exists():
+            return
+        try:
+            matches, scanned = search.results.get_nowait()
+        except queue.Empty:
+            self._poll_id = self.after(SEARCH_POLL_MS, self._poll_search)
+            return
+        self._scan_pending = False
+        self._matches.extend(matches)
+        self._scanned = scanned
+        if matches:
+            self._view_version += 1
+            self._schedule_render()
+        self._prune_matches()
+        self.search_status.config(text=f"{len(self._matches)} matching lines")
+        self._scan_new_lines() # Lines appended while this batch was being searched
+
+    def _prune_matches(self):
+        # Matches in lines the buffer has trimmed no longer exist.
+        if self._matches and self._matches[0] < self.buffer.dropped:
+            del self._matches[:bisect.bisect_left(self._matches, self.buffer.dropped)]
+            self._current_match = -1
+
+    def _filtering(self):
+        return self.filter_var.get() and self._search is not None
+
+    def _on_filter_toggled(self):
+        self.top = 0
+        self._current_match = -1
+        self._schedule_render()
+
+    def _view_length(self):
+        """Number of lines in the current view: the buffer, or only its matching lines."""
+        if self._filtering():
+            self._prune_matches()
+            return len(self._matches)
+        return len(self.buffer)
+
+    def _view_slice(self, start, stop):
+        if self._filtering():
+            return [self.buffer.line(line_number) for line_number in self._matches[start:stop]]
+        return self.buffer.slice(start, stop)
+
+    # --- Scrolling ---
+
+    def _scroll_by(self, lines):
+        self._scroll_to(self.top + lines)
+        return "break"
+
+    def _scroll_to(self, top):
+        max_top = max(0, self._view_length() - self.rows)
+        self.top = min(max(0, top), max_top)
+        # Scrolling away from the bottom pauses autoscroll; scrolling back resumes it.
+        self.autoscroll.set(self.top >= max_top)
+        self._render()
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_autoscroll_toggled(self):
+        if self.autoscroll.get():
+            self._render()
+
+    def _on_configure(self, event):
+        linespace = self.text.tk.call("font", "metrics", self.text.cget("font"), "-linespace")
+        self.rows = max(1, event.height // max(1, int(linespace)))
+        self._render()
+
+    # --- Rendering ---
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        """Shows the visible window of the view, touching the Text widget only if it changed."""
+        self._render_pending = False
+        if not self.winfo_exists():
+            return
+        total = self._view_length()
+        max_top = max(0, total - self.rows)
+        if self.autoscroll.get():
+            self.top = max_top
+        self.top = min(self.top, max_top)
+
+        start = max(0, self.top - OVERSCAN_LINES)
+        stop = min(total, self.top + self.rows + OVERSCAN_LINES)
+        # Trimming shifts buffer indices, so 'dropped' is part of what identifies the window;
+        # so is the search, since it changes what is shown and highlighted.
+        filtering = self._filtering()
+        partial = self.buffer.partial if stop == total and not filtering else None
+        window = (start, stop, partial, self.buffer.dropped, filtering, self._view_version)
+        if window != self._rendered:
+            lines = self._view_slice(start, stop)
+            self.text.config(state=tk.NORMAL)
+            self.text.delete("1.0", tk.END)
+            self.text.insert("1.0", "\n".join(lines))
+            self._highlight(lines)
+            self.text.config(state=tk.DISABLED)
+            self._rendered = window
+        self.text.yview(f"{self.top - start + 1}.0")
+
+        if total:
+            self.vbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+        else:
+            self.vbar.set(0.0, 1.0)
+
+    def _highlight(self, lines):
+        """Tags errors, warnings and search matches in the rendered lines (a few dozen at most)."""
+        matcher = self._search.matcher if self._search is not None else None
+        tag_add = self.text.tag_add
+        for number, line in enumerate(lines, 1):
+            if ERROR_PATTERN.search(line):
+                tag_add("error", f"{number}.0", f"{number}.end")
+            elif WARNING_PATTERN.search(line):
+                tag_add("warning", f"{number}.0", f"{number}.end")
+            if matcher is not None:
+                for match in matcher.finditer(line):
+                    if match.end() > match.start():
+                        tag_add("match", f"{number}.{match.start()}", f"{number}.{match.end()}")
+
+
+class WatchConsole(ttk.Frame):
+    """Shows the latest output of a wlfk_watch.WatchSession.
+
+    Each run only replaces the lines that changed (the session's diff opcodes), so the
+    Text widget isn't cleared and repainted and the scroll position stays put. The
+    changed lines stay highlighted until the next run.
+    """
+
+    def __init__(self, master, background='#1e1e1e', foreground='#00ff00', font=('Consolas', 10), **kwargs):
+        super().__init__(master, **kwargs)
+        self.status = ttk.Label(self, text="")
+        self.text = tk.Text(self, wrap=tk.NONE, width=80, height=20, font=font, background=background,
+                            foreground=foreground, insertbackground=foreground, state=tk.DISABLED)
+        self.text.tag_configure("changed", background='#264f78', foreground='#ffffff')
+        vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.text.yview)
+        hbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.config(yscrollcommand=vbar.set, xscrollcommand=hbar.set)
+        self.status.grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 4))
+        self.text.grid(row=1, column=0, sticky="nsew")
+        vbar.grid(row=1, column=1, sticky="ns")
+        hbar.grid(row=2, column=0, sticky="ew")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+    def show(self, lines, opcodes, highlight=True):
+        """Applies diff opcodes (tag, i1, i2, j1, j2) against the shown lines; lines are the new run's."""
+        text = self.text
+        text.config(state=tk.NORMAL)
+        text.tag_remove("changed", "1.0", tk.END)
+        # Back to front, so the line numbers of the opcodes still to apply stay valid.
+        for _, i1, i2, j1, j2 in reversed(opcodes):
+            if i2 > i1:
+                text.delete(f"{i1 + 1}.0", f"{i2 + 1}.0")
+            if j2 > j1:
+                text.insert(f"{i1 + 1}.0", "".join(line + "\n" for line in lines[j1:j2]), ("changed",) if highlight else ())
+        text.config(state=tk.DISABLED)
+
+    def set_status(self, text):
+        self.status.config(text=text)
+
+    def get_text(self):
+        return self.text.get("1.0", "end-1c")
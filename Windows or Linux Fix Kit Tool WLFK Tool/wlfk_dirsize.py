@@ -0,0 +1,339 @@
+# Directory size analyzer: which directories below a root take the space, measured
+# natively instead of launching a disk usage GUI that servers rarely have. Directories are
+# listed with os.scandir on a thread pool; like 'du -x' the scan stays on the root's
+# filesystem, counts a file with several hard links once and never follows symlinks.
+# Totals are kept up to date while the scan runs, so a view can show the partial tree.
+#
+# What a directory directly contains is cached by path and checked against the directory's
+# inode and mtime. Deleting or adding files changes a directory's mtime, so a scan after a
+# cleanup (apt clean, dnf clean all, pacman -Sc) only lists the directories that changed.
+# A file growing in place (a log being appended to) does not change it; a refresh scan
+# ignores the cache. This module must not import tkinter.
+import json
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from wlfk_cache import default_cache_dir
+
+CACHE_FILE = "dirsizes.json"
+# Threads listing directories at the same time (mostly waiting for the disk).
+DEFAULT_SCAN_WORKERS = 8
+# How often a running scan checks whether it should stop.
+SCAN_POLL_SECONDS = 0.1
+# Junctions and other reparse points are not descended into on Windows (some point back up the tree).
+_REPARSE_POINT = getattr(stat, "FILE_ATTRIBUTE_REPARSE_POINT", 0x400)
+
+
+def format_size(size):
+    """du -h style size, e.g. '1.5G'."""
+    for unit in ("B", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def disk_usage(entry_stat):
+    """Bytes a file takes on disk (allocated blocks, so sparse files count what they use)."""
+    blocks = getattr(entry_stat, "st_blocks", None)
+    return blocks * 512 if blocks is not None else entry_stat.st_size
+
+
+class DirNode:
+    """One directory of a scan, with the totals of everything found below it so far."""
+
+    __slots__ = ("id", "parent", "name", "size", "files", "dirs", "done", "children", "pending")
+
+    def __init__(self, node_id, parent, name):
+        self.id = node_id
+        self.parent = parent # Id of the parent directory, None for the root
+        self.name = name
+        self.size = 0 # Bytes
+        self.files = 0
+        self.dirs = 0 # Subdirectories, at any depth
+        self.done = False # Everything below it has been scanned
+        self.children = [] # Ids of the subdirectories
+        self.pending = 0 # Subdirectories not done yet (scans only)
+
+
+class DirectoryTree:
+    """The directories of a scan as DirNodes (nodes[0] is the root), and what a view reads.
+
+    Shared by DirectoryScan and its copy in the GUI while the scan runs in the job
+    worker process (wlfk_worker). version goes up whenever totals changed.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.nodes = []
+        self.version = 0
+        self.finished = False
+        self.complete = False # Finished without being stopped
+        self.errors = 0 # Directories that couldn't be listed
+        self.last_error = None
+        self.cached = 0 # Directories whose listing came from the cache
+
+    def path(self, node_id):
+        names = []
+        while node_id:
+            node = self.nodes[node_id]
+            names.append(node.name)
+            node_id = node.parent
+        return os.path.join(self.root, *reversed(names))
+
+    def children(self, node_id):
+        """The subdirectories of a directory, largest first."""
+        nodes = self.nodes
+        return sorted((nodes[child] for child in list(nodes[node_id].children)), key=lambda node: node.size,
+                      reverse=True)
+
+    def largest(self, depth=1, top=20, node_id=0):
+        """(depth, DirNode) of the top largest subdirectories per directory, down to depth levels."""
+        rows = []
+        if not self.nodes:
+            return rows
+        stack = [(0, self.nodes[node_id])]
+        while stack:
+            level, node = stack.pop()
+            rows.append((level, node))
+            if level < depth:
+                stack.extend((level + 1, child) for child in reversed(self.children(node.id)[:top]))
+        return rows
+
+    def summary(self):
+        """e.g. '/var: 12.3G in 4521 directories, 80210 files (4400 from the cache, 3 unreadable)'."""
+        root = self.nodes[0] if self.nodes else DirNode(0, None, "")
+        text = f"{self.root}: {format_size(root.size)} in {root.dirs + 1} directories, {root.files} files"
+        notes = []
+        if self.cached:
+            notes.append(f"{self.cached} from the cache")
+        if self.errors:
+            notes.append(f"{self.errors} unreadable")
+        return text + (f" ({', '.join(notes)})" if notes else "")
+
+
+class DirectoryScan(DirectoryTree):
+    """Scans a directory tree (see the module comment); run() blocks until it is done."""
+
+    def __init__(self, root, cache=None, refresh=False, workers=DEFAULT_SCAN_WORKERS):
+        super().__init__(os.path.abspath(root))
+        self.cache = cache # DirectoryCache, or None to always list every directory
+        self.refresh = refresh # List every directory, but still update the cache
+        self.workers = workers
+        self.seconds = None
+        self._device = None
+        self._seen = set() # Inodes of the hard-linked files and of the directories counted so far
+        self._changed = set() # Ids of the nodes changed since the last changes()
+        self._lock = threading.Lock()
+        self._all_done = threading.Event()
+        self._stopped = False
+        self._pool = None
+
+    def run(self, should_stop=None):
+        """Scans the tree on a thread pool. Returns True if complete, False if should_stop() said to stop.
+
+        Raises OSError if the root itself can't be read.
+        """
+        started = time.monotonic()
+        root_stat = os.stat(self.root)
+        if not stat.S_ISDIR(root_stat.st_mode):
+            raise NotADirectoryError(f"Not a directory: {self.root}")
+        self._device = root_stat.st_dev
+        self._seen.add(root_stat.st_ino)
+        if self.cache is not None:
+            self.cache.load()
+        with self._lock:
+            root = self._add_node(None, self.root)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="wlfk-scan")
+        self._pool.submit(self._scan, root, self.root, root_stat)
+        while not self._all_done.wait(SCAN_POLL_SECONDS):
+            if should_stop is not None and should_stop():
+                self._stopped = True
+                break
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.save(self.root, prune=not self._stopped)
+        self.seconds = time.monotonic() - started
+        self.complete = not self._stopped
+        self.finished = True
+        self.version += 1
+        return self.complete
+
+    def task(self, emit, should_stop):
+        """Runs the scan as a job (see JobManager.submit's task); its output is the summary."""
+        try:
+            complete = self.run(should_stop)
+        except OSError as e:
+            emit(f"Cannot scan {self.root}: {e}\n")
+            return 1
+        emit(f"{self.summary()}, scanned in {self.seconds:.1f}s{'' if complete else ' (stopped)'}\n")
+        if self.last_error:
+            emit(f"Last unreadable directory: {self.last_error}\n")
+        return 0
+
+    def changes(self):
+        """(id, parent, name, size, files, dirs, done) of the nodes changed since the last call, parents first."""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            nodes = self.nodes
+            return [(node.id, node.parent, node.name, node.size, node.files, node.dirs, node.done)
+                    for node in (nodes[node_id] for node_id in sorted(changed))]
+
+    def _add_node(self, parent, name):
+        """A new node (lock held)."""
+        node = DirNode(len(self.nodes), None if parent is None else parent.id, name)
+        self.nodes.append(node)
+        if parent is not None:
+            parent.children.append(node.id)
+        self._changed.add(node.id)
+        return node
+
+    def _scan(self, node, path, dir_stat):
+        """Lists one directory and queues its subdirectories (pool threads)."""
+        if self._stopped:
+            return
+        try:
+            size, files, subdirs, links, cached = self._list(path, dir_stat)
+        except OSError as e:
+            size, files, subdirs, links, cached = 0, 0, [], [], False
+            with self._lock:
+                self.errors += 1
+                self.last_error = f"{path}: {e.strerror or e}"
+        size += disk_usage(dir_stat) # The directory's own blocks, like du
+        with self._lock:
+            seen = self._seen
+            for inode, usage in links: # Hard-linked files count where they are found first
+                if inode not in seen:
+                    seen.add(inode)
+                    size += usage
+            added = []
+            for name, child_stat in subdirs:
+                if not child_stat.st_ino or child_stat.st_ino not in seen: # Bind mounts are counted once
+                    seen.add(child_stat.st_ino)
+                    added.append((self._add_node(node, name), os.path.join(path, name), child_stat))
+            self.cached += cached
+            walker = node
+            while walker is not None:
+                walker.size += size
+                walker.files += files
+                walker.dirs += len(added)
+                self._changed.add(walker.id)
+                walker = None if walker.parent is None else self.nodes[walker.parent]
+            node.pending = len(added)
+            if not added:
+                self._finish(node)
+            self.version += 1
+        for child in added:
+            try:
+                self._pool.submit(self._scan, *child)
+            except RuntimeError: # Stopped: the pool no longer takes work
+                return
+
+    def _finish(self, node):
+        """Marks a node done, and its parents whose subdirectories are all done now (lock held)."""
+        while True:
+            node.done = True
+            self._changed.add(node.id)
+            if node.parent is None:
+                self._all_done.set()
+                return
+            node = self.nodes[node.parent]
+            node.pending -= 1
+            if node.pending:
+                return
+
+    def _list(self, path, dir_stat):
+        """(size, files, [(subdir name, stat)], [(inode, size) of hard-linked files], from cache) of one directory."""
+        cached = None
+        if self.cache is not None and not self.refresh:
+            cached = self.cache.get(path, dir_stat)
+        if cached is not None:
+            size, files, names, links = cached
+            subdirs = []
+            for name in names:
+                try:
+                    subdirs.append((name, os.lstat(os.path.join(path, name))))
+                except OSError:
+                    continue # Removed since: its parent's mtime changed too, unless it's a mount point
+            return size, files, [(name, sub) for name, sub in subdirs if self._descend(sub)], links, True
+        size = files = 0
+        subdirs = []
+        links = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # DirEntry.stat() has no inode or device on Windows
+                        subdirs.append((entry.name, os.lstat(entry.path) if os.name == "nt" else
+                                        entry.stat(follow_symlinks=False)))
+                        continue
+                    entry_stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                files += 1
+                if entry_stat.st_nlink > 1:
+                    links.append((entry_stat.st_ino, disk_usage(entry_stat)))
+                else:
+                    size += disk_usage(entry_stat)
+        if self.cache is not None:
+            self.cache.put(path, dir_stat, size, files, [name for name, _ in subdirs], links)
+        return size, files, [(name, sub) for name, sub in subdirs if self._descend(sub)], links, False
+
+    def _descend(self, dir_stat):
+        """False for directories on another filesystem (mount points) and Windows junctions."""
+        if dir_stat.st_dev != self._device:
+            return False
+        return not getattr(dir_stat, "st_file_attributes", 0) & _REPARSE_POINT
+
+
+class DirectoryCache:
+    """What each directory directly contains (total file size and count, subdirectory names,
+    hard-linked files), by path; an entry is used while the directory's inode and mtime match.
+
+    Thread-safe for get() and put() during a scan; load() and save() around it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(default_cache_dir(), CACHE_FILE)
+        self._entries = None # path -> [inode, mtime_ns, size, files, subdirectory names, [[inode, size], ...]]
+        self._used = set() # Paths looked up or stored by the current scan
+
+    def load(self):
+        if self._entries is not None:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                self._entries = json.load(cache_file)
+        except (OSError, ValueError):
+            self._entries = {}
+        if not isinstance(self._entries, dict):
+            self._entries = {}
+
+    def get(self, path, dir_stat):
+        """(size, files, subdirectory names, hard links) of an unchanged directory, or None."""
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != dir_stat.st_ino or entry[1] != dir_stat.st_mtime_ns:
+            return None
+        self._used.add(path)
+        return entry[2], entry[3], entry[4], [tuple(link) for link in entry[5]]
+
+    def put(self, path, dir_stat, size, files, names, links):
+        self._entries[path] = [dir_stat.st_ino, dir_stat.st_mtime_ns, size, files, names, links]
+        self._used.add(path)
+
+    def save(self, root, prune=True):
+        """Writes the cache. With prune, the entries below root that the scan didn't reach are dropped."""
+        if prune:
+            prefix = root.rstrip(os.sep) + os.sep
+            for path in [path for path in self._entries if path.startswith(prefix) and path not in self._used]:
+                del self._entries[path]
+        self._used = set()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as cache_file:
+                json.dump(self._entries, cache_file, separators=(",", ":"))
+            os.replace(self.path + ".tmp", self.path)
+        except OSError:
+            pass # Scanned in full again next time
@@ -0,0 +1,227 @@
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from wlfk_console import ERROR_PATTERN, WARNING_PATTERN
+
+# How often the window checks whether a background export has finished.
+EXPORT_POLL_MS = 200
+
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class LogPager(ttk.Frame):
+    """Read-only view of a wlfk_spool.SpoolReader that only ever loads the visible lines."""
+
+    def __init__(self, master, background='#1e1e1e', foreground='#00ff00', font=('Consolas', 10), **kwargs):
+        super().__init__(master, **kwargs)
+        self.reader = None
+        self.top = 0
+        self.rows = 20 # Visible rows, refreshed on <Configure>
+
+        self.text = tk.Text(self, wrap=tk.NONE, width=80, height=20, font=font, background=background,
+                            foreground=foreground, state=tk.DISABLED)
+        self.text.tag_configure("error", foreground='#ff6b6b')
+        self.text.tag_configure("warning", foreground='#ffb74d')
+        self.vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.hbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.config(xscrollcommand=self.hbar.set)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.vbar.grid(row=0, column=1, sticky="ns")
+        self.hbar.grid(row=1, column=0, sticky="ew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.text.bind("<Configure>", self._on_configure)
+        self.text.bind("<MouseWheel>", lambda event: self._scroll_by(-3 if event.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda event: self._scroll_by(-3))
+        self.text.bind("<Button-5>", lambda event: self._scroll_by(3))
+        self.text.bind("<Prior>", lambda event: self._scroll_by(-self.rows))
+        self.text.bind("<Next>", lambda event: self._scroll_by(self.rows))
+        self.text.bind("<Control-Home>", lambda event: self._scroll_to(0))
+        self.text.bind("<Control-End>", lambda event: self._scroll_to(len(self.reader or ())))
+
+    def show(self, reader):
+        """Replaces the shown log (the previous reader is closed)."""
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = reader
+        self.top = 0
+        self._render()
+
+    def yview(self, *args):
+        if not args or self.reader is None:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.reader)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self._scroll_by(amount * self.rows if args[2] == "pages" else amount)
+
+    def destroy(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        super().destroy()
+
+    def _scroll_by(self, rows):
+        self._scroll_to(self.top + rows)
+        return "break"
+
+    def _scroll_to(self, top):
+        total = len(self.reader) if self.reader is not None else 0
+        self.top = min(max(0, top), max(0, total - self.rows))
+        self._render()
+        return "break"
+
+    def _on_configure(self, event):
+        linespace = self.text.tk.call("font", "metrics", self.text.cget("font"), "-linespace")
+        self.rows = max(1, event.height // max(1, int(linespace)))
+        self._render()
+
+    def _render(self):
+        lines = self.reader.lines(self.top, self.top + self.rows) if self.reader is not None else []
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        for number, line in enumerate(lines, 1):
+            if ERROR_PATTERN.search(line):
+                self.text.tag_add("error", f"{number}.0", f"{number}.end")
+            elif WARNING_PATTERN.search(line):
+                self.text.tag_add("warning", f"{number}.0", f"{number}.end")
+        self.text.config(state=tk.DISABLED)
+        total = len(self.reader) if self.reader is not None else 0
+        if total:
+            self.vbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+        else:
+            self.vbar.set(0.0, 1.0)
+
+
+class HistoryBrowser(tk.Toplevel):
+    """Lists the runs in a wlfk_spool.SpoolStore and pages through their logs.
+
+    Logs are opened lazily (memory-mapped) when a run is selected; exporting copies
+    the log file, optionally gzip-compressed, on a background thread.
+    """
+
+    def __init__(self, master, store, background='#1e1e1e', foreground='#00ff00', **kwargs):
+        super().__init__(master, **kwargs)
+        self.title("Run History")
+        self.geometry("1100x600")
+        self.store = store
+        self.runs = {} # Treeview item -> SpooledRun
+        self._export = None # (thread, result list, path) of the export in progress
+
+        toolbar = ttk.Frame(self)
+        toolbar.pack(fill=tk.X, padx=10, pady=(10, 5))
+        ttk.Button(toolbar, text="Export...", command=self.export_selected).pack(side=tk.LEFT)
+        ttk.Button(toolbar, text="Delete", command=self.delete_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Reload", command=self.reload).pack(side=tk.LEFT)
+        self.status = ttk.Label(toolbar, text="")
+        self.status.pack(side=tk.LEFT, padx=10)
+
+        panes = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
+        panes.pack(expand=True, fill=tk.BOTH, padx=10, pady=(0, 10))
+        list_frame = ttk.Frame(panes)
+        self.tree = ttk.Treeview(list_frame, columns=("started", "command", "state", "size"), show="headings",
+                                 selectmode="extended")
+        for column, heading, width in (("started", "Started", 130), ("command", "Command", 200),
+                                       ("state", "State", 80), ("size", "Output", 80)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=(column == "command"))
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(expand=True, fill=tk.BOTH)
+        self.tree.bind("<<TreeviewSelect>>", lambda event: self._show_selected())
+        self.pager = LogPager(panes, background=background, foreground=foreground)
+        panes.add(list_frame, weight=1)
+        panes.add(self.pager, weight=3)
+        self.reload()
+
+    def reload(self):
+        self.tree.delete(*self.tree.get_children())
+        self.runs = {}
+        for run in self.store.runs():
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run.started))
+            state = run.state if run.exit_code in (None, 0) else f"{run.state} ({run.exit_code})"
+            item = self.tree.insert("", tk.END, values=(started, run.name, state, format_size(run.size)))
+            self.runs[item] = run
+        self.status.config(text=f"{len(self.runs)} runs in {self.store.directory}")
+
+    def _selected_runs(self):
+        return [self.runs[item] for item in self.tree.selection() if item in self.runs]
+
+    def _show_selected(self):
+        runs = self._selected_runs()
+        if len(runs) != 1:
+            return
+        try:
+            reader = self.store.open_reader(runs[0].id)
+        except (OSError, ValueError) as e:
+            self.pager.show(None)
+            self.status.config(text=f"Cannot open the log: {e}")
+            return
+        self.pager.show(reader)
+        self.status.config(text=f"{runs[0].command} - {len(reader)} lines, {format_size(reader.size)}")
+
+    def export_selected(self):
+        runs = self._selected_runs()
+        if len(runs) != 1:
+            messagebox.showinfo("Export Run", "Select one run to export.", parent=self)
+            return
+        if self._export is not None:
+            messagebox.showinfo("Export Run", "An export is already running.", parent=self)
+            return
+        run = runs[0]
+        name = f"wlfk-{run.id}.log"
+        path = filedialog.asksaveasfilename(parent=self, title="Export Run Output", initialfile=name,
+                                            filetypes=[("Log file", "*.log"), ("Gzip-compressed log", "*.gz")])
+        if path:
+            self.export(run.id, path)
+
+    def export(self, run_id, path):
+        """Copies a run's log to path (gzip if it ends in .gz) without blocking the window."""
+        result = []
+
+        def worker():
+            try:
+                result.append(self.store.export(run_id, path))
+            except OSError as e:
+                result.append(e)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        self._export = (thread, result, path)
+        thread.start()
+        self.status.config(text=f"Exporting to {path}...")
+        self.after(EXPORT_POLL_MS, self._poll_export)
+
+    def _poll_export(self):
+        if not self.winfo_exists():
+            return
+        thread, result, path = self._export
+        if thread.is_alive():
+            self.after(EXPORT_POLL_MS, self._poll_export)
+            return
+        self._export = None
+        if result and isinstance(result[0], int):
+            self.status.config(text=f"Exported {format_size(result[0])} to {path}")
+        else:
+            messagebox.showerror("Export Run", f"Export failed: {result[0] if result else 'unknown error'}", parent=self)
+            self.status.config(text="")
+
+    def delete_selected(self):
+        runs = self._selected_runs()
+        if not runs:
+            return
+        if not messagebox.askyesno("Delete Runs", f"Delete {len(runs)} run(s) and their output?", parent=self):
+            return
+        self.pager.show(None)
+        self.store.delete(run.id for run in runs)
+        self.reload()
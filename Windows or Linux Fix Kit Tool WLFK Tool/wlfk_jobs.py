@@ -0,0 +1,491 @@
+import itertools
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from wlfk_terminal import TerminalDecoder
+
+# Maximum number of commands running at the same time; further jobs wait in the queue.
+DEFAULT_MAX_JOBS = 4
+# Maximum number of bytes read from a child's pipe in one go.
+READ_CHUNK_SIZE = 64 * 1024
+# How much of a command's stderr is kept around for the permission/not-found hints.
+STDERR_TAIL_CHARS = 16 * 1024
+# How often a running job checks for cancellation and its timeout.
+JOB_POLL_SECONDS = 0.1
+# How long a cancelled process group gets to exit after SIGTERM before SIGKILL.
+KILL_GRACE_SECONDS = 2.0
+
+# Job states
+QUEUED = "Queued"
+RUNNING = "Running"
+FINISHED = "Finished"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+TIMED_OUT = "Timed out"
+
+PERMISSION_HINT = ("\n--- NOTE: This command likely requires Administrator/root privileges. Please ensure the WLFK Tool itself "
+                   "is run as Administrator (Windows) or with 'sudo' (Linux/macOS) for full functionality. ---\n")
+NOT_FOUND_HINT = ("\n--- ERROR: Command '{program}' not found or invalid. Ensure it's correctly typed and available in your "
+                  "system's PATH. Also, verify you selected the correct OS type (Windows, Linux, macOS) for your current system. ---\n")
+
+
+def error_hint(command, error):
+    """Returns a hint for a failed command based on its stderr, or an empty string."""
+    if ("Access is denied" in error or "requested operation requires elevation" in error or
+            "Operation not permitted" in error or "Permission denied" in error or
+            "EACCES" in error or "a terminal is required" in error or
+            "sudo: command not found" in error): # Explicitly catch sudo not found
+        return PERMISSION_HINT
+    if "command not found" in error or "is not recognized as an internal or external command" in error or "No such file or directory" in error:
+        return NOT_FOUND_HINT.format(program=command.split(' ')[0])
+    return ""
+
+
+def process_group_kwargs():
+    """Popen arguments that put the shell and everything it starts into its own process group."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    # A new session also detaches from the controlling terminal, so 'sudo' fails fast
+    # instead of silently waiting for a password nobody can type.
+    return {"start_new_session": True}
+
+
+def kill_process_group(process, exited=None):
+    """Terminates the whole process group of a shell=True child (the shell and its pipeline).
+
+    exited is the ChildWaiter event when one is reaping the child; Popen.wait() must
+    not be used then, since only one of them can collect the exit status.
+    """
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return
+    # With start_new_session the group id is the shell's pid. The group may outlive the
+    # shell itself (e.g. a backgrounded child still holding the pipes), so always signal it.
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    if exited is not None:
+        exited.wait(KILL_GRACE_SECONDS)
+    else:
+        try:
+            process.wait(KILL_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            pass
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class OutputPump:
+    """Turns the chunks read from one of a child's pipes into console text passed to emit().
+
+    stderr_tail is None for stdout; for stderr it is a list that collects the last
+    STDERR_TAIL_CHARS characters so the error hints can still be matched. count, if
+    given, is called with the size in bytes of every chunk. encoding defaults to
+    wlfk_terminal.default_encoding().
+    """
+
+    def __init__(self, emit, stderr_tail=None, encoding=None, count=None):
+        self.emit = emit
+        self.stderr_tail = stderr_tail
+        self.count = count
+        # Decoded chunk by chunk so a multi-byte character split across two reads is not
+        # mangled; escape sequences are dropped and progress-bar redraws collapsed.
+        self.decoder = TerminalDecoder(encoding)
+        self.header_sent = False
+
+    def feed(self, chunk):
+        """Handles one chunk; an empty chunk means the pipe was closed."""
+        if chunk and self.count is not None:
+            self.count(len(chunk))
+        text = self.decoder.decode(chunk, final=not chunk)
+        if not text:
+            return
+        if self.stderr_tail is not None:
+            if not self.header_sent:
+                text = f"\nERROR:\n{text}"
+                self.header_sent = True
+            self.stderr_tail.append(text)
+            # Keep only the tail; the whole stderr has already been emitted.
+            if len(self.stderr_tail) > 1:
+                self.stderr_tail[:] = ["".join(self.stderr_tail)[-STDERR_TAIL_CHARS:]]
+        self.emit(text)
+
+
+def pump_stream(stream, emit, stderr_tail=None, encoding=None, count=None):
+    """Reads one of a child's pipes incrementally and passes the decoded text to emit() (see OutputPump)."""
+    pump = OutputPump(emit, stderr_tail, encoding, count)
+    try:
+        while True:
+            chunk = stream.read1(READ_CHUNK_SIZE) # Returns as soon as any data is available
+            pump.feed(chunk)
+            if not chunk:
+                break
+    finally:
+        stream.close()
+
+
+class ChildWaiter:
+    """Reaps a child on its own thread, so a job can block on `exited` and wake up as soon as it exits.
+
+    On POSIX it uses os.wait4(), which also returns the child's resource usage (CPU
+    time, peak RSS, including the processes the shell waited for) -- the same numbers a
+    getrusage(RUSAGE_CHILDREN) delta gives, but for this child only, even while other
+    jobs are running. Popen.poll()/wait() must not be used on the process meanwhile.
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self.exited = threading.Event()
+        self.rusage = None
+        threading.Thread(target=self._wait, daemon=True).start()
+
+    def _wait(self):
+        try:
+            if hasattr(os, "wait4"):
+                _, status, self.rusage = os.wait4(self.process.pid, 0)
+                self.process.returncode = os.waitstatus_to_exitcode(status)
+            else:
+                self.process.wait()
+        finally:
+            self.exited.set()
+
+
+class Job:
+    """One command submitted to a JobManager."""
+
+    def __init__(self, job_id, name, command, timeout=None, launches_gui=False, probe=None,
+                 cache_paths=None, refresh=False, encoding=None, history=True, task=None):
+        self.id = job_id
+        self.name = name
+        self.command = command
+        self.probe = probe # wlfk_probes probe run in-process instead of the command, if any
+        self.task = task # Callable run in-process instead of the command, if any (see JobManager.submit)
+        self.cache_paths = cache_paths # Result may come from / go to the manager's cache (None = never)
+        self.refresh = refresh # Skip the cache lookup but still store the new result
+        self.encoding = encoding # Output encoding (None = wlfk_terminal.default_encoding())
+        self.history = history # Spool the output and record telemetry (off for watch-mode re-runs)
+        self.cached_at = None # time.time() the served cached result was produced, if it came from the cache
+        # Telemetry (see wlfk_telemetry)
+        self.source = "command" # How the output was produced: command, probe, cache or launch
+        self.spawn_latency = None # Seconds spent starting the shell (Popen)
+        self.first_output = None # Seconds from start to the first byte of output
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+        self.rusage = None # Resource usage of the finished child (POSIX only)
+        self.spool = None # wlfk_spool.SpoolWriter the output is written to, while the job runs
+        self.run_id = None # Id of the job's log in the manager's SpoolStore
+        self.timeout = timeout # Wall-clock limit in seconds, or None
+        self.launches_gui = launches_gui # Opens its own window: launch it and don't wait
+        self.state = QUEUED
+        self.returncode = None
+        self.started = None
+        self.ended = None
+        self.process = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def runtime(self):
+        """Seconds the job has been running (or ran), 0 while queued."""
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.monotonic()) - self.started
+
+    @property
+    def done(self):
+        return self.state not in (QUEUED, RUNNING)
+
+
+class JobManager:
+    """Runs commands on a bounded worker pool with per-job timeouts and cancellation.
+
+    Progress is reported through the thread-safe `events` queue as (job, kind, payload)
+    tuples: kind "text" carries output, kind "state" is sent whenever job.state changes.
+    The queue is meant to be drained by the GUI loop (or any other consumer). With
+    max_events it is bounded: once that many events wait, the threads reading the
+    commands' pipes block until the consumer catches up, and so do the commands.
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, cache=None, telemetry=None, spool=None, broker=None, max_events=0):
+        self.cache = cache # Optional wlfk_cache.ResultCache for jobs submitted with cache_paths
+        self.broker = broker # Optional wlfk_broker.PrivilegeBroker; runs the commands it handles as root
+        self.telemetry = telemetry # Optional wlfk_telemetry.TelemetryStore; every finished job is recorded
+        self.spool = spool # Optional wlfk_spool.SpoolStore; every run's output is written to a log file
+        self.events = queue.Queue(max_events)
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock() # Guards the QUEUED -> RUNNING/CANCELLED transition
+        self._pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="wlfk-job")
+
+    def submit(self, name, command, timeout=None, launches_gui=False, probe=None, cache_paths=None, refresh=False,
+               encoding=None, history=True, task=None):
+        """Queues a command and returns its Job.
+
+        With task, task(emit, should_stop) runs on the job's worker thread instead of the
+        command: it passes its output to emit(), returns an exit code and returns early
+        once should_stop() is true (cancelled or timed out); command is only a label then.
+        """
+        job = Job(next(self._ids), name, command, timeout, launches_gui, probe, cache_paths, refresh, encoding, history,
+                  task)
+        self.jobs[job.id] = job
+        self._emit(job, "state", job.state)
+        self._pool.submit(self._run, job)
+        return job
+
+    def cancel(self, job):
+        """Stops a job: a queued job never starts, a running one has its process group killed."""
+        job.cancel_event.set()
+        with self._lock:
+            if job.state == QUEUED:
+                self._set_state(job, CANCELLED)
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            if not job.done:
+                self.cancel(job)
+
+    def forget(self, job):
+        """Drops a finished job from the job table."""
+        if job.done:
+            self.jobs.pop(job.id, None)
+
+    def running_count(self):
+        return sum(1 for job in self.jobs.values() if not job.done)
+
+    def shutdown(self):
+        """Cancels everything and stops the worker pool without waiting for it."""
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self.telemetry is not None:
+            self.telemetry.flush()
+        if self.broker is not None:
+            self.broker.close() # The helper stops whatever it still runs for us
+
+    def _emit(self, job, kind, payload):
+        if kind == "text" and job.spool is not None:
+            job.spool.write(payload)
+        self.events.put((job, kind, payload))
+
+    def _set_state(self, job, state):
+        job.state = state
+        if state == RUNNING and self.spool is not None and job.history:
+            job.spool = self.spool.open(job.name, job.command)
+            if job.spool is not None:
+                job.run_id = job.spool.run.id
+        if job.done:
+            job.ended = time.monotonic()
+            if job.spool is not None:
+                job.spool.close(state, job.returncode)
+                job.spool = None
+            if self.telemetry is not None and job.history and job.started is not None:
+                self.telemetry.record(job) # A job cancelled while queued never ran
+        self._emit(job, "state", state)
+
+    def _run(self, job):
+        """Worker body: executes one job, streaming its output as events."""
+        with self._lock:
+            if job.state != QUEUED: # Cancelled while waiting for a worker
+                return
+            job.started = time.monotonic()
+            self._set_state(job, RUNNING)
+        emit = lambda text: self._emit(job, "text", text)
+        if job.task is not None:
+            self._run_task(job, emit)
+            return
+        if job.probe and self._run_probe(job, emit):
+            return
+        use_cache = self.cache is not None and job.cache_paths is not None
+        if use_cache:
+            if not job.refresh and self._serve_cached(job, emit):
+                return
+            # Taken before the run, so a change made while the command runs invalidates the result.
+            signature = self.cache.signature(job.cache_paths)
+            captured = []
+            emit = lambda text: (captured.append(text), self._emit(job, "text", text))
+        try:
+            shell_needed = True # Generally safer to use shell=True for complex commands or if on Windows
+
+            # For commands that launch a new GUI window, use subprocess.Popen to not wait for their completion.
+            if job.launches_gui:
+                job.source = "launch"
+                subprocess.Popen(job.command, shell=shell_needed)
+                emit(f"\nLaunched '{job.command}'. Check for a new window or prompt.\n")
+                job.returncode = 0
+                self._set_state(job, FINISHED)
+                return
+
+            outcome = None
+            if self.broker is not None and self.broker.handles(job.command):
+                outcome = self._run_brokered(job, emit)
+            stop_state, stderr_tail = outcome or self._run_process(job, emit)
+            if stop_state == TIMED_OUT:
+                emit(f"\nCommand timed out after {job.timeout:g} seconds and was stopped.\n")
+            elif stop_state == CANCELLED:
+                emit("\nCommand cancelled.\n")
+            elif job.returncode != 0:
+                emit(f"\nCommand exited with code: {job.returncode}\n")
+                # Provide a more specific hint for permission errors
+                hint = error_hint(job.command, "".join(stderr_tail))
+                if hint:
+                    emit(hint)
+            elif use_cache and stop_state is None:
+                self.cache.put(job.command, "".join(captured), signature)
+            self._set_state(job, stop_state or (FINISHED if job.returncode == 0 else FAILED))
+
+        except FileNotFoundError:
+            emit(f"\nError: Command '{job.command.split(' ')[0]}' not found. Make sure it's in your system's PATH.\n")
+            self._set_state(job, FAILED)
+        except Exception as e:
+            emit(f"\nAn unexpected error occurred: {e}\n")
+            self._set_state(job, FAILED)
+
+    def _run_process(self, job, emit):
+        """Runs the job's command in a shell. Returns (stop state or None, stderr tail)."""
+        # Stream stdout/stderr through pipes so output shows up as soon as it is
+        # written (needed for never-ending commands like 'journalctl -f').
+        spawn_start = time.monotonic()
+        job.process = subprocess.Popen(
+            job.command,
+            shell=True, # Catalog commands use pipes, && and quoting
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **process_group_kwargs()
+        )
+        job.spawn_latency = time.monotonic() - spawn_start
+        waiter = ChildWaiter(job.process)
+
+        stderr_tail = []
+        readers = [
+            threading.Thread(target=pump_stream, args=(job.process.stdout, emit, None, job.encoding), kwargs={"count": self._counter(job, "stdout_bytes")}, daemon=True),
+            threading.Thread(target=pump_stream, args=(job.process.stderr, emit, stderr_tail, job.encoding), kwargs={"count": self._counter(job, "stderr_bytes")}, daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+
+        stop_state = None
+        while True:
+            # Block in short slices so cancellation and the timeout are noticed promptly.
+            if not waiter.exited.is_set():
+                waiter.exited.wait(JOB_POLL_SECONDS)
+            else:
+                for reader in readers:
+                    reader.join(JOB_POLL_SECONDS)
+                if not any(reader.is_alive() for reader in readers):
+                    break
+            if stop_state is None:
+                if job.cancel_event.is_set():
+                    stop_state = CANCELLED
+                elif job.timeout and job.runtime > job.timeout:
+                    stop_state = TIMED_OUT
+                if stop_state is not None:
+                    kill_process_group(job.process, waiter.exited)
+
+        job.returncode = job.process.returncode
+        job.rusage = waiter.rusage
+        return stop_state, stderr_tail
+
+    def _run_brokered(self, job, emit):
+        """Runs a root command in the privileged helper (see wlfk_broker). Returns (stop state
+        or None, stderr tail), or None if the helper is unavailable and the command must be
+        run directly."""
+        from wlfk_broker import BrokerError # Only needed with a broker
+        stderr_tail = []
+        stdout = OutputPump(emit, None, job.encoding, self._counter(job, "stdout_bytes"))
+        stderr = OutputPump(emit, stderr_tail, job.encoding, self._counter(job, "stderr_bytes"))
+        spawn_start = time.monotonic()
+        try:
+            remote = self.broker.run(job.command, stdout.feed, stderr.feed)
+        except BrokerError as e:
+            emit(f"[Privileged helper unavailable ({e}); running the command directly.]\n")
+            return None
+        job.spawn_latency = time.monotonic() - spawn_start
+        stop_state = None
+        # The helper sends all output before the exit status, so `exited` also means drained.
+        while not remote.exited.wait(JOB_POLL_SECONDS):
+            if stop_state is None:
+                if job.cancel_event.is_set():
+                    stop_state = CANCELLED
+                elif job.timeout and job.runtime > job.timeout:
+                    stop_state = TIMED_OUT
+                if stop_state is not None:
+                    remote.cancel()
+        if remote.error:
+            emit(f"\n{remote.error}\n")
+        job.returncode = remote.returncode
+        job.rusage = remote.rusage
+        return stop_state, stderr_tail
+
+    def _counter(self, job, attribute):
+        """Returns a callback that adds a chunk's size to a job's byte counter."""
+        def count(size):
+            if job.first_output is None:
+                job.first_output = time.monotonic() - job.started
+            setattr(job, attribute, getattr(job, attribute) + size)
+        return count
+
+    def _serve_cached(self, job, emit):
+        """Finishes the job with a cached result if there is a valid one. Returns True if it did."""
+        result = self.cache.get(job.command, job.cache_paths)
+        if result is None:
+            return False
+        job.cached_at = result.created
+        job.source = "cache"
+        produced = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result.created))
+        emit(f"[Cached result from {produced} ({result.age / 60:.0f} min old); refresh to run the command again.]\n\n")
+        emit(result.output)
+        job.stdout_bytes = len(result.output.encode("utf-8"))
+        job.returncode = 0
+        self._set_state(job, FINISHED)
+        return True
+
+    def _run_task(self, job, emit):
+        """Runs the job's task in-process (see submit)."""
+        job.source = "task"
+        stop_state = []
+
+        def should_stop():
+            if not stop_state:
+                if job.cancel_event.is_set():
+                    stop_state.append(CANCELLED)
+                elif job.timeout and job.runtime > job.timeout:
+                    stop_state.append(TIMED_OUT)
+            return bool(stop_state)
+
+        try:
+            job.returncode = job.task(emit, should_stop)
+        except Exception as e:
+            emit(f"\nAn unexpected error occurred: {e}\n")
+            self._set_state(job, FAILED)
+            return
+        if stop_state == [TIMED_OUT]:
+            emit(f"\nCommand timed out after {job.timeout:g} seconds and was stopped.\n")
+        elif stop_state == [CANCELLED]:
+            emit("\nCommand cancelled.\n")
+        self._set_state(job, stop_state[0] if stop_state else (FINISHED if job.returncode == 0 else FAILED))
+
+    def _run_probe(self, job, emit):
+        """Produces the job's output in-process. Returns False if the command must be run instead."""
+        from wlfk_probes import run_probe # Only needed for probe jobs
+        try:
+            text = run_probe(job.probe)
+        except OSError:
+            return False # /proc not readable or not as expected: fall back to the real command
+        job.source = "probe"
+        if job.cancel_event.is_set():
+            emit("\nCommand cancelled.\n")
+            self._set_state(job, CANCELLED)
+            return True
+        emit(text)
+        job.first_output = time.monotonic() - job.started
+        job.stdout_bytes = len(text.encode("utf-8"))
+        job.returncode = 0
+        self._set_state(job, FINISHED)
+        return True
@@ -0,0 +1,281 @@
+# Log analysis of structured journal output (journalctl -o json): records are parsed on
+# the shared parser thread, filtered by priority and unit, and repeats of a message are
+# collapsed into one row with a count and a rate, so a service logging the same error
+# thousands of times a minute is one row instead of a flooded console.
+# This module must not import tkinter.
+import json
+import queue
+import re
+import shlex
+import threading
+import time
+
+from wlfk_parsers import _parser_worker
+
+# syslog priorities, by number
+PRIORITIES = ("emerg", "alert", "crit", "err", "warning", "notice", "info", "debug")
+# The only fields journalctl is asked for (the __ fields such as the timestamp always come along),
+# which keeps records small and quick to parse.
+OUTPUT_FIELDS = ("PRIORITY", "_SYSTEMD_UNIT", "SYSLOG_IDENTIFIER", "_TRANSPORT", "MESSAGE")
+# Records read from the journal when not following it, newest last.
+DEFAULT_JOURNAL_LINES = 50000
+# Distinct messages kept; later ones are counted in one overflow row per unit and priority.
+MAX_ROWS = 10000
+OVERFLOW_MESSAGE = "(other messages)"
+# Seconds covered by a row's rate.
+RATE_WINDOW = 60
+
+# Parts of a message that differ between repeats of it: numbers, 0x... and ids that start with a
+# digit. (Also matching ids that start with a letter makes the substitution several times slower.)
+_VARIABLE_PATTERN = re.compile(r"[0-9][0-9a-fA-FxX]*")
+# The priority of a journal JSON line, found without parsing the line (journalctl writes '"KEY" : "value"').
+_PRIORITY_PATTERN = re.compile(r'"PRIORITY"\s*:\s*"([0-7])"')
+
+
+def priority_number(name):
+    """'err' or '3' -> 3 (None for '' or 'all')."""
+    name = str(name).strip().lower()
+    if name in ("", "all"):
+        return None
+    if name.isdigit() and int(name) < len(PRIORITIES):
+        return int(name)
+    if name in PRIORITIES:
+        return PRIORITIES.index(name)
+    raise ValueError(f"Unknown priority {name!r} (one of {', '.join(PRIORITIES)})")
+
+
+def journal_command(follow=False, kernel=False, max_priority=None, units=(), lines=DEFAULT_JOURNAL_LINES):
+    """The journalctl command line that streams what a JournalAnalyzer consumes."""
+    parts = ["journalctl", "--no-pager", "-o", "json", "--output-fields=" + ",".join(OUTPUT_FIELDS), "-n", str(lines)]
+    if kernel:
+        parts.append("-k")
+    if max_priority is not None:
+        parts += ["-p", str(max_priority)]
+    for unit in units:
+        parts += ["-u", shlex.quote(unit)]
+    if follow:
+        parts.append("-f")
+    return " ".join(parts)
+
+
+def message_template(message):
+    """A message with its numbers and ids masked, so repeats of it share one row."""
+    return _VARIABLE_PATTERN.sub("#", message)
+
+
+def _text(value):
+    if isinstance(value, list): # Binary or invalid UTF-8 fields are arrays of byte values
+        try:
+            return bytes(value).decode("utf-8", "replace")
+        except (TypeError, ValueError):
+            return ""
+    return "" if value is None else str(value)
+
+
+def parse_record(line):
+    """(priority, unit, message, timestamp) of one journal JSON line, or None if it isn't one."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    try:
+        priority = int(record.get("PRIORITY", 6))
+    except (TypeError, ValueError):
+        priority = 6
+    unit = record.get("_SYSTEMD_UNIT") or record.get("SYSLOG_IDENTIFIER") \
+        or ("kernel" if record.get("_TRANSPORT") == "kernel" else "-")
+    try:
+        timestamp = int(record["__REALTIME_TIMESTAMP"]) / 1e6
+    except (KeyError, TypeError, ValueError):
+        timestamp = time.time()
+    return priority, _text(unit), _text(record.get("MESSAGE")).rstrip("\n"), timestamp
+
+
+class LogRow:
+    """One distinct message (per unit and priority): how often and how recently it was logged."""
+
+    __slots__ = ("priority", "unit", "template", "message", "count", "first", "last", "_buckets", "_seconds")
+
+    def __init__(self, priority, unit, template, message, timestamp):
+        self.priority = priority
+        self.unit = unit
+        self.template = template
+        self.message = message # The latest occurrence
+        self.count = 0
+        self.first = timestamp
+        self.last = timestamp
+        self._buckets = [0] * RATE_WINDOW # Occurrences per second, for the last RATE_WINDOW seconds
+        self._seconds = [0] * RATE_WINDOW # The second each bucket counts
+
+    def add(self, message, timestamp):
+        self.count += 1
+        self.message = message
+        if timestamp > self.last:
+            self.last = timestamp
+        second = int(timestamp)
+        slot = second % RATE_WINDOW
+        if self._seconds[slot] != second:
+            self._seconds[slot] = second
+            self._buckets[slot] = 0
+        self._buckets[slot] += 1
+
+    def rate(self, now):
+        """Occurrences in the RATE_WINDOW seconds up to now."""
+        oldest = int(now) - RATE_WINDOW
+        return sum(count for count, second in zip(self._buckets, self._seconds) if second > oldest)
+
+
+class JournalAnalyzer:
+    """Aggregates a stream of journal JSON lines into LogRows.
+
+    feed() may be called from any thread (the job's reader thread); parsing happens on
+    the shared parser thread of wlfk_parsers, like a TableBuilder. Readers call rows(),
+    which copies the aggregate under a lock, and can skip the copy while version is
+    unchanged. Records above max_priority, or from units not listed, are dropped.
+    """
+
+    def __init__(self, max_priority=None, units=()):
+        self.max_priority = max_priority
+        self.units = frozenset(units)
+        self.records = 0 # Journal records parsed
+        self.matched = 0 # Records that passed the filters
+        self.malformed = 0 # Lines that weren't journal JSON
+        self.last_malformed = None # The last of them (e.g. an error from journalctl)
+        self.latest = None # Timestamp of the newest record
+        self.version = 0
+        self.finished = False
+        self._rows = {} # (unit, priority, template) -> LogRow
+        self._partial = ""
+        self._chunks = queue.Queue()
+        self._lock = threading.Lock()
+
+    def feed(self, text):
+        self._chunks.put(text)
+        _parser_worker().submit(self)
+
+    def finish(self):
+        self._chunks.put(None)
+        _parser_worker().submit(self)
+
+    def feed_lines(self, lines):
+        """Aggregates complete lines on the calling thread (used for files and benchmarks)."""
+        records = []
+        skipped = malformed = 0
+        limit = self.max_priority
+        for line in lines:
+            if limit is not None:
+                # Records above the priority limit are dropped before the (much slower) JSON parse.
+                match = _PRIORITY_PATTERN.search(line)
+                if match is not None and int(match.group(1)) > limit:
+                    skipped += 1
+                    continue
+            record = parse_record(line)
+            if record is not None:
+                records.append(record)
+            elif line.strip():
+                malformed += 1
+                self.last_malformed = line.strip()
+        with self._lock:
+            self.records += skipped
+            self.malformed += malformed
+            self._add(records)
+
+    def parse(self, text):
+        """Aggregates output text on the calling thread (None ends the output); feed() queues it for the parser thread."""
+        if text is None:
+            lines, self._partial = [self._partial], ""
+            self.finished = True
+        else:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+        self.feed_lines(lines)
+        self.version += 1
+
+    def _drain(self):
+        """Parses everything queued so far (parser thread only)."""
+        while True:
+            try:
+                text = self._chunks.get_nowait()
+            except queue.Empty:
+                break
+            self.parse(text)
+
+    def _accepts(self, unit):
+        return unit in self.units or unit.rsplit(".", 1)[0] in self.units
+
+    def _add(self, records):
+        """Aggregates parsed records (lock held)."""
+        rows = self._rows
+        for priority, unit, message, timestamp in records:
+            self.records += 1
+            if self.max_priority is not None and priority > self.max_priority:
+                continue
+            if self.units and not self._accepts(unit):
+                continue
+            self.matched += 1
+            template = message_template(message)
+            key = (unit, priority, template)
+            row = rows.get(key)
+            if row is None:
+                if len(rows) >= MAX_ROWS:
+                    key = (unit, priority, OVERFLOW_MESSAGE)
+                    row = rows.get(key)
+                if row is None:
+                    row = rows[key] = LogRow(priority, unit, key[2], message, timestamp)
+            row.add(message, timestamp)
+            if self.latest is None or timestamp > self.latest:
+                self.latest = timestamp
+
+    def rows(self, max_priority=None, search=None, sort="count"):
+        """Copies of the aggregated rows as (priority, unit, count, rate, last, message) tuples.
+
+        max_priority and search (a lower-case substring of the unit or message) narrow
+        them down; sort is 'count', 'rate' or 'last' (most first), 'priority' (most
+        severe first). The rate is per RATE_WINDOW seconds, up to the newest record.
+        """
+        with self._lock:
+            now = self.latest or time.time()
+            rows = [(row.priority, row.unit, row.count, row.rate(now), row.last, row.message)
+                    for row in self._rows.values()
+                    if (max_priority is None or row.priority <= max_priority)
+                    and (not search or search in row.unit.lower() or search in row.message.lower())]
+        return sort_rows(rows, sort)
+
+    @property
+    def distinct(self):
+        return len(self._rows)
+
+
+def sort_rows(rows, sort="count"):
+    """Sorts rows() tuples in place (see JournalAnalyzer.rows) and returns them."""
+    if sort == "priority":
+        rows.sort(key=lambda row: (row[0], -row[2]))
+    else:
+        column = {"count": 2, "rate": 3, "last": 4}[sort]
+        rows.sort(key=lambda row: row[column], reverse=True)
+    return rows
+
+
+def select_rows(rows, max_priority=None, search=None, sort="count"):
+    """The rows() tuples of an aggregate copied earlier, narrowed down and sorted like JournalAnalyzer.rows()."""
+    return sort_rows([row for row in rows
+                      if (max_priority is None or row[0] <= max_priority)
+                      and (not search or search in row[1].lower() or search in row[5].lower())], sort)
+
+
+def analyze_file(path, max_priority=None, units=(), block_lines=10000):
+    """A JournalAnalyzer fed from a file of journal JSON lines (e.g. a saved 'journalctl -o json')."""
+    analyzer = JournalAnalyzer(max_priority, units)
+    with open(path, encoding="utf-8", errors="replace") as journal_file:
+        block = []
+        for line in journal_file:
+            block.append(line)
+            if len(block) >= block_lines:
+                analyzer.feed_lines(block)
+                block = []
+        analyzer.feed_lines(block)
+    analyzer.finished = True
+    analyzer.version += 1
+    return analyzer
@@ -0,0 +1,150 @@
+import tkinter as tk
+from tkinter import ttk
+
+from wlfk_sampler import SystemSampler, CPU, MEMORY, DISK_READ, DISK_WRITE, NET_RX, NET_TX
+
+# How often the panel checks the sampler for a new sample.
+REFRESH_MS = 250
+# Pixel layout of one sparkline row.
+ROW_HEIGHT = 34
+LABEL_WIDTH = 280
+ROW_PADDING = 4
+# Line colours for the first and second metric of a row.
+LINE_COLORS = ('#00ff00', '#4fc3f7')
+
+
+def format_percent(value):
+    return f"{value:.1f}%"
+
+
+def format_rate(value):
+    """Formats bytes per second, e.g. 1.2 MiB/s."""
+    for unit in ("B/s", "KiB/s", "MiB/s", "GiB/s"):
+        if value < 1024 or unit == "GiB/s":
+            return f"{value:.0f} {unit}" if unit == "B/s" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+# label, metrics drawn in the row, value formatter, fixed scale maximum (None = scale to the history)
+ROWS = (
+    ("CPU", (CPU,), format_percent, 100.0),
+    ("Memory", (MEMORY,), format_percent, 100.0),
+    ("Disk read/write", (DISK_READ, DISK_WRITE), format_rate, None),
+    ("Network rx/tx", (NET_RX, NET_TX), format_rate, None),
+)
+
+
+class MonitorPanel(ttk.Frame):
+    """Live sparklines of CPU, memory, disk and network activity.
+
+    The sampler thread does all the /proc reading; the panel only polls its sequence
+    number and, when a sample arrived, moves the canvas items whose coordinates or
+    text actually changed, so Tk repaints just those rows.
+    """
+
+    def __init__(self, master, background='#1e1e1e', foreground='#00ff00', **kwargs):
+        super().__init__(master, **kwargs)
+        self.sampler = None
+        self._drawn_sequence = -1
+        self._refresh_id = None
+        self._shown = {} # canvas item -> coords or text it currently shows
+        self._width = 0
+
+        controls = ttk.Frame(self)
+        controls.pack(fill=tk.X)
+        self.toggle_button = ttk.Button(controls, text="Start Monitor", command=self.toggle, style='TButton')
+        self.toggle_button.pack(side=tk.LEFT)
+        self.overhead_label = ttk.Label(controls, text="", style='Info.TLabel')
+        self.overhead_label.pack(side=tk.LEFT, padx=10)
+
+        self.canvas = tk.Canvas(self, height=len(ROWS) * ROW_HEIGHT, background=background, highlightthickness=0)
+        self.canvas.pack(fill=tk.X, pady=(5, 0))
+        self._rows = []
+        for index, (label, metrics, formatter, fixed_max) in enumerate(ROWS):
+            top = index * ROW_HEIGHT
+            text = self.canvas.create_text(8, top + ROW_HEIGHT // 2, anchor=tk.W, fill=foreground,
+                                           font=('Consolas', 9), text=f"{label}: -")
+            lines = [self.canvas.create_line(0, 0, 0, 0, fill=LINE_COLORS[i], width=1, state=tk.HIDDEN)
+                     for i in range(len(metrics))]
+            self.canvas.create_line(0, top + ROW_HEIGHT - 1, 10000, top + ROW_HEIGHT - 1, fill='#333333')
+            self._rows.append((label, metrics, formatter, fixed_max, top, text, lines))
+        self.canvas.bind("<Configure>", self._on_configure)
+
+    def toggle(self):
+        if self.sampler is not None and self.sampler.running:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self):
+        if self.sampler is None:
+            self.sampler = SystemSampler()
+        self.sampler.start()
+        self.toggle_button.config(text="Stop Monitor")
+        self._schedule_refresh()
+
+    def stop(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        self.toggle_button.config(text="Start Monitor")
+
+    def destroy(self):
+        self.stop()
+        super().destroy()
+
+    # --- Drawing ---
+
+    def _schedule_refresh(self):
+        self._refresh_id = self.after(REFRESH_MS, self._refresh)
+
+    def _on_configure(self, event):
+        if event.width != self._width:
+            self._width = event.width
+            self._drawn_sequence = -1 # Every x coordinate changes
+            self._draw()
+
+    def _refresh(self):
+        self._refresh_id = None
+        # Nothing is drawn while the screen is hidden; the sampler keeps collecting.
+        if self.winfo_ismapped() and self.sampler.sequence != self._drawn_sequence:
+            self._draw()
+        self._schedule_refresh()
+
+    def _set_coords(self, item, coords):
+        if self._shown.get(item) != coords:
+            self._shown[item] = coords
+            self.canvas.coords(item, *coords)
+            self.canvas.itemconfigure(item, state=tk.NORMAL)
+
+    def _set_text(self, item, text):
+        if self._shown.get(item) != text:
+            self._shown[item] = text
+            self.canvas.itemconfigure(item, text=text)
+
+    def _draw(self):
+        if self.sampler is None or not self.sampler.count:
+            return
+        self._drawn_sequence = self.sampler.sequence
+        width = max(LABEL_WIDTH + 10, self._width) - ROW_PADDING
+        step = (width - LABEL_WIDTH) / (self.sampler.size - 1)
+        for label, metrics, formatter, fixed_max, top, text, lines in self._rows:
+            histories = [self.sampler.history(metric) for metric in metrics]
+            scale = fixed_max or max(1.0, max(max(history) for history in histories))
+            bottom = top + ROW_HEIGHT - ROW_PADDING
+            height = ROW_HEIGHT - 2 * ROW_PADDING
+            for item, history in zip(lines, histories):
+                # Newest sample at the right edge; a single sample is drawn as a flat stub.
+                if len(history) == 1:
+                    history = history * 2
+                x = width - step * (len(history) - 1)
+                coords = []
+                for value in history:
+                    coords.append(round(x, 1))
+                    coords.append(round(bottom - height * min(value, scale) / scale, 1))
+                    x += step
+                self._set_coords(item, coords)
+            self._set_text(text, f"{label}: " + " / ".join(formatter(history[-1]) for history in histories))
+        self.overhead_label.config(text=f"Sampler CPU: {self.sampler.overhead_percent():.2f}% of one core")
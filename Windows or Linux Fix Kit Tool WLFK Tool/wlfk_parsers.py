@@ -0,0 +1,235 @@
+# Parsers that turn the text output of ps aux, netstat -tulnp, df -h, lsof -i and the
+# package managers into typed table rows, built incrementally on a worker thread.
+# The GUI shows the rows in wlfk_table.TableView. This module must not import tkinter.
+import queue
+import re
+import threading
+
+# Column kinds: how a cell is converted for sorting and shown again.
+TEXT = "text"
+INT = "int"
+FLOAT = "float"
+BYTES = "bytes" # Human-readable size such as 3.0G, sorted by its value
+PERCENT = "percent"
+
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4, "P": 1024 ** 5, "E": 1024 ** 6}
+_SIZE_PATTERN = re.compile(r"^([0-9.]+)([BKMGTPE]?)i?B?$", re.IGNORECASE)
+
+
+def parse_size(text):
+    """'3.0G' -> bytes (0 if it isn't a size)."""
+    match = _SIZE_PATTERN.match(text)
+    if not match:
+        return 0
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+class Measured(int):
+    """An integer sort key that is displayed the way the command printed it (e.g. '5.9G', '19%')."""
+
+    def __new__(cls, value, text):
+        number = super().__new__(cls, value)
+        number.text = text
+        return number
+
+    def __str__(self):
+        return self.text
+
+    def __reduce__(self): # Pickled with its text (rows are sent from the job worker process)
+        return Measured, (int(self), self.text)
+
+
+def _convert(kind, text):
+    try:
+        if kind == INT:
+            return int(text)
+        if kind == FLOAT:
+            return float(text)
+    except ValueError:
+        return 0
+    if kind == BYTES:
+        return Measured(parse_size(text), text)
+    if kind == PERCENT:
+        number = text.rstrip("%")
+        return Measured(int(number) if number.isdigit() else -1, text)
+    return text
+
+
+class TableParser:
+    """Base class: splits each data line into len(columns) fields and converts them.
+
+    Subclasses set columns ((heading, kind) pairs), the header prefixes to skip, and
+    override split() when a plain whitespace split doesn't fit.
+    """
+
+    columns = ()
+    skip_prefixes = ()
+
+    def split(self, line):
+        return line.split(None, len(self.columns) - 1)
+
+    def parse(self, line):
+        """Returns a tuple of typed cells, or None for headers and lines that aren't rows."""
+        if not line.strip() or line.startswith(self.skip_prefixes):
+            return None
+        fields = self.split(line)
+        if fields is None or len(fields) != len(self.columns):
+            return None
+        return tuple(_convert(kind, field) for (_, kind), field in zip(self.columns, fields))
+
+
+class ProcessParser(TableParser):
+    """ps aux"""
+    columns = (("USER", TEXT), ("PID", INT), ("%CPU", FLOAT), ("%MEM", FLOAT), ("VSZ (KiB)", INT),
+               ("RSS (KiB)", INT), ("TTY", TEXT), ("STAT", TEXT), ("START", TEXT), ("TIME", TEXT), ("COMMAND", TEXT))
+    skip_prefixes = ("USER ",)
+
+
+class NetstatParser(TableParser):
+    """netstat -tulnp"""
+    columns = (("Proto", TEXT), ("Recv-Q", INT), ("Send-Q", INT), ("Local Address", TEXT),
+               ("Foreign Address", TEXT), ("State", TEXT), ("PID/Program", TEXT))
+    skip_prefixes = ("Active ", "Proto ")
+
+    def split(self, line):
+        fields = line.split()
+        if len(fields) < 6 or not fields[0].startswith(("tcp", "udp", "raw")):
+            return None
+        # UDP sockets have no state column.
+        if fields[0].startswith("tcp"):
+            return fields[:6] + [" ".join(fields[6:])]
+        return fields[:5] + [""] + [" ".join(fields[5:])]
+
+
+class DiskUsageParser(TableParser):
+    """df -h"""
+    columns = (("Filesystem", TEXT), ("Size", BYTES), ("Used", BYTES), ("Avail", BYTES), ("Use%", PERCENT),
+               ("Mounted on", TEXT))
+    skip_prefixes = ("Filesystem ",)
+
+
+class OpenFilesParser(TableParser):
+    """lsof -i"""
+    columns = (("COMMAND", TEXT), ("PID", INT), ("USER", TEXT), ("FD", TEXT), ("TYPE", TEXT), ("DEVICE", TEXT),
+               ("SIZE/OFF", TEXT), ("NODE", TEXT), ("NAME", TEXT))
+    skip_prefixes = ("COMMAND ",)
+
+
+class DpkgParser(TableParser):
+    """dpkg -l"""
+    columns = (("Status", TEXT), ("Name", TEXT), ("Version", TEXT), ("Architecture", TEXT), ("Description", TEXT))
+    skip_prefixes = ("Desired=", "|", "+++-")
+
+
+class RpmParser(TableParser):
+    """rpm -qa: name-version-release.arch"""
+    columns = (("Name", TEXT), ("Version", TEXT), ("Release", TEXT), ("Architecture", TEXT))
+
+    def split(self, line):
+        package = line.strip()
+        if " " in package or package.count("-") < 2:
+            return None
+        name, version, release = package.rsplit("-", 2)
+        release, _, arch = release.rpartition(".") if "." in release else (release, "", "")
+        return [name, version, release, arch]
+
+
+class PacmanParser(TableParser):
+    """pacman -Q"""
+    columns = (("Name", TEXT), ("Version", TEXT))
+
+
+# Table names used by the catalog (CatalogEntry.table) -> parser class.
+PARSERS = {
+    "processes": ProcessParser,
+    "netstat": NetstatParser,
+    "disk-usage": DiskUsageParser,
+    "open-files": OpenFilesParser,
+    "dpkg": DpkgParser,
+    "rpm": RpmParser,
+    "pacman": PacmanParser,
+}
+
+
+class TableBuilder:
+    """Collects a command's output and parses it into rows on the shared parser thread.
+
+    rows only ever grows (append-only), so the GUI can read len(rows) and the rows
+    below it without locking. search_text holds each row's lower-cased text for
+    filtering. version goes up whenever rows were added or parsing finished.
+    """
+
+    def __init__(self, table):
+        self.parser = PARSERS[table]()
+        self.columns = self.parser.columns
+        self.rows = []
+        self.search_text = []
+        self.version = 0
+        self.finished = False
+        self._partial = ""
+        self._chunks = queue.Queue()
+
+    def feed(self, text):
+        """Queues output text for parsing (any thread)."""
+        self._chunks.put(text)
+        _parser_worker().submit(self)
+
+    def finish(self):
+        """Marks the end of the output so the last, unterminated line is parsed too."""
+        self._chunks.put(None)
+        _parser_worker().submit(self)
+
+    def parse(self, text):
+        """Parses output text on the calling thread instead (None ends the output). Returns True if rows were added."""
+        if text is None:
+            lines, self._partial = [self._partial], ""
+            self.finished = True
+        else:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+        added = False
+        parse = self.parser.parse
+        for line in lines:
+            row = parse(line)
+            if row is not None:
+                self.search_text.append(" ".join(map(str, row)).lower())
+                self.rows.append(row)
+                added = True
+        return added
+
+    def _drain(self):
+        """Parses everything queued so far (parser thread only)."""
+        added = False
+        while True:
+            try:
+                text = self._chunks.get_nowait()
+            except queue.Empty:
+                break
+            added = self.parse(text) or added
+        if added or self.finished:
+            self.version += 1
+
+
+class _ParserWorker:
+    def __init__(self):
+        self.pending = queue.Queue()
+        threading.Thread(target=self._loop, name="wlfk-parser", daemon=True).start()
+
+    def submit(self, builder):
+        self.pending.put(builder)
+
+    def _loop(self):
+        while True:
+            self.pending.get()._drain()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _parser_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = _ParserWorker()
+        return _worker
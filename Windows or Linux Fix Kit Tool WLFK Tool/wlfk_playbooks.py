@@ -0,0 +1,270 @@
+# Repair playbooks: multi-step workflows over catalog commands. A playbook is a DAG of
+# steps with exit-code conditions and retries; every step whose dependencies are done
+# starts right away, so independent steps run in parallel on the JobManager.
+# This module must not import tkinter.
+import time
+
+from wlfk_catalog import CATALOG, WINDOWS_VERSIONS
+from wlfk_jobs import CANCELLED
+
+# When a step runs, depending on how the steps it comes after ended.
+ON_SUCCESS = "on-success" # All of them succeeded
+ON_FAILURE = "on-failure" # At least one of them failed (a repair fallback)
+ALWAYS = "always" # Once they are done, however they ended
+
+# Step states
+PENDING = "Pending"
+WAITING = "Retry wait"
+STEP_RUNNING = "Running"
+SUCCEEDED = "Succeeded"
+STEP_FAILED = "Failed"
+SKIPPED = "Skipped"
+STEP_CANCELLED = "Cancelled"
+FINAL_STATES = (SUCCEEDED, STEP_FAILED, SKIPPED, STEP_CANCELLED)
+
+# Seconds between a failed attempt and its retry.
+DEFAULT_RETRY_DELAY = 10.0
+
+
+class Step:
+    """One playbook step: a catalog command (by name, in the playbook's group)."""
+
+    def __init__(self, key, command_name, after=(), when=ON_SUCCESS, retries=0, retry_delay=DEFAULT_RETRY_DELAY,
+                 ok_exit_codes=(0,)):
+        self.key = key
+        self.command_name = command_name
+        self.after = tuple(after) # Keys of the steps this one waits for
+        self.when = when
+        self.retries = retries # Extra attempts after a failure or timeout
+        self.retry_delay = retry_delay
+        self.ok_exit_codes = tuple(ok_exit_codes)
+
+
+class Playbook:
+    """A named workflow for some groups (Windows versions / Linux distros)."""
+
+    def __init__(self, name, groups, description, steps):
+        self.name = name
+        self.groups = list(groups)
+        self.description = description
+        self.steps = list(steps)
+        keys = [step.key for step in self.steps]
+        for step in self.steps:
+            unknown = [key for key in step.after if key not in keys[:keys.index(step.key)]]
+            if unknown:
+                # Dependencies must be declared first, which also rules out cycles.
+                raise ValueError(f"{name}: step {step.key!r} comes after unknown or later step(s) {unknown}")
+
+    def entries(self, group):
+        """{step key: CatalogEntry} for a group; raises ValueError if a command is missing."""
+        entries = {}
+        for step in self.steps:
+            entry = CATALOG.find(group, step.command_name)
+            if entry is None:
+                raise ValueError(f"{self.name}: {group!r} has no command {step.command_name!r}")
+            entries[step.key] = entry
+        return entries
+
+
+# --- Declarations ---
+PLAYBOOKS = [
+    Playbook("Fix Packages", ["Ubuntu/Debian"],
+             "Finish interrupted installs, repair broken dependencies, then upgrade and clean up.", [
+        Step("configure", "Reconfigure All Packages"),
+        # Refreshing the package lists only takes the lists lock, so it runs alongside dpkg.
+        Step("lists", "Fix Missing Packages", retries=2),
+        Step("broken", "Fix Broken Packages", after=("configure", "lists"), when=ALWAYS),
+        Step("upgrade", "Update & Upgrade Packages", after=("broken",), retries=1),
+        Step("clean", "Clean APT Cache", after=("upgrade",)),
+        Step("inventory", "List Installed Packages", after=("clean",), when=ALWAYS),
+    ]),
+    Playbook("Fix Packages", ["Fedora/CentOS/RHEL"],
+             "Drop stale metadata, upgrade, and list the result.", [
+        Step("clean", "Clean DNF Cache"),
+        Step("upgrade", "Update & Upgrade Packages", after=("clean",), when=ALWAYS, retries=1),
+        Step("inventory", "List Installed Packages", after=("upgrade",), when=ALWAYS),
+    ]),
+    Playbook("Fix Packages", ["Arch Linux"],
+             "Upgrade, clean the package cache, and list the result.", [
+        Step("upgrade", "Update & Upgrade Packages", retries=1),
+        Step("clean", "Clean Pacman Cache", after=("upgrade",)),
+        Step("inventory", "List Installed Packages", after=("clean",), when=ALWAYS),
+    ]),
+    Playbook("Fix Packages", ["OpenSUSE"],
+             "Clean the package cache, upgrade, and list the result.", [
+        Step("clean", "Clean Zypper Cache"),
+        Step("upgrade", "Update & Upgrade Packages", after=("clean",), when=ALWAYS, retries=1),
+        Step("inventory", "List Installed Packages", after=("upgrade",), when=ALWAYS),
+    ]),
+    Playbook("System Health", WINDOWS_VERSIONS[1:],
+             "Repair the component store (DISM), then system files (SFC), then the disk; "
+             "the network snapshot and health report run alongside.", [
+        Step("network", "View Network Config"),
+        Step("dns", "Flush DNS Cache"),
+        Step("report", "Check System Health"),
+        Step("dism", "Deployment Image Servicing and Management (DISM)", retries=1, retry_delay=30.0),
+        # SFC repairs from the component store DISM just fixed; it is still worth running if DISM failed.
+        Step("sfc", "System File Checker (SFC)", after=("dism",), when=ALWAYS),
+        Step("chkdsk", "Check Disk (C:)", after=("sfc",), when=ALWAYS),
+    ]),
+]
+
+
+def playbooks(group):
+    """The playbooks available for a group, in declaration order."""
+    return [playbook for playbook in PLAYBOOKS if group in playbook.groups]
+
+
+def find_playbook(group, name):
+    name = name.strip().lower()
+    return next((playbook for playbook in playbooks(group) if playbook.name.lower() == name), None)
+
+
+class StepRun:
+    """State of one step within a PlaybookRun."""
+
+    def __init__(self, step, entry):
+        self.step = step
+        self.entry = entry
+        self.state = PENDING
+        self.attempts = 0
+        self.job = None # Job of the current or last attempt
+        self.retry_at = None # time.monotonic() of the next attempt while WAITING
+
+
+class PlaybookRun:
+    """Runs a playbook on a JobManager.
+
+    The run is driven by whoever consumes the manager's events (the GUI drain loop or
+    the CLI): start() submits the first steps, job_finished() must be called for every
+    job that reached a final state, and poll() periodically for due retries. Each of them
+    returns the jobs it submitted, so the caller can show them. Not thread-safe; call it
+    from that one consumer thread.
+    """
+
+    def __init__(self, playbook, group, manager, timeout=None):
+        self.playbook = playbook
+        self.group = group
+        self.manager = manager
+        self.timeout = timeout # Per attempt
+        entries = playbook.entries(group)
+        self.steps = {step.key: StepRun(step, entries[step.key]) for step in playbook.steps}
+        self._by_job = {} # job id -> StepRun
+        self.started = None
+        self.ended = None
+        self.cancelled = False
+
+    @property
+    def done(self):
+        return all(step.state in FINAL_STATES for step in self.steps.values())
+
+    @property
+    def succeeded(self):
+        return self.done and all(step.state in (SUCCEEDED, SKIPPED) for step in self.steps.values()) \
+            and not self.cancelled
+
+    def owns(self, job):
+        return job.id in self._by_job
+
+    def step_for(self, job):
+        """The StepRun a job is an attempt of, or None."""
+        return self._by_job.get(job.id)
+
+    def start(self):
+        self.started = time.monotonic()
+        return self._advance()
+
+    def job_finished(self, job):
+        """Records a finished attempt and starts whatever became ready."""
+        step = self._by_job.get(job.id)
+        if step is None or step.job is not job or step.state != STEP_RUNNING:
+            return []
+        if job.state == CANCELLED or self.cancelled:
+            step.state = STEP_CANCELLED
+        elif job.returncode in step.step.ok_exit_codes:
+            step.state = SUCCEEDED
+        elif step.attempts <= step.step.retries:
+            step.state = WAITING
+            step.retry_at = time.monotonic() + step.step.retry_delay
+        else:
+            step.state = STEP_FAILED
+        return self._advance()
+
+    def poll(self):
+        """Starts retries that are due."""
+        now = time.monotonic()
+        jobs = []
+        for step in self.steps.values():
+            if step.state == WAITING and now >= step.retry_at:
+                jobs.append(self._submit(step))
+        return jobs
+
+    def cancel(self):
+        """Cancels running steps and skips everything not started yet."""
+        self.cancelled = True
+        for step in self.steps.values():
+            if step.state == STEP_RUNNING:
+                self.manager.cancel(step.job)
+            elif step.state in (PENDING, WAITING):
+                step.state = STEP_CANCELLED
+        self._check_done()
+
+    def _submit(self, step):
+        entry = step.entry
+        step.attempts += 1
+        step.state = STEP_RUNNING
+        step.retry_at = None
+        name = entry.name if step.attempts == 1 else f"{entry.name} (attempt {step.attempts})"
+        step.job = self.manager.submit(name, entry.command, timeout=self.timeout,
+                                       launches_gui=entry.launches_gui and entry.runs_natively, probe=entry.native_probe)
+        self._by_job[step.job.id] = step
+        return step.job
+
+    def _advance(self):
+        """Submits every pending step whose dependencies are done, and skips the ones whose condition failed."""
+        jobs = []
+        changed = True
+        while changed and not self.cancelled:
+            changed = False
+            for step in self.steps.values():
+                if step.state != PENDING:
+                    continue
+                dependencies = [self.steps[key] for key in step.step.after]
+                if any(dependency.state not in FINAL_STATES for dependency in dependencies):
+                    continue
+                all_ok = all(dependency.state == SUCCEEDED for dependency in dependencies)
+                if step.step.when == ALWAYS or (step.step.when == ON_SUCCESS) == all_ok:
+                    jobs.append(self._submit(step))
+                else:
+                    step.state = SKIPPED
+                    changed = True # Steps after this one may be decided now
+        self._check_done()
+        return jobs
+
+    def _check_done(self):
+        if self.done and self.ended is None:
+            self.ended = time.monotonic()
+
+    @property
+    def runtime(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.monotonic()) - self.started
+
+    def progress(self):
+        """One-line progress summary, e.g. '3/6 steps done, running: SFC, ...'."""
+        finished = [step for step in self.steps.values() if step.state in FINAL_STATES]
+        failed = sum(1 for step in finished if step.state == STEP_FAILED)
+        running = [step.entry.name for step in self.steps.values() if step.state == STEP_RUNNING]
+        waiting = sum(1 for step in self.steps.values() if step.state == WAITING)
+        text = f"{self.playbook.name}: {len(finished)}/{len(self.steps)} steps done"
+        if failed:
+            text += f", {failed} failed"
+        if running:
+            text += f", running: {', '.join(running)}"
+        if waiting:
+            text += f", {waiting} waiting to retry"
+        if self.done:
+            text += f" ({'succeeded' if self.succeeded else 'cancelled' if self.cancelled else 'with failures'}, " \
+                    f"{self.runtime:.1f}s)"
+        return text
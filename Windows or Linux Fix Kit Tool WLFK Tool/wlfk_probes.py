@@ -0,0 +1,285 @@
+# Native Linux probes: read /proc, /sys and statvfs() directly instead of forking
+# 'top | grep | sed | awk', 'free', 'uptime', 'df' or 'lscpu'. Each probe returns the
+# same text the command it replaces would print. This module must not import tkinter.
+import math
+import os
+import platform
+import struct
+import sys
+import threading
+import time
+
+# Interval between the two /proc/stat samples of cpu_usage().
+CPU_SAMPLE_SECONDS = 0.25
+# A previous sample younger than this is too short a window; older than the limit it is stale.
+CPU_SAMPLE_MIN_AGE = 0.1
+CPU_SAMPLE_MAX_AGE = 5.0
+# Where login sessions are recorded, and the size of one 'struct utmp' record on Linux.
+UTMP_PATH = "/var/run/utmp"
+UTMP_RECORD_SIZE = 384
+UTMP_USER_PROCESS = 7
+
+# Pseudo filesystems that df leaves out.
+_DUMMY_FILESYSTEMS = {
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs", "devpts", "fusectl",
+    "hugetlbfs", "mqueue", "nsfs", "proc", "pstore", "rpc_pipefs", "securityfs", "sysfs", "tracefs",
+}
+
+
+def read_cpu_times():
+    """Returns (busy, total) jiffies of the aggregate 'cpu' line of /proc/stat."""
+    with open("/proc/stat") as stat:
+        fields = [int(value) for value in stat.readline().split()[1:9]]
+    # user nice system idle iowait irq softirq steal; like top's 'id', idle excludes iowait.
+    total = sum(fields)
+    return total - fields[3], total
+
+
+_cpu_lock = threading.Lock()
+_last_cpu_sample = None # (monotonic time, busy, total) of the previous cpu_usage() call
+
+
+def cpu_usage():
+    """Percentage of CPU time spent busy, measured over the last CPU_SAMPLE_SECONDS or so.
+
+    top -bn1 reports its first iteration, which averages over the whole uptime; this
+    compares two /proc/stat samples instead. A recent enough sample from the previous
+    call is reused as the first one so repeated checks don't have to wait.
+    """
+    global _last_cpu_sample
+    with _cpu_lock:
+        now = time.monotonic()
+        previous = _last_cpu_sample
+        if previous is None or not CPU_SAMPLE_MIN_AGE <= now - previous[0] <= CPU_SAMPLE_MAX_AGE:
+            busy, total = read_cpu_times()
+            time.sleep(CPU_SAMPLE_SECONDS)
+            previous = (now, busy, total)
+        busy, total = read_cpu_times()
+        _last_cpu_sample = (time.monotonic(), busy, total)
+    elapsed = total - previous[2]
+    usage = 100.0 * (busy - previous[1]) / elapsed if elapsed > 0 else 0.0
+    return "%g\n" % round(usage, 1)
+
+
+def read_meminfo():
+    """Returns /proc/meminfo as {field: kB}."""
+    info = {}
+    with open("/proc/meminfo") as meminfo:
+        for line in meminfo:
+            key, _, value = line.partition(":")
+            info[key] = int(value.split()[0])
+    return info
+
+
+def free_size(kib):
+    """Formats kB the way 'free -h' does: 4 significant characters at most, e.g. 5.9Gi, 443Mi, 0B."""
+    size = kib * 1024
+    if size < 1000:
+        return f"{size}B"
+    for power, unit in enumerate("KMGTPE", 1):
+        scaled = size / 1024 ** power
+        for text in (f"{scaled:.1f}{unit}i", f"{int(scaled)}{unit}i"):
+            if len(text) <= 5:
+                return text
+    return f"{int(scaled)}Ei"
+
+
+def memory_usage():
+    """Same table as 'free -h' (procps-ng 4: used = total - available)."""
+    info = read_meminfo()
+    total = info["MemTotal"]
+    free = info["MemFree"]
+    buff_cache = info.get("Buffers", 0) + info.get("Cached", 0) + info.get("SReclaimable", 0)
+    available = info.get("MemAvailable", free + buff_cache)
+    used = total - available if "MemAvailable" in info else total - free - buff_cache
+    swap_total = info.get("SwapTotal", 0)
+    swap_free = info.get("SwapFree", 0)
+
+    header = ("total", "used", "free", "shared", "buff/cache", "available")
+    lines = [" " * 8 + "".join(f"{column:>12}" for column in header)]
+    memory = (total, max(0, used), free, info.get("Shmem", 0), buff_cache, available)
+    lines.append(f"{'Mem:':<8}" + "".join(f"{free_size(value):>12}" for value in memory))
+    swap = (swap_total, swap_total - swap_free, swap_free)
+    lines.append(f"{'Swap:':<8}" + "".join(f"{free_size(value):>12}" for value in swap))
+    return "\n".join(lines) + "\n"
+
+
+def count_users():
+    """Number of login sessions recorded in utmp (0 if it can't be read)."""
+    try:
+        with open(UTMP_PATH, "rb") as utmp:
+            data = utmp.read()
+    except OSError:
+        return 0
+    users = 0
+    for offset in range(0, len(data) - UTMP_RECORD_SIZE + 1, UTMP_RECORD_SIZE):
+        # short ut_type, int ut_pid, char ut_line[32], char ut_id[4], char ut_user[32]
+        record_type, _, _, _, user = struct.unpack_from("hi32s4s32s", data, offset)
+        if record_type == UTMP_USER_PROCESS and user[:1] not in (b"", b"\0"):
+            users += 1
+    return users
+
+
+def uptime():
+    """Same line as 'uptime': time, time since boot, logged-in users and load averages."""
+    with open("/proc/uptime") as uptime_file:
+        seconds = int(float(uptime_file.read().split()[0]))
+    with open("/proc/loadavg") as loadavg:
+        load = [float(value) for value in loadavg.read().split()[:3]]
+
+    text = time.strftime(" %H:%M:%S up ")
+    days, minutes = divmod(seconds // 60, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        text += f"{days} {'days' if days != 1 else 'day'}, "
+    text += f"{hours:2d}:{minutes:02d}, " if hours else f"{minutes} min, "
+    users = count_users()
+    text += f"{users:2d} {'users' if users > 1 else 'user'},  "
+    text += "load average: {:.2f}, {:.2f}, {:.2f}".format(*load)
+    return text + "\n"
+
+
+def df_size(size):
+    """Formats bytes the way 'df -h' does: powers of 1024, rounded up, one decimal below 10."""
+    if size < 1024:
+        return str(size)
+    value = size
+    units = "KMGTPEZY"
+    for index, unit in enumerate(units):
+        value /= 1024
+        if value < 10:
+            tenths = math.ceil(value * 10)
+            if tenths < 100:
+                return f"{tenths / 10:.1f}{unit}"
+            value = 10.0
+        rounded = math.ceil(value)
+        if rounded < 1024 or index == len(units) - 1:
+            return f"{rounded}{unit}"
+    return str(size)
+
+
+def _unescape_mount_field(field):
+    # /proc/mounts writes spaces, tabs, newlines and backslashes as octal escapes.
+    for escaped, char in (("\\040", " "), ("\\011", "\t"), ("\\012", "\n"), ("\\134", "\\")):
+        field = field.replace(escaped, char)
+    return field
+
+
+def disk_usage():
+    """Same table as 'df -h' for every mounted filesystem (pseudo filesystems left out)."""
+    mounts = {} # st_dev -> (source, mount point, statvfs); a device mounted twice is listed once
+    with open("/proc/mounts") as mount_table:
+        for line in mount_table:
+            fields = line.split()
+            if len(fields) < 3 or fields[2] in _DUMMY_FILESYSTEMS:
+                continue
+            source, target = _unescape_mount_field(fields[0]), _unescape_mount_field(fields[1])
+            try:
+                stats = os.statvfs(target)
+                device = os.stat(target).st_dev
+            except OSError:
+                continue
+            if stats.f_blocks == 0:
+                continue
+            # Like df, prefer the shortest mount point for a device (e.g. '/' over a bind mount).
+            if device not in mounts or len(target) < len(mounts[device][1]):
+                mounts[device] = (source, target, stats)
+
+    rows = [("Filesystem", "Size", "Used", "Avail", "Use%", "Mounted on")]
+    for source, target, stats in mounts.values():
+        size = stats.f_blocks * stats.f_frsize
+        used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+        available = stats.f_bavail * stats.f_frsize
+        usable = used + available
+        percent = f"{math.ceil(100 * used / usable)}%" if usable else "-"
+        rows.append((source, df_size(size), df_size(used), df_size(available), percent, target))
+
+    # Minimum column widths are those of df itself.
+    widths = [max([minimum] + [len(row[column]) for row in rows]) for column, minimum in enumerate((14, 5, 5, 5, 4))]
+    lines = []
+    for row in rows:
+        cells = [row[0].ljust(widths[0])] + [value.rjust(width) for value, width in zip(row[1:5], widths[1:])]
+        lines.append(" ".join(cells + [row[5]]))
+    return "\n".join(lines) + "\n"
+
+
+def _read_sys(path):
+    try:
+        with open(path) as sys_file:
+            return sys_file.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_info():
+    """lscpu-style summary built from /proc/cpuinfo and /sys/devices/system/cpu."""
+    processors = []
+    with open("/proc/cpuinfo") as cpuinfo:
+        current = {}
+        for line in cpuinfo:
+            key, separator, value = line.partition(":")
+            if not separator:
+                if current:
+                    processors.append(current)
+                current = {}
+                continue
+            current[key.strip()] = value.strip()
+        if current:
+            processors.append(current)
+    first = processors[0] if processors else {}
+
+    rows = [("Architecture", platform.machine())]
+    flags = first.get("flags", "").split()
+    if "lm" in flags:
+        rows.append(("CPU op-mode(s)", "32-bit, 64-bit"))
+    rows.append(("Address sizes", first.get("address sizes")))
+    rows.append(("Byte Order", "Little Endian" if sys.byteorder == "little" else "Big Endian"))
+    rows.append(("CPU(s)", str(len(processors) or os.cpu_count() or 1)))
+    rows.append(("On-line CPU(s) list", _read_sys("/sys/devices/system/cpu/online")))
+    rows.append(("Vendor ID", first.get("vendor_id")))
+    rows.append(("Model name", first.get("model name")))
+    rows.append(("CPU family", first.get("cpu family")))
+    rows.append(("Model", first.get("model")))
+    if "cpu cores" in first and "siblings" in first:
+        cores = int(first["cpu cores"]) or 1
+        rows.append(("Thread(s) per core", str(max(1, int(first["siblings"]) // cores))))
+        rows.append(("Core(s) per socket", str(cores)))
+        rows.append(("Socket(s)", str(len({cpu.get("physical id") for cpu in processors}))))
+    rows.append(("Stepping", first.get("stepping")))
+    rows.append(("BogoMIPS", first.get("bogomips") or first.get("BogoMIPS")))
+    rows.append(("Flags", first.get("flags") or first.get("Features")))
+
+    vulnerabilities_dir = "/sys/devices/system/cpu/vulnerabilities"
+    try:
+        vulnerabilities = sorted(os.listdir(vulnerabilities_dir))
+    except OSError:
+        vulnerabilities = []
+    for name in vulnerabilities:
+        label = name.replace("_", " ").capitalize()
+        status = _read_sys(os.path.join(vulnerabilities_dir, name)) or ""
+        # lscpu turns 'Mitigation: X; Y: Z' into 'Mitigation; X; Y Z'.
+        head, separator, rest = status.partition(":")
+        rows.append((f"Vulnerability {label}", head + (";" if separator else "") + rest.replace(":", "")))
+
+    rows = [(key + ":", value) for key, value in rows if value]
+    width = max(len(key) for key, _ in rows)
+    return "".join(f"{key:<{width}} {value}\n" for key, value in rows)
+
+
+# Probe names used by the catalog (CatalogEntry.probe) -> function.
+PROBES = {
+    "cpu-usage": cpu_usage,
+    "memory": memory_usage,
+    "uptime": uptime,
+    "disk-usage": disk_usage,
+    "cpu-info": cpu_info,
+}
+
+
+def run_probe(name):
+    """Runs a probe by name and returns its output. Raises OSError if /proc or /sys can't be read."""
+    try:
+        return PROBES[name]()
+    except (KeyError, IndexError, ValueError) as e:
+        # Unexpected /proc layout: let the caller fall back to the real command.
+        raise OSError(f"probe {name!r} failed: {e!r}") from e
@@ -0,0 +1,178 @@
+# Background sampler behind the live monitor: one thread reads /proc/stat, /proc/meminfo,
+# /proc/diskstats and /proc/net/dev on an interval and keeps a fixed-size history per
+# metric. Linux only. This module must not import tkinter.
+import os
+import threading
+import time
+from array import array
+
+# Seconds between samples, and how many samples of history are kept per metric.
+DEFAULT_INTERVAL = 1.0
+DEFAULT_HISTORY = 120
+# /proc/diskstats counts 512-byte sectors regardless of the device's block size.
+SECTOR_SIZE = 512
+
+# Metrics, in display order: CPU busy %, memory used %, then bytes per second.
+CPU = "cpu"
+MEMORY = "memory"
+DISK_READ = "disk_read"
+DISK_WRITE = "disk_write"
+NET_RX = "net_rx"
+NET_TX = "net_tx"
+METRICS = (CPU, MEMORY, DISK_READ, DISK_WRITE, NET_RX, NET_TX)
+
+
+def _whole_disks():
+    """Block devices that are whole disks (partitions would count the same I/O twice)."""
+    try:
+        names = os.listdir("/sys/block")
+    except OSError:
+        return None # Count every line of /proc/diskstats instead
+    return {name for name in names if not name.startswith(("loop", "ram", "zram"))}
+
+
+class SystemSampler:
+    """Samples system-wide CPU, memory, disk and network activity on a background thread.
+
+    History is kept in one preallocated array('d') per metric used as a ring buffer,
+    so memory use is fixed and a sample costs a handful of stores. `sequence` goes up
+    by one per sample; readers compare it to see whether anything changed.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, history=DEFAULT_HISTORY):
+        self.interval = interval
+        self.size = max(2, history)
+        self._history = {metric: array("d", bytes(8 * self.size)) for metric in METRICS}
+        self._next = 0 # Ring index the next sample is written to
+        self.count = 0 # Samples held, up to size
+        self.sequence = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._files = {}
+        self._disks = _whole_disks()
+        self._previous = None # Counters of the previous sample: (time, cpu busy, cpu total, disk, net)
+        self._started = None
+        self._cpu_seconds = 0.0 # CPU time the sampler thread has used
+
+    # --- Control ---
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="wlfk-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the thread (within one interval) and closes the /proc files."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(self.interval + 1)
+        self._thread = None
+
+    # --- Reading ---
+
+    def history(self, metric):
+        """Returns a metric's samples, oldest first."""
+        with self._lock:
+            values = self._history[metric]
+            if self.count < self.size:
+                return values[:self.count].tolist()
+            return (values[self._next:] + values[:self._next]).tolist()
+
+    def latest(self, metric):
+        """Returns a metric's newest sample, or None before the first one."""
+        with self._lock:
+            if not self.count:
+                return None
+            return self._history[metric][self._next - 1]
+
+    def overhead_percent(self):
+        """CPU time used by the sampler thread as a percentage of one core, since start()."""
+        if self._started is None:
+            return 0.0
+        elapsed = time.monotonic() - self._started
+        return 100.0 * self._cpu_seconds / elapsed if elapsed > 0 else 0.0
+
+    # --- Sampling ---
+
+    def _loop(self):
+        self._started = time.monotonic()
+        self._cpu_seconds = 0.0
+        thread_start = time.thread_time()
+        self._previous = None
+        try:
+            while True:
+                self._sample()
+                self._cpu_seconds = time.thread_time() - thread_start
+                if self._stop_event.wait(self.interval):
+                    break
+        finally:
+            for proc_file in self._files.values():
+                proc_file.close()
+            self._files = {}
+
+    def _read(self, path):
+        # The /proc files stay open between samples; seeking back re-reads them.
+        proc_file = self._files.get(path)
+        if proc_file is None:
+            proc_file = self._files[path] = open(path, "rb")
+        proc_file.seek(0)
+        return proc_file.read()
+
+    def _sample(self):
+        now = time.monotonic()
+        cpu = self._read("/proc/stat")
+        cpu = [int(value) for value in cpu[:cpu.index(b"\n")].split()[1:9]]
+        cpu_total = sum(cpu)
+        cpu_busy = cpu_total - cpu[3]
+
+        memory = {}
+        for line in self._read("/proc/meminfo").splitlines():
+            key, _, value = line.partition(b":")
+            if key in (b"MemTotal", b"MemAvailable", b"MemFree"):
+                memory[key] = int(value.split()[0])
+        available = memory.get(b"MemAvailable", memory.get(b"MemFree", 0))
+        memory_percent = 100.0 * (1 - available / memory[b"MemTotal"]) if memory.get(b"MemTotal") else 0.0
+
+        disk_read = disk_write = 0
+        for line in self._read("/proc/diskstats").splitlines():
+            fields = line.split()
+            if len(fields) >= 10 and (self._disks is None or fields[2].decode() in self._disks):
+                disk_read += int(fields[5])
+                disk_write += int(fields[9])
+
+        net_rx = net_tx = 0
+        for line in self._read("/proc/net/dev").splitlines()[2:]:
+            interface, _, counters = line.partition(b":")
+            if interface.strip() != b"lo":
+                counters = counters.split()
+                net_rx += int(counters[0])
+                net_tx += int(counters[8])
+
+        current = (now, cpu_busy, cpu_total, disk_read, disk_write, net_rx, net_tx)
+        previous, self._previous = self._previous, current
+        if previous is None:
+            return # Rates need two samples
+        elapsed = now - previous[0]
+        cpu_elapsed = cpu_total - previous[2]
+        values = (
+            100.0 * (cpu_busy - previous[1]) / cpu_elapsed if cpu_elapsed > 0 else 0.0,
+            memory_percent,
+            # Counters can go backwards when a device or interface disappears.
+            max(0, disk_read - previous[3]) * SECTOR_SIZE / elapsed,
+            max(0, disk_write - previous[4]) * SECTOR_SIZE / elapsed,
+            max(0, net_rx - previous[5]) / elapsed,
+            max(0, net_tx - previous[6]) / elapsed,
+        )
+        with self._lock:
+            for metric, value in zip(METRICS, values):
+                self._history[metric][self._next] = value
+            self._next = (self._next + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+            self.sequence += 1
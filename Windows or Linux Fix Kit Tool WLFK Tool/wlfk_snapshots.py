@@ -0,0 +1,346 @@
+# Snapshots of inventory command output (installed packages, running services, listening
+# sockets, partitions, ...) for drift detection: "what changed since last week?".
+# Each output is normalized first (package lists become sorted name/version pairs, lists
+# of services and sockets sorted sets of lines), then stored once per content hash; a
+# snapshot that didn't change costs one index line referencing the hash it already has.
+# This module must not import tkinter.
+import hashlib
+import json
+import os
+import platform
+import re
+import threading
+import time
+import zlib
+
+from wlfk_cache import default_cache_dir
+from wlfk_parsers import PARSERS
+
+INDEX_FILE = "snapshots.jsonl"
+
+# How two snapshots are compared.
+KEYED = "keyed" # Sorted key/value pairs (package -> version): added, removed and changed keys
+SETS = "set" # Sorted set of lines, order doesn't matter: added and removed lines
+LINES = "lines" # Ordered text: inserted, deleted and replaced blocks of lines
+
+# Decompressed objects kept in memory (diffing one command's snapshots reads the same ones again).
+MEMORY_OBJECTS = 16
+
+
+def _dpkg_item(row):
+    status, name, version = row[0], row[1], row[2]
+    return name, version if status == "ii" else f"{version} [{status}]"
+
+
+def _rpm_item(row):
+    name, version, release, arch = row
+    return (f"{name}.{arch}" if arch else name), f"{version}-{release}"
+
+
+def _pacman_item(row):
+    return row[0], row[1]
+
+
+# Parser table name -> function turning a parsed row into a (key, value) pair.
+KEYED_ITEMS = {
+    "dpkg": _dpkg_item,
+    "rpm": _rpm_item,
+    "pacman": _pacman_item,
+}
+
+
+def _netstat_line(row):
+    # Queue sizes and PIDs change on every run; the program listening on an address doesn't.
+    proto, _, _, local, foreign, state, program = row
+    return " ".join(field for field in (proto, local, foreign, state, program.partition("/")[2] or program) if field)
+
+
+def _process_line(row):
+    return f"{row[0]} {row[10]}" # USER COMMAND
+
+
+def _open_files_line(row):
+    return f"{row[0]} {row[2]} {row[4]} {row[8]}" # COMMAND USER TYPE NAME
+
+
+# Parser table name -> function turning a parsed row into the line kept in a set snapshot.
+SET_LINES = {
+    "netstat": _netstat_line,
+    "processes": _process_line,
+    "open-files": _open_files_line,
+}
+
+_SERVICE_PATTERN = re.compile(r"^\W*(\S+\.service)\s+(.*)$")
+
+
+def snapshot_mode(entry):
+    """KEYED, SETS or LINES for a catalog entry."""
+    if entry.table in KEYED_ITEMS:
+        return KEYED
+    if entry.table in SET_LINES or entry.category == "Services":
+        return SETS
+    return LINES
+
+
+def can_snapshot(entry):
+    """Read-only commands that exit on their own and don't open a window."""
+    return entry.read_only and not entry.follows and not entry.launches_gui
+
+
+def _parsed_rows(table, text):
+    parser = PARSERS[table]()
+    rows = (parser.parse(line) for line in text.split("\n"))
+    return [row for row in rows if row is not None]
+
+
+def normalize(entry, text):
+    """Turns a command's output into the sorted lines stored for its snapshot mode.
+
+    KEYED: 'key<TAB>value' lines sorted by key (a key listed twice, such as two installed
+    kernels, keeps its values joined). SETS: unique lines with runs of whitespace
+    collapsed, sorted. LINES: the lines in order, trailing whitespace removed.
+    """
+    lines = [line[line.rfind("\r") + 1:].rstrip() for line in text.split("\n")]
+    mode = snapshot_mode(entry)
+    if mode == KEYED:
+        items = {}
+        for row in _parsed_rows(entry.table, text):
+            key, value = KEYED_ITEMS[entry.table](row)
+            items.setdefault(key, []).append(str(value))
+        return [f"{key}\t{', '.join(sorted(values))}" for key, values in sorted(items.items())]
+    if mode == SETS:
+        if entry.table in SET_LINES:
+            lines = [SET_LINES[entry.table](row) for row in _parsed_rows(entry.table, text)]
+        else: # systemctl list-units: only the unit lines, not the legend around them
+            lines = [" ".join(match.groups()) for match in map(_SERVICE_PATTERN.match, lines) if match]
+        return sorted({" ".join(line.split()) for line in lines if line.strip()})
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def content_hash(lines):
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+class Snapshot:
+    """One entry of the snapshot index."""
+
+    def __init__(self, snapshot_id, group, name, command, host, taken, mode, digest, items, size):
+        self.id = snapshot_id
+        self.group = group
+        self.name = name
+        self.command = command
+        self.host = host
+        self.taken = taken # time.time()
+        self.mode = mode
+        self.hash = digest # Content hash of the normalized lines (the object file it references)
+        self.items = items # Number of normalized lines
+        self.size = size # Bytes of the normalized text
+
+
+class SnapshotDiff:
+    """What changed between two snapshots of one command.
+
+    added/removed are lines (KEYED: (key, value) pairs); changed is
+    [(key, old value, new value)] for KEYED and [(old lines, new lines)] for LINES.
+    """
+
+    def __init__(self, mode, old, new, added=(), removed=(), changed=()):
+        self.mode = mode
+        self.old = old
+        self.new = new
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+
+    @property
+    def unchanged(self):
+        return not (self.added or self.removed or self.changed)
+
+    def summary(self):
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+    def report(self, limit=None):
+        """The diff as text lines: '+ added', '- removed', '~ key: old -> new'; at most limit per kind."""
+        lines = []
+        if self.mode == KEYED:
+            groups = ([f"+ {key} {value}" for key, value in self.added], [f"- {key} {value}" for key, value in self.removed],
+                      [f"~ {key}: {old} -> {new}" for key, old, new in self.changed])
+        elif self.mode == SETS:
+            groups = ([f"+ {line}" for line in self.added], [f"- {line}" for line in self.removed], [])
+        else:
+            changed = []
+            for old_lines, new_lines in self.changed:
+                changed.extend(f"~ - {line}" for line in old_lines)
+                changed.extend(f"~ + {line}" for line in new_lines)
+            groups = ([f"+ {line}" for line in self.added], [f"- {line}" for line in self.removed], changed)
+        for group in groups:
+            lines.extend(group[:limit])
+            if limit is not None and len(group) > limit:
+                lines.append(f"  ... {len(group) - limit} more")
+        return lines
+
+
+def _merge(old, new, key=lambda item: item):
+    """Walks two lists sorted by key once; yields (old item or None, new item or None) for
+    every item missing from either side or different on both."""
+    i = j = 0
+    while i < len(old) or j < len(new):
+        if j == len(new) or (i < len(old) and key(old[i]) < key(new[j])):
+            yield old[i], None
+            i += 1
+        elif i == len(old) or key(new[j]) < key(old[i]):
+            yield None, new[j]
+            j += 1
+        else:
+            if old[i] != new[j]:
+                yield old[i], new[j]
+            i += 1
+            j += 1
+
+
+def diff_snapshot_lines(mode, old_lines, new_lines, old=None, new=None):
+    """SnapshotDiff between two lists of normalized lines."""
+    diff = SnapshotDiff(mode, old, new)
+    if old_lines == new_lines:
+        return diff
+    if mode == KEYED:
+        old_items = [tuple(line.split("\t", 1)) for line in old_lines]
+        new_items = [tuple(line.split("\t", 1)) for line in new_lines]
+        for before, after in _merge(old_items, new_items, key=lambda item: item[0]):
+            if before is None:
+                diff.added.append(after)
+            elif after is None:
+                diff.removed.append(before)
+            else:
+                diff.changed.append((before[0], before[1], after[1]))
+    elif mode == SETS:
+        for before, after in _merge(old_lines, new_lines):
+            (diff.added if before is None else diff.removed).append(after if before is None else before)
+    else:
+        from wlfk_watch import diff_lines
+        for tag, i1, i2, j1, j2 in diff_lines(old_lines, new_lines):
+            if tag == "insert":
+                diff.added.extend(new_lines[j1:j2])
+            elif tag == "delete":
+                diff.removed.extend(old_lines[i1:i2])
+            else:
+                diff.changed.append((old_lines[i1:i2], new_lines[j1:j2]))
+    return diff
+
+
+class SnapshotStore:
+    """Snapshots on disk: a JSON Lines index plus one zlib-compressed object per distinct content.
+
+    Objects are named after their content hash (objects/ab/cdef...), so identical outputs,
+    whatever command or day they came from, are stored once.
+    """
+
+    def __init__(self, directory=None, host=None):
+        self.directory = directory or os.path.join(default_cache_dir(), "snapshots")
+        self.host = host or platform.node()
+        self._memory = {} # hash -> lines, the last MEMORY_OBJECTS objects read
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest[2:])
+
+    def take(self, group, entry, text):
+        """Normalizes a command's output and adds it as a snapshot. Returns the Snapshot."""
+        lines = normalize(entry, text)
+        digest = content_hash(lines)
+        path = self.object_path(digest)
+        data = "\n".join(lines).encode("utf-8")
+        if not os.path.exists(path): # Unchanged content is already there: only the index grows
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as object_file:
+                object_file.write(zlib.compress(data, 6))
+            os.replace(path + ".tmp", path)
+        with self._lock:
+            self._ids += 1
+            snapshot_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._ids}"
+            self._remember(digest, lines)
+        snapshot = Snapshot(snapshot_id, group, entry.name, entry.command, self.host, time.time(),
+                            snapshot_mode(entry), digest, len(lines), len(data))
+        with self._lock:
+            with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as index_file:
+                index_file.write(json.dumps(vars(snapshot)) + "\n")
+        return snapshot
+
+    def snapshots(self, group=None, name=None):
+        """Snapshots (of one group and/or command name if given), oldest first."""
+        snapshots = []
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as index_file:
+                for line in index_file:
+                    try:
+                        record = json.loads(line)
+                        snapshot = Snapshot(record["id"], record["group"], record["name"], record["command"],
+                                            record["host"], record["taken"], record["mode"], record["hash"],
+                                            record["items"], record["size"])
+                    except (ValueError, KeyError):
+                        continue # A line cut short by a crash
+                    if (group is None or snapshot.group == group) and (name is None or snapshot.name == name):
+                        snapshots.append(snapshot)
+        except OSError:
+            return []
+        return snapshots
+
+    def find(self, snapshot_id):
+        """The snapshot with this id (or the only one whose id starts with it), or None."""
+        matches = [snapshot for snapshot in self.snapshots() if snapshot.id.startswith(snapshot_id)]
+        exact = [snapshot for snapshot in matches if snapshot.id == snapshot_id]
+        return (exact or matches)[0] if len(exact or matches) == 1 else None
+
+    def previous(self, snapshot):
+        """The snapshot of the same command taken before this one, or None."""
+        earlier = None
+        for other in self.snapshots(snapshot.group, snapshot.name):
+            if other.id == snapshot.id:
+                return earlier
+            earlier = other
+        return None
+
+    def lines(self, snapshot):
+        """The normalized lines of a snapshot."""
+        with self._lock:
+            lines = self._memory.get(snapshot.hash)
+        if lines is None:
+            with open(self.object_path(snapshot.hash), "rb") as object_file:
+                text = zlib.decompress(object_file.read()).decode("utf-8")
+            lines = text.split("\n") if text else []
+            with self._lock:
+                self._remember(snapshot.hash, lines)
+        return lines
+
+    def diff(self, old, new):
+        """SnapshotDiff from snapshot old to snapshot new (of the same command)."""
+        if old.hash == new.hash:
+            return SnapshotDiff(new.mode, old, new) # Same content: nothing to read
+        return diff_snapshot_lines(new.mode, self.lines(old), self.lines(new), old, new)
+
+    def delete(self, snapshot_ids):
+        """Removes snapshots from the index and deletes the objects no snapshot references anymore."""
+        snapshot_ids = set(snapshot_ids)
+        with self._lock:
+            snapshots = self.snapshots()
+            kept = [snapshot for snapshot in snapshots if snapshot.id not in snapshot_ids]
+            path = os.path.join(self.directory, INDEX_FILE)
+            with open(path + ".tmp", "w", encoding="utf-8") as index_file:
+                for snapshot in kept:
+                    index_file.write(json.dumps(vars(snapshot)) + "\n")
+            os.replace(path + ".tmp", path)
+        referenced = {snapshot.hash for snapshot in kept}
+        for digest in {snapshot.hash for snapshot in snapshots} - referenced:
+            try:
+                os.remove(self.object_path(digest))
+            except OSError:
+                pass
+
+    def _remember(self, digest, lines):
+        self._memory.pop(digest, None)
+        self._memory[digest] = lines
+        while len(self._memory) > MEMORY_OBJECTS:
+            del self._memory[next(iter(self._memory))]
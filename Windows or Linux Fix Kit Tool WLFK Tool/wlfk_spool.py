@@ -0,0 +1,297 @@
+# Every run's output spooled to a log file as it streams, with an index of past runs.
+# Past runs are reopened through mmap with a sparse line index, so paging through a
+# 500 MB journal dump reads only the lines shown. This module must not import tkinter.
+import bisect
+import contextlib
+import gzip
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from array import array
+
+try:
+    import fcntl
+except ImportError: # Windows: the index is only locked between the threads of one process
+    fcntl = None
+
+from wlfk_cache import default_cache_dir
+
+# The line index stores, for every block of this many bytes, how many lines came before it.
+INDEX_BLOCK_SIZE = 64 * 1024
+# Oldest runs are deleted once there are more than this many, or they take more than this much space.
+DEFAULT_MAX_RUNS = 200
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+INDEX_FILE = "runs.jsonl"
+# Locked (fcntl.flock) by every process while it appends to or rewrites INDEX_FILE.
+LOCK_FILE = "runs.lock"
+
+
+def _count_blocks(data, base, lines, counts):
+    """Extends counts (newlines before each INDEX_BLOCK_SIZE boundary) with the boundaries
+    that fall inside data, which starts at file offset base after `lines` newlines."""
+    boundary = len(counts) * INDEX_BLOCK_SIZE
+    while boundary < base + len(data):
+        counts.append(lines + data.count(b"\n", 0, boundary - base))
+        boundary += INDEX_BLOCK_SIZE
+
+
+class SpooledRun:
+    """One entry of the run index."""
+
+    def __init__(self, run_id, name, command, started, state=None, exit_code=None, size=0, lines=0):
+        self.id = run_id
+        self.name = name
+        self.command = command
+        self.started = started # time.time()
+        self.state = state
+        self.exit_code = exit_code
+        self.size = size # Bytes of output
+        self.lines = lines # Completed lines
+
+
+class SpoolWriter:
+    """Appends one job's output to its log file (called from the job's reader threads)."""
+
+    def __init__(self, store, run):
+        self.store = store
+        self.run = run
+        self._file = open(store.log_path(run.id), "wb")
+        self._counts = array("Q", [0])
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        data = text.encode("utf-8", "replace")
+        with self._lock:
+            if self._file.closed:
+                return
+            _count_blocks(data, self.run.size, self.run.lines, self._counts)
+            self._file.write(data)
+            if self.store.flush_writes:
+                self._file.flush()
+            self.run.size += len(data)
+            self.run.lines += data.count(b"\n")
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self, state, exit_code):
+        """Finishes the log, writes its line index and adds the run to the index."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            self.run.state, self.run.exit_code = state, exit_code
+            try:
+                with open(self.store.index_path(self.run.id), "wb") as index_file:
+                    self._counts.tofile(index_file)
+            except OSError:
+                pass # Rebuilt from the log when the run is opened
+        self.store._add(self.run)
+
+
+class SpoolReader:
+    """Random access to the lines of a spooled run without reading the whole log.
+
+    The log is memory-mapped; the block index narrows the search for line n down to one
+    INDEX_BLOCK_SIZE block, which is then scanned for newlines.
+    """
+
+    def __init__(self, path, index_path=None):
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._counts = self._load_index(index_path)
+        tail = self._map[(len(self._counts) - 1) * INDEX_BLOCK_SIZE:]
+        self.newlines = self._counts[-1] + tail.count(b"\n")
+        self.partial = self.size > 0 and self._map[self.size - 1:self.size] != b"\n"
+
+    def _load_index(self, index_path):
+        counts = array("Q")
+        blocks = -(-self.size // INDEX_BLOCK_SIZE) or 1 # One count per block, as SpoolWriter writes them
+        if index_path is not None:
+            try:
+                with open(index_path, "rb") as index_file:
+                    counts.fromfile(index_file, blocks)
+                return counts
+            except (OSError, EOFError):
+                counts = array("Q")
+        # No (complete) index: count the newlines block by block.
+        counts.append(0)
+        lines = 0
+        for block in range(1, blocks):
+            lines += self._map[(block - 1) * INDEX_BLOCK_SIZE:block * INDEX_BLOCK_SIZE].count(b"\n")
+            counts.append(lines)
+        return counts
+
+    def __len__(self):
+        """Number of lines, counting an unfinished last line."""
+        return self.newlines + (1 if self.partial else 0)
+
+    def offset(self, line_number):
+        """File offset where a line starts."""
+        if line_number <= 0:
+            return 0
+        if line_number > self.newlines:
+            return self.size
+        block = bisect.bisect_left(self._counts, line_number) - 1
+        position = block * INDEX_BLOCK_SIZE
+        for _ in range(line_number - self._counts[block]):
+            position = self._map.find(b"\n", position) + 1
+        return position
+
+    def lines(self, start, stop):
+        """Lines[start:stop] as text (a carriage return redraw keeps only the redrawn text)."""
+        start, stop = max(0, start), min(len(self), stop)
+        if start >= stop:
+            return []
+        data = self._map[self.offset(start):self.offset(stop)]
+        lines = data.decode("utf-8", "replace").split("\n")
+        if data.endswith(b"\n"):
+            lines.pop()
+        return [line[line.rfind("\r") + 1:] for line in lines]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+class SpoolStore:
+    """Log files of past runs plus their index (runs.jsonl), in the per-user cache directory."""
+
+    def __init__(self, directory=None, max_runs=DEFAULT_MAX_RUNS, max_bytes=DEFAULT_MAX_BYTES, flush_writes=False):
+        self.directory = directory or os.path.join(default_cache_dir(), "runs")
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        # Write every chunk through to the log, for stores whose runs are read by another process while they stream.
+        self.flush_writes = flush_writes
+        self._writers = {} # run id -> SpoolWriter of runs still streaming
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def log_path(self, run_id):
+        return os.path.join(self.directory, f"{run_id}.log")
+
+    def index_path(self, run_id):
+        return os.path.join(self.directory, f"{run_id}.idx")
+
+    def open(self, name, command):
+        """Starts spooling a run; returns its SpoolWriter, or None if the directory isn't writable."""
+        with self._lock:
+            self._ids += 1
+            run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._ids}"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            writer = SpoolWriter(self, SpooledRun(run_id, name, command, time.time()))
+        except OSError:
+            return None
+        with self._lock:
+            self._writers[run_id] = writer
+        return writer
+
+    @contextlib.contextmanager
+    def _index_lock(self):
+        """Held while the index is appended to or rewritten, against other threads and other processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX) # Released when the file is closed
+                yield
+
+    def _add(self, run):
+        with self._lock:
+            self._writers.pop(run.id, None)
+        try:
+            # One short append per run, so runs finishing in other processes don't interleave.
+            with self._index_lock():
+                with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as index_file:
+                    index_file.write(json.dumps(vars(run)) + "\n")
+        except OSError:
+            return
+        self.prune()
+
+    def runs(self):
+        """Finished runs, newest first."""
+        runs = []
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as index_file:
+                for line in index_file:
+                    try:
+                        record = json.loads(line)
+                        runs.append(SpooledRun(record["id"], record["name"], record["command"], record["started"],
+                                               record.get("state"), record.get("exit_code"),
+                                               record.get("size", 0), record.get("lines", 0)))
+                    except (ValueError, KeyError):
+                        continue # A line cut short by a crash
+        except OSError:
+            return []
+        runs.reverse()
+        return runs
+
+    def open_reader(self, run_id):
+        """A SpoolReader for a run (finished or still streaming)."""
+        writer = self._writers.get(run_id)
+        if writer is not None:
+            writer.flush()
+        index_path = self.index_path(run_id) if writer is None else None
+        return SpoolReader(self.log_path(run_id), index_path)
+
+    def export(self, run_id, path):
+        """Copies a run's log to path, gzip-compressed if path ends in .gz. Returns the bytes written."""
+        writer = self._writers.get(run_id)
+        if writer is not None:
+            writer.flush() # Export what a running job has printed so far
+        with open(self.log_path(run_id), "rb") as source:
+            if path.endswith(".gz"):
+                with gzip.open(path, "wb") as destination:
+                    shutil.copyfileobj(source, destination, 1024 * 1024)
+            else:
+                with open(path, "wb") as destination:
+                    shutil.copyfileobj(source, destination, 1024 * 1024)
+        return os.path.getsize(path)
+
+    def delete(self, run_ids):
+        """Removes runs from the index and deletes their files."""
+        run_ids = set(run_ids)
+        try:
+            # Under the lock, so a run another process adds meanwhile isn't dropped by the rewrite.
+            with self._index_lock():
+                kept = [run for run in reversed(self.runs()) if run.id not in run_ids]
+                self._rewrite_index(kept)
+        except OSError:
+            return
+        for run_id in run_ids:
+            for path in (self.log_path(run_id), self.index_path(run_id)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def prune(self):
+        """Deletes the oldest runs beyond max_runs / max_bytes."""
+        runs = self.runs()
+        total = 0
+        expired = []
+        for count, run in enumerate(runs, 1):
+            total += run.size
+            if count > self.max_runs or total > self.max_bytes:
+                expired.append(run.id)
+        if expired:
+            self.delete(expired)
+
+    def _rewrite_index(self, runs):
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as index_file:
+                for run in runs:
+                    index_file.write(json.dumps(vars(run)) + "\n")
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
@@ -0,0 +1,410 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from wlfk_dirsize import format_size
+from wlfk_parsers import TableBuilder, TEXT
+
+# How often the view checks its TableBuilder for new rows.
+TABLE_POLL_MS = 200
+# Default pixel width of a column; the last column takes the remaining space.
+COLUMN_WIDTH = 110
+
+
+class TableView(ttk.Frame):
+    """Sortable, filterable table of parsed command output.
+
+    Virtualized: the Treeview only ever holds as many items as fit on screen; scrolling,
+    sorting and filtering rewrite those items' values from `order`, the list of row
+    indices currently shown. Rows are parsed on the TableBuilder's worker thread, or
+    arrive already parsed from the job worker process (builder, a wlfk_worker.RemoteTable).
+    """
+
+    def __init__(self, master, table, builder=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.table = table
+        self.builder = builder if builder is not None else TableBuilder(table)
+        self.columns = self.builder.columns
+        self.order = [] # Indices into builder.rows in display order (sorted and filtered)
+        self.top = 0
+        self.rows = 20 # Treeview items materialized, refreshed on <Configure>
+        self.sort_column = None
+        self.sort_descending = False
+        self._seen_version = -1
+        self._seen_rows = 0
+        self._poll_id = None
+        self.filter_var = tk.StringVar()
+
+        bar = ttk.Frame(self)
+        ttk.Label(bar, text="Filter:").pack(side=tk.LEFT)
+        ttk.Entry(bar, textvariable=self.filter_var, width=30).pack(side=tk.LEFT, padx=(4, 8))
+        self.status = ttk.Label(bar, text="Parsing...")
+        self.status.pack(side=tk.LEFT)
+        self.filter_var.trace_add("write", lambda *args: self._rebuild_order())
+
+        names = [f"c{index}" for index in range(len(self.columns))]
+        self.tree = ttk.Treeview(self, columns=names, show="headings", selectmode="browse")
+        for index, (name, (heading, kind)) in enumerate(zip(names, self.columns)):
+            self.tree.heading(name, text=heading, command=lambda column=index: self.sort_by(column))
+            last = index == len(self.columns) - 1
+            self.tree.column(name, width=COLUMN_WIDTH * (3 if last else 1), stretch=last,
+                             anchor=tk.W if kind == TEXT else tk.E)
+        self.vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.hbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.config(xscrollcommand=self.hbar.set)
+
+        bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 4))
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        self.vbar.grid(row=1, column=1, sticky="ns")
+        self.hbar.grid(row=2, column=0, sticky="ew")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", lambda event: self._scroll_by(-3 if event.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda event: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self._scroll_by(3))
+        self.tree.bind("<Prior>", lambda event: self._scroll_by(-self.rows))
+        self.tree.bind("<Next>", lambda event: self._scroll_by(self.rows))
+        self._poll_id = self.after(TABLE_POLL_MS, self._poll)
+
+    # --- Public API ---
+
+    def feed(self, text):
+        """Passes command output on to the parser thread."""
+        self.builder.feed(text)
+
+    def finish(self):
+        self.builder.finish()
+
+    def sort_by(self, column):
+        """Sorts by a column; clicking the same heading again reverses the order."""
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column, self.sort_descending = column, False
+        for index, (heading, _) in enumerate(self.columns):
+            arrow = (" ▼" if self.sort_descending else " ▲") if index == column else ""
+            self.tree.heading(f"c{index}", text=heading + arrow)
+        self._rebuild_order()
+
+    def yview(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.order)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self._scroll_by(amount * self.rows if args[2] == "pages" else amount)
+
+    def destroy(self):
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+        super().destroy()
+
+    # --- Ordering ---
+
+    def _poll(self):
+        self._poll_id = self.after(TABLE_POLL_MS, self._poll)
+        if self.builder.version == self._seen_version:
+            return
+        self._seen_version = self.builder.version
+        count = len(self.builder.rows)
+        if self.sort_column is None and not self.filter_var.get():
+            # Unsorted and unfiltered: new rows simply go to the end.
+            self.order.extend(range(self._seen_rows, count))
+            self._seen_rows = count
+            self._render()
+        else:
+            self._rebuild_order()
+        self._update_status()
+
+    def _rebuild_order(self):
+        """Recomputes the shown rows from all parsed rows (filter, then sort)."""
+        rows = self.builder.rows
+        count = len(rows)
+        self._seen_rows = count
+        query = self.filter_var.get().strip().lower()
+        if query:
+            search_text = self.builder.search_text
+            order = [index for index in range(count) if query in search_text[index]]
+        else:
+            order = list(range(count))
+        if self.sort_column is not None:
+            column = self.sort_column
+            if self.columns[column][1] == TEXT:
+                key = lambda index: rows[index][column].lower()
+            else:
+                key = lambda index: rows[index][column]
+            order.sort(key=key, reverse=self.sort_descending)
+        self.order = order
+        self._render()
+        self._update_status()
+
+    def _update_status(self):
+        total = len(self.builder.rows)
+        shown = f"{len(self.order)} of {total} rows" if len(self.order) != total else f"{total} rows"
+        self.status.config(text=shown + ("" if self.builder.finished else " (parsing...)"))
+
+    # --- Scrolling and rendering ---
+
+    def _scroll_by(self, rows):
+        self._scroll_to(self.top + rows)
+        return "break"
+
+    def _scroll_to(self, top):
+        self.top = min(max(0, top), max(0, len(self.order) - self.rows))
+        self._render()
+
+    def _on_configure(self, event):
+        row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        # The headings take about one row.
+        rows = max(1, event.height // row_height - 1)
+        if rows != self.rows:
+            self.rows = rows
+            self._render()
+
+    def _render(self):
+        """Writes the visible slice of `order` into the fixed set of Treeview items."""
+        if not self.winfo_exists():
+            return
+        total = len(self.order)
+        self.top = min(self.top, max(0, total - self.rows))
+        visible = self.order[self.top:self.top + self.rows]
+        items = self.tree.get_children()
+        rows = self.builder.rows
+        for slot, index in enumerate(visible):
+            values = [str(cell) for cell in rows[index]]
+            if slot < len(items):
+                self.tree.item(items[slot], values=values)
+            else:
+                self.tree.insert("", tk.END, values=values)
+        if len(items) > len(visible):
+            self.tree.delete(*items[len(visible):])
+        if total:
+            self.vbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+        else:
+            self.vbar.set(0.0, 1.0)
+
+
+# Aggregated rows a JournalView shows at most (the most frequent / recent / severe ones).
+JOURNAL_VIEW_ROWS = 1000
+# Row colours by priority: emerg..err, warning
+JOURNAL_ERROR_COLOR = '#ff6b6b'
+JOURNAL_WARNING_COLOR = '#ffb74d'
+
+
+class JournalView(ttk.Frame):
+    """Aggregated journal messages of a wlfk_journal.JournalAnalyzer: one row per distinct
+    message with its count and rate, refreshed from the analyzer while records stream in.
+
+    Only the analyzer's aggregate is ever rendered, so a flood of repeats costs a count
+    update, not a console line. The priority and search filters apply to the aggregate.
+    """
+
+    def __init__(self, master, analyzer, **kwargs):
+        from wlfk_journal import PRIORITIES, RATE_WINDOW
+        super().__init__(master, **kwargs)
+        self.analyzer = analyzer
+        self._priorities = PRIORITIES
+        self._seen_version = -1
+        self._poll_id = None
+        self.priority_var = tk.StringVar(value="all")
+        self.search_var = tk.StringVar()
+        self.sort_var = tk.StringVar(value="count")
+
+        bar = ttk.Frame(self)
+        ttk.Label(bar, text="Priority up to:").pack(side=tk.LEFT)
+        ttk.Combobox(bar, textvariable=self.priority_var, values=("all",) + PRIORITIES, state="readonly",
+                     width=8).pack(side=tk.LEFT, padx=(4, 8))
+        ttk.Label(bar, text="Unit/message:").pack(side=tk.LEFT)
+        ttk.Entry(bar, textvariable=self.search_var, width=24).pack(side=tk.LEFT, padx=(4, 8))
+        ttk.Label(bar, text="Sort by:").pack(side=tk.LEFT)
+        ttk.Combobox(bar, textvariable=self.sort_var, values=("count", "rate", "last", "priority"), state="readonly",
+                     width=8).pack(side=tk.LEFT, padx=(4, 8))
+        self.status = ttk.Label(bar, text="Reading the journal...")
+        self.status.pack(side=tk.LEFT)
+        for variable in (self.priority_var, self.search_var, self.sort_var):
+            variable.trace_add("write", lambda *args: self._refresh(force=True))
+
+        columns = (("priority", "Priority", 70, tk.W), ("unit", "Unit", 180, tk.W), ("count", "Count", 70, tk.E),
+                   ("rate", f"Last {RATE_WINDOW}s", 70, tk.E), ("last", "Last Seen", 80, tk.W),
+                   ("message", "Latest Message", 500, tk.W))
+        self.tree = ttk.Treeview(self, columns=[column[0] for column in columns], show="headings", selectmode="browse")
+        for name, heading, width, anchor in columns:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, stretch=(name == "message"), anchor=anchor)
+        self.tree.tag_configure("error", foreground=JOURNAL_ERROR_COLOR)
+        self.tree.tag_configure("warning", foreground=JOURNAL_WARNING_COLOR)
+        vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        hbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.config(yscrollcommand=vbar.set, xscrollcommand=hbar.set)
+
+        bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 4))
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        vbar.grid(row=1, column=1, sticky="ns")
+        hbar.grid(row=2, column=0, sticky="ew")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+        self._poll_id = self.after(TABLE_POLL_MS, self._poll)
+
+    def feed(self, text):
+        self.analyzer.feed(text)
+
+    def finish(self):
+        self.analyzer.finish()
+
+    def destroy(self):
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+        super().destroy()
+
+    def _poll(self):
+        self._poll_id = self.after(TABLE_POLL_MS, self._poll)
+        self._refresh()
+
+    def _refresh(self, force=False):
+        """Rewrites the Treeview items in place from the analyzer's rows (when they changed)."""
+        analyzer = self.analyzer
+        if analyzer.version == self._seen_version and not force:
+            return
+        self._seen_version = analyzer.version
+        priority = self.priority_var.get()
+        rows = analyzer.rows(None if priority == "all" else self._priorities.index(priority),
+                             self.search_var.get().strip().lower(), self.sort_var.get())
+        shown = rows[:JOURNAL_VIEW_ROWS]
+        items = self.tree.get_children()
+        for slot, (level, unit, count, rate, last, message) in enumerate(shown):
+            values = (self._priorities[level] if level < len(self._priorities) else level, unit, count, rate,
+                      time.strftime("%H:%M:%S", time.localtime(last)), message)
+            tags = ("error",) if level <= 3 else ("warning",) if level == 4 else ()
+            if slot < len(items):
+                self.tree.item(items[slot], values=values, tags=tags)
+            else:
+                self.tree.insert("", tk.END, values=values, tags=tags)
+        if len(items) > len(shown):
+            self.tree.delete(*items[len(shown):])
+        text = f"{analyzer.records} records, {analyzer.distinct} distinct messages"
+        if len(rows) > JOURNAL_VIEW_ROWS:
+            text += f", top {JOURNAL_VIEW_ROWS} of {len(rows)} shown"
+        elif len(rows) != analyzer.distinct:
+            text += f", {len(rows)} shown"
+        if analyzer.malformed:
+            text += f", {analyzer.malformed} lines not journal JSON (last: {analyzer.last_malformed[:80]})"
+        self.status.config(text=text + ("" if analyzer.finished else " (reading...)"))
+
+
+# Subdirectories a DirectorySizeView lists under one directory (the largest); the rest share one item.
+DIRSIZE_VIEW_CHILDREN = 200
+# Orders a DirectorySizeView can sort the subdirectories of a directory in
+DIRSIZE_SORTS = {
+    "size": lambda node: -node.size,
+    "files": lambda node: -node.files,
+    "name": lambda node: node.name.lower(),
+}
+
+
+class DirectorySizeView(ttk.Frame):
+    """Directories below a scanned root as an expandable tree with their sizes, largest first.
+
+    Reads a wlfk_dirsize.DirectoryTree while the scan fills it in. Only the directories
+    that were expanded have items; those are updated in place and re-sorted whenever
+    the scan's version changed. Clicking a heading sorts by it.
+    """
+
+    def __init__(self, master, source, **kwargs):
+        super().__init__(master, **kwargs)
+        self.source = source
+        self.sort = "size"
+        self._seen_version = -1
+        self._poll_id = None
+
+        self.status = ttk.Label(self, text="Scanning...")
+        columns = (("size", "Size", 90, tk.E), ("share", "% of Parent", 80, tk.E), ("files", "Files", 90, tk.E),
+                   ("dirs", "Subdirectories", 100, tk.E))
+        self.tree = ttk.Treeview(self, columns=[column[0] for column in columns], selectmode="browse")
+        self.tree.heading("#0", text="Directory", command=lambda: self.sort_by("name"))
+        self.tree.column("#0", width=360, stretch=True)
+        for name, heading, width, anchor in columns:
+            sort = name if name in DIRSIZE_SORTS else "size"
+            self.tree.heading(name, text=heading, command=lambda sort=sort: self.sort_by(sort))
+            self.tree.column(name, width=width, stretch=False, anchor=anchor)
+        vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.config(yscrollcommand=vbar.set)
+        # <<TreeviewOpen>> fires before the item is marked open, so its subdirectories are added once idle.
+        self.tree.bind("<<TreeviewOpen>>", lambda event: self.after_idle(self._refresh, True))
+
+        self.status.grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 4))
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        vbar.grid(row=1, column=1, sticky="ns")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+        self._poll_id = self.after(TABLE_POLL_MS, self._poll)
+
+    def sort_by(self, sort):
+        self.sort = sort
+        self._refresh(force=True)
+
+    def destroy(self):
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+        super().destroy()
+
+    def _poll(self):
+        self._poll_id = self.after(TABLE_POLL_MS, self._poll)
+        self._refresh()
+
+    def _refresh(self, force=False):
+        source = self.source
+        if (source.version == self._seen_version and not force) or not source.nodes:
+            return
+        self._seen_version = source.version
+        if not self.tree.exists("0"):
+            self.tree.insert("", tk.END, iid="0", text=source.root, open=True)
+        self._update("0", source.nodes[0], source.nodes[0].size)
+        text = source.summary()
+        if source.last_error:
+            text += f"; last unreadable: {source.last_error[:80]}"
+        if not source.finished:
+            text += " (scanning...)"
+        elif not source.complete:
+            text += " (stopped)"
+        self.status.config(text=text)
+
+    def _update(self, item, node, parent_size):
+        """Updates a directory's item and, if it is expanded, the items of its subdirectories."""
+        self.tree.item(item, values=(format_size(node.size) + ("" if node.done else " ..."),
+                                     f"{node.size / parent_size:.0%}" if parent_size else "",
+                                     node.files, node.dirs))
+        placeholder = f"{item}:more"
+        if not self.tree.item(item, "open"):
+            # Unexpanded: a placeholder child gives it the expand arrow; its subdirectories get items when opened.
+            if node.children and not self.tree.exists(placeholder):
+                self.tree.insert(item, tk.END, iid=placeholder, text="...")
+            return
+        children = sorted(self.source.children(node.id), key=DIRSIZE_SORTS[self.sort])
+        shown = children[:DIRSIZE_VIEW_CHILDREN]
+        # Subdirectories that dropped out of the shown ones (sizes grew, or another sort) are counted in "(N more)" now.
+        shown_items = {str(child.id) for child in shown}
+        stale = [child for child in self.tree.get_children(item) if child not in shown_items and child != placeholder]
+        if stale:
+            self.tree.delete(*stale)
+        for index, child in enumerate(shown):
+            child_item = str(child.id)
+            if self.tree.exists(child_item):
+                self.tree.move(child_item, item, index)
+            else:
+                self.tree.insert(item, index, iid=child_item, text=child.name)
+            self._update(child_item, child, node.size)
+        rest = children[DIRSIZE_VIEW_CHILDREN:]
+        if rest:
+            if not self.tree.exists(placeholder):
+                self.tree.insert(item, tk.END, iid=placeholder)
+            self.tree.move(placeholder, item, tk.END)
+            self.tree.item(placeholder, text=f"({len(rest)} more)",
+                           values=(format_size(sum(child.size for child in rest)), "", "", ""))
+        elif self.tree.exists(placeholder):
+            self.tree.delete(placeholder)
@@ -0,0 +1,235 @@
+# Per-run execution telemetry: how long each command took to start, to print its first
+# byte and to finish, how much it printed, and what it cost (CPU time, peak memory).
+# Runs are kept in a local SQLite history so slow commands and regressions across OS
+# updates show up in the run statistics. This module must not import tkinter.
+import os
+import platform
+import queue
+import sqlite3
+import threading
+import time
+
+from wlfk_cache import default_cache_dir
+
+# Finished runs are written in one transaction once this many are pending...
+FLUSH_BATCH = 50
+# ...or when the oldest pending run is this many seconds old.
+FLUSH_SECONDS = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL,
+    host TEXT,
+    platform TEXT,
+    name TEXT,
+    command TEXT,
+    source TEXT,
+    state TEXT,
+    exit_code INTEGER,
+    spawn_ms REAL,
+    first_output_ms REAL,
+    wall_ms REAL,
+    stdout_bytes INTEGER,
+    stderr_bytes INTEGER,
+    cpu_user_s REAL,
+    cpu_system_s REAL,
+    max_rss_kb INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_by_entry ON runs (name, command);
+"""
+_COLUMNS = ("started_at", "host", "platform", "name", "command", "source", "state", "exit_code", "spawn_ms",
+            "first_output_ms", "wall_ms", "stdout_bytes", "stderr_bytes", "cpu_user_s", "cpu_system_s", "max_rss_kb")
+_INSERT = f"INSERT INTO runs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+
+def default_database_path():
+    return os.path.join(default_cache_dir(), "telemetry.sqlite3")
+
+
+def _milliseconds(seconds):
+    return None if seconds is None else round(seconds * 1000.0, 3)
+
+
+def max_rss_kb(rusage):
+    """ru_maxrss in KiB (Linux reports KiB, macOS bytes)."""
+    if rusage is None:
+        return None
+    return rusage.ru_maxrss // 1024 if platform.system() == "Darwin" else rusage.ru_maxrss
+
+
+def job_record(job, host=None, system=None):
+    """The telemetry row of a finished wlfk_jobs.Job, as a dict keyed by column name."""
+    started = time.time() - job.runtime
+    return {
+        "started_at": round(started, 3),
+        "host": host or platform.node(),
+        "platform": system or platform.platform(),
+        "name": job.name,
+        "command": job.command,
+        "source": job.source,
+        "state": job.state,
+        "exit_code": job.returncode,
+        "spawn_ms": _milliseconds(job.spawn_latency),
+        "first_output_ms": _milliseconds(job.first_output),
+        "wall_ms": _milliseconds(job.runtime),
+        "stdout_bytes": job.stdout_bytes,
+        "stderr_bytes": job.stderr_bytes,
+        "cpu_user_s": None if job.rusage is None else job.rusage.ru_utime,
+        "cpu_system_s": None if job.rusage is None else job.rusage.ru_stime,
+        "max_rss_kb": max_rss_kb(job.rusage),
+    }
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list (None if it is empty)."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * fraction // 1)) # ceil(n * fraction), at least 1
+    return ordered[int(rank) - 1]
+
+
+class EntryStats:
+    """Aggregated telemetry of one catalog entry (name + command)."""
+
+    def __init__(self, name, command, runs, failures, wall_ms, first_output_ms, max_rss_kb, last_run):
+        self.name = name
+        self.command = command
+        self.runs = runs
+        self.failures = failures # Runs that did not finish with exit code 0
+        self.p50_ms = percentile(wall_ms, 0.50)
+        self.p95_ms = percentile(wall_ms, 0.95)
+        self.max_ms = wall_ms[-1] if wall_ms else None
+        self.p50_first_output_ms = percentile(first_output_ms, 0.50)
+        self.max_rss_kb = max_rss_kb
+        self.last_run = last_run # time.time() of the most recent run
+
+
+class TelemetryStore:
+    """Run history in SQLite.
+
+    record() only queues the row; a writer thread inserts pending rows in batches
+    (FLUSH_BATCH rows or FLUSH_SECONDS, whichever comes first), so finishing a job
+    never waits on the disk. The writer owns its own connection; stats() opens a
+    separate, short-lived one, which SQLite's WAL mode lets read alongside it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_database_path()
+        self.host = platform.node()
+        self.system = platform.platform()
+        self._pending = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    # --- Writing ---
+
+    def record(self, job):
+        """Queues a finished job's telemetry (any thread)."""
+        self._pending.put(job_record(job, self.host, self.system))
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="wlfk-telemetry", daemon=True)
+                self._writer.start()
+
+    def flush(self):
+        """Writes everything queued so far and waits for it (call on shutdown)."""
+        with self._lock:
+            writer = self._writer
+        if writer is None:
+            return
+        done = threading.Event()
+        self._pending.put(done)
+        done.wait(FLUSH_SECONDS * 5)
+
+    def _write_loop(self):
+        try:
+            connection = self._connect()
+        except (OSError, sqlite3.Error):
+            connection = None # Telemetry is best effort; keep draining so record() never backs up
+        while True:
+            batch, waiters = [], []
+            item = self._pending.get()
+            deadline = time.monotonic() + FLUSH_SECONDS
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= FLUSH_BATCH:
+                    break
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch and connection is not None:
+                try:
+                    with connection:
+                        connection.executemany(_INSERT, [tuple(row[column] for column in _COLUMNS) for row in batch])
+                except sqlite3.Error:
+                    pass
+            for waiter in waiters:
+                waiter.set()
+
+    # --- Reading ---
+
+    def stats(self, host=None, since=None):
+        """EntryStats per catalog entry, slowest p95 first.
+
+        Only runs that actually executed the command count towards the timings (cached
+        results and in-process probes are excluded, they would hide the real cost).
+        """
+        if not os.path.exists(self.path):
+            return []
+        query = ("SELECT name, command, state, exit_code, wall_ms, first_output_ms, max_rss_kb, started_at "
+                 "FROM runs WHERE source = 'command'")
+        parameters = []
+        if host is not None:
+            query += " AND host = ?"
+            parameters.append(host)
+        if since is not None:
+            query += " AND started_at >= ?"
+            parameters.append(since)
+        connection = self._connect()
+        try:
+            rows = connection.execute(query, parameters).fetchall()
+        finally:
+            connection.close()
+
+        grouped = {}
+        for name, command, state, exit_code, wall_ms, first_output_ms, rss, started_at in rows:
+            entry = grouped.setdefault((name, command), {"runs": 0, "failures": 0, "wall": [], "first": [],
+                                                         "rss": None, "last": 0.0})
+            entry["runs"] += 1
+            if exit_code != 0:
+                entry["failures"] += 1
+            if wall_ms is not None:
+                entry["wall"].append(wall_ms)
+            if first_output_ms is not None:
+                entry["first"].append(first_output_ms)
+            if rss is not None:
+                entry["rss"] = max(entry["rss"] or 0, rss)
+            entry["last"] = max(entry["last"], started_at or 0.0)
+
+        stats = [EntryStats(name, command, entry["runs"], entry["failures"], sorted(entry["wall"]),
+                            sorted(entry["first"]), entry["rss"], entry["last"])
+                 for (name, command), entry in grouped.items()]
+        stats.sort(key=lambda entry: entry.p95_ms or 0.0, reverse=True)
+        return stats
+
+    def clear(self):
+        """Deletes the whole history."""
+        self.flush()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM runs")
+        finally:
+            connection.close()
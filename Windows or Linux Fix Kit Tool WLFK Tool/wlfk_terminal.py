@@ -0,0 +1,121 @@
+# Minimal terminal emulation between a child's pipe and the output console: incremental
+# decoding, ANSI escape stripping, and collapsing of the carriage-return redraws that
+# package managers and defrag use for their progress bars. This module must not import tkinter.
+import codecs
+import locale
+import os
+import re
+
+# Escape sequences: CSI (colours, cursor movement, erase), OSC (window title, ended by BEL
+# or ST), DCS/SOS/PM/APC strings, and the two-character escapes (ESC 7, ESC 8, ESC M, ...).
+ANSI_PATTERN = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[PX^_][^\x1b]*\x1b\\|[ -/]*[0-OQ-WYZ\\`-~])")
+# Other control characters that are never shown (NUL, BEL, VT, FF, DEL, a stray ESC, ...).
+# \t, \n, \r and \b are kept. Commands print the first few now and then; looking for
+# those with `in` first is much cheaper than running the pattern over every chunk.
+_CONTROL_PATTERN = re.compile(r"[\x00-\x07\x0b\x0c\x0e-\x1f\x7f]")
+_COMMON_CONTROLS = ("\x00", "\x07", "\x0b", "\x0c", "\x7f")
+# An escape sequence cut off by the end of a chunk is held back, up to this many characters.
+MAX_ESCAPE_LENGTH = 256
+_OVERWRITE_PATTERN = re.compile(r"([\r\b])")
+
+
+def default_encoding():
+    """Encoding of command output: the OEM code page on Windows (what console programs
+    such as chkdsk, defrag and cmd's built-ins write to a pipe), the locale's elsewhere."""
+    if os.name == "nt":
+        try:
+            return codecs.lookup("oem").name
+        except LookupError:
+            pass
+    return locale.getpreferredencoding(False)
+
+
+def strip_ansi(text):
+    """Removes escape sequences and invisible control characters from complete text."""
+    return _CONTROL_PATTERN.sub("", ANSI_PATTERN.sub("", text))
+
+
+def _overwrite(line, cursor, segment):
+    """Applies one line's worth of output containing \\r / \\b to (line, cursor) like a terminal would."""
+    for piece in _OVERWRITE_PATTERN.split(segment):
+        if piece == "\r":
+            cursor = 0
+        elif piece == "\b":
+            cursor = max(0, cursor - 1)
+        elif piece:
+            line = line[:cursor] + piece + line[cursor + len(piece):]
+            cursor += len(piece)
+    return line, cursor
+
+
+class TerminalDecoder:
+    """Turns raw pipe bytes into console text, chunk by chunk.
+
+    - bytes are decoded incrementally (a multi-byte character split across two reads
+      is kept intact) with errors replaced; \\r\\n becomes \\n
+    - escape sequences are removed, including ones split across chunks
+    - \\r and \\b redraws are applied to the current line, so of the thousands of frames
+      a progress bar prints only the last one per chunk reaches the console
+
+    The returned text is plain lines, except that it may start with a single \\r: the
+    unfinished last line shown so far was redrawn and what follows up to the next \\n
+    replaces it (OutputConsole and wlfk_console.LineBuffer understand this, as does a
+    terminal). Everything is plain appending when a command doesn't redraw.
+    """
+
+    def __init__(self, encoding=None, errors="replace"):
+        self.encoding = encoding or default_encoding()
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors=errors)
+        self._escape = "" # Unfinished escape sequence from the previous chunk
+        self._pending_cr = False # The last chunk ended in \r, possibly the first half of \r\n
+        self._line = "" # The unfinished line as emitted so far
+        self._cursor = 0
+
+    def decode(self, data, final=False):
+        text = self._decoder.decode(data, final)
+        if self._escape:
+            text = self._escape + text
+            self._escape = ""
+        if "\x1b" in text:
+            start = text.rfind("\x1b")
+            if not final and not ANSI_PATTERN.match(text, start) and len(text) - start < MAX_ESCAPE_LENGTH:
+                text, self._escape = text[:start], text[start:]
+            text = _CONTROL_PATTERN.sub("", ANSI_PATTERN.sub("", text))
+        elif any(control in text for control in _COMMON_CONTROLS):
+            text = _CONTROL_PATTERN.sub("", text)
+        if self._pending_cr:
+            text = "\r" + text
+            self._pending_cr = False
+        if text.endswith("\r") and not final:
+            text = text[:-1]
+            self._pending_cr = True
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        if not text:
+            return ""
+
+        if "\r" not in text and "\b" not in text:
+            # Fast path: nothing is redrawn.
+            if "\n" in text:
+                self._line = text[text.rfind("\n") + 1:]
+            else:
+                self._line += text
+            self._cursor = len(self._line)
+            return text
+
+        segments = text.split("\n")
+        output = []
+        # The first segment continues the unfinished line.
+        line, self._cursor = _overwrite(self._line, self._cursor, segments[0])
+        if line.startswith(self._line):
+            output.append(line[len(self._line):])
+        else:
+            output.append("\r" + line)
+        for segment in segments[1:]:
+            if "\r" in segment or "\b" in segment:
+                line, self._cursor = _overwrite("", 0, segment)
+            else:
+                line, self._cursor = segment, len(segment)
+            output.append(line)
+        self._line = line
+        return "\n".join(output)
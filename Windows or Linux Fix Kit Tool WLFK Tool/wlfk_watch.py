@@ -0,0 +1,155 @@
+# Watch mode: re-runs a read-only command on an interval, never two runs at once, and
+# works out which lines changed since the previous run so a view only redraws those.
+# A run slower than the interval makes the session back off. This module must not import tkinter.
+import difflib
+import time
+
+from wlfk_jobs import CANCELLED
+
+DEFAULT_WATCH_INTERVAL = 2.0
+MIN_WATCH_INTERVAL = 0.5
+# Shortest pause between the end of one run and the start of the next.
+MIN_WATCH_GAP = 0.2
+# A run slower than the interval doubles the delay between runs until a run takes at most
+# half of it, up to this many intervals.
+MAX_BACKOFF_FACTOR = 16
+# Lines of each run that are compared and shown; the rest is cut off.
+MAX_WATCH_LINES = 5000
+
+
+def can_watch(entry):
+    """Only read-only commands that exit on their own (and don't open a window) can be watched."""
+    return entry.read_only and not entry.follows and not entry.launches_gui
+
+
+def output_lines(text):
+    """A run's output as lines (carriage return redraws keep only the redrawn text)."""
+    lines = text.split("\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    if "\r" in text:
+        lines = [line[line.rfind("\r") + 1:] for line in lines]
+    return lines[:MAX_WATCH_LINES]
+
+
+def diff_lines(old, new):
+    """The opcodes (tag, i1, i2, j1, j2) that turn the old lines into the new ones, without the unchanged runs."""
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    return [opcode for opcode in matcher.get_opcodes() if opcode[0] != "equal"]
+
+
+class WatchSession:
+    """Runs one command again and again on a JobManager.
+
+    Like wlfk_playbooks.PlaybookRun it is driven by whoever consumes the manager's
+    events: feed() gets a run's text, job_finished() its end, and poll(), called
+    periodically, starts the next run once it is due. Not thread-safe.
+    """
+
+    def __init__(self, manager, name, command, interval=DEFAULT_WATCH_INTERVAL, timeout=None, probe=None,
+                 encoding=None):
+        self.manager = manager
+        self.name = name
+        self.command = command
+        self.interval = max(MIN_WATCH_INTERVAL, interval)
+        self.timeout = timeout
+        self.probe = probe
+        self.encoding = encoding
+        self.delay = self.interval # Start-to-start time between runs; grows while runs are slow
+        self.job = None # The run in progress
+        self.last_job = None
+        self.last_ended = None # time.time() the last finished run ended
+        self.runs = 0
+        self.lines = [] # Output of the last finished run
+        self.opcodes = [] # diff_lines() from the run before it
+        self.next_at = None # time.monotonic() the next run is due
+        self.stopped = False
+        self.stop_reason = None # Why the session stopped itself, e.g. a run was cancelled
+        self._output = []
+
+    def start(self):
+        return self._submit()
+
+    def owns(self, job):
+        return job is self.job
+
+    def feed(self, job, text):
+        if job is self.job:
+            self._output.append(text)
+
+    def job_finished(self, job):
+        """Diffs a finished run against the previous one and schedules the next. Returns True if lines/opcodes changed."""
+        if job is not self.job:
+            return False
+        self.job = None
+        self.last_job = job
+        self.manager.forget(job) # Runs have no tab; the session keeps the last one
+        if self.stopped:
+            return False
+        if job.state == CANCELLED:
+            # Cancelled from outside (e.g. Cancel Job): stop, instead of waiting for a next run nothing schedules.
+            self.stop(f"run {self.runs + 1} was cancelled")
+            return False
+        lines = output_lines("".join(self._output))
+        self._output = []
+        self.opcodes = diff_lines(self.lines, lines)
+        self.lines = lines
+        self.runs += 1
+        self.last_ended = time.time()
+        runtime = job.runtime
+        if runtime > self.interval:
+            while self.delay < 2 * runtime and self.delay < self.interval * MAX_BACKOFF_FACTOR:
+                self.delay *= 2
+        elif runtime * 2 <= self.delay:
+            self.delay = self.interval # Only once runs are well within the delay again
+        self.next_at = time.monotonic() + max(self.delay - runtime, MIN_WATCH_GAP)
+        return True
+
+    def poll(self):
+        """Starts the next run if it is due; returns its job, or None."""
+        if self.stopped or self.job is not None or self.next_at is None or time.monotonic() < self.next_at:
+            return None
+        return self._submit()
+
+    def stop(self, reason=None):
+        """Stops watching. A run in progress is cancelled; pass its end to job_finished() so it is forgotten."""
+        self.stopped = True
+        self.stop_reason = self.stop_reason or reason
+        if self.job is not None:
+            self.manager.cancel(self.job)
+            if self.job.done: # Cancelled before it started
+                self.manager.forget(self.job)
+                self.job = None
+
+    @property
+    def backing_off(self):
+        return self.delay > self.interval
+
+    @property
+    def changed_count(self):
+        """Lines of the last run that are new or different."""
+        return sum(j2 - j1 for _, _, _, j1, j2 in self.opcodes)
+
+    def status(self):
+        """One-line summary of the last run, e.g. 'Every 2s - run 5 at 12:00:01 (0.3s): 3 lines changed'."""
+        if self.stopped:
+            return f"Stopped after {self.runs} runs" + (f": {self.stop_reason}." if self.stop_reason else ".")
+        job = self.last_job
+        if job is None:
+            return f"Every {self.interval:g}s - first run..."
+        ended = time.strftime('%H:%M:%S', time.localtime(self.last_ended))
+        text = (f"Every {self.interval:g}s - run {self.runs} at {ended} ({job.runtime:.1f}s): "
+                f"{self.changed_count if self.runs > 1 else len(self.lines)} lines {'changed' if self.runs > 1 else 'shown'}")
+        if job.returncode not in (None, 0):
+            text += f", exit code {job.returncode}"
+        if self.backing_off:
+            text += f"; slower than the interval, now every {self.delay:g}s"
+        return text
+
+    def _submit(self):
+        self._output = []
+        self.next_at = None
+        # Not spooled or recorded: a watch would otherwise push real runs out of the run history.
+        self.job = self.manager.submit(self.name, self.command, timeout=self.timeout, probe=self.probe,
+                                       encoding=self.encoding, history=False)
+        return self.job
@@ -0,0 +1,442 @@
+# Job worker process for the GUI: its JobManager runs in a child process, so starting
+# commands, reading and decoding their output, parsing it into table rows or a journal
+# aggregate, directory scans, spooling and telemetry never compete with the Tk loop for
+# the interpreter.
+# The GUI talks to it through a WorkerJobManager, which stands in for a JobManager; output
+# comes back over a pipe, coalesced into chunks, and the GUI takes at most
+# DRAIN_CHARS_PER_POLL of it per poll. Backpressure goes all the way to the commands: a pipe
+# the GUI doesn't empty blocks the worker's sender, the worker's bounded event queue fills
+# up, the job's pipe readers block and finally the command blocks on its own stdout.
+# This module must not import tkinter.
+import collections
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+
+from wlfk_dirsize import DirectoryTree, DirNode
+from wlfk_jobs import DEFAULT_MAX_JOBS, KILL_GRACE_SECONDS, QUEUED, RUNNING, FAILED, Job, JobManager
+
+# Events the worker's JobManager holds before the job's pipe readers block.
+MAX_WORKER_EVENTS = 256
+# Characters of output the worker coalesces into one message to the GUI.
+MAX_MESSAGE_CHARS = 256 * 1024
+# Characters of output the GUI takes from the pipe per poll; the rest waits in the pipe.
+DRAIN_CHARS_PER_POLL = 1024 * 1024
+# Seconds between the journal aggregates (and directory scan updates) sent while a job runs.
+AGGREGATE_SECONDS = 0.5
+# Job attributes sent to the GUI's copy of a job with every state change.
+STATE_ATTRIBUTES = ("state", "returncode", "started", "ended", "cached_at", "run_id", "source", "spawn_latency",
+                    "first_output", "stdout_bytes", "stderr_bytes")
+WORKER_LOST_MESSAGE = "\n--- ERROR: The job worker process exited unexpectedly; this job's output is incomplete. ---\n"
+
+
+class RemoteTable:
+    """Stands in for a wlfk_parsers.TableBuilder in the GUI: the rows are parsed in the worker.
+
+    Like the builder's, rows and search_text only ever grow, and version goes up whenever
+    rows arrive or parsing finished; feed() and finish() have nothing left to do.
+    """
+
+    def __init__(self, table):
+        from wlfk_parsers import PARSERS
+        self.columns = PARSERS[table].columns
+        self.rows = []
+        self.search_text = []
+        self.version = 0
+        self.finished = False
+
+    def feed(self, text):
+        pass
+
+    def finish(self):
+        pass
+
+    def extend(self, rows, search_text, finished):
+        self.search_text.extend(search_text)
+        self.rows.extend(rows)
+        self.finished = finished
+        self.version += 1
+
+
+class RemoteJournal:
+    """Stands in for a wlfk_journal.JournalAnalyzer in the GUI: the last aggregate the worker sent."""
+
+    def __init__(self):
+        self.records = 0
+        self.matched = 0
+        self.malformed = 0
+        self.last_malformed = None
+        self.distinct = 0
+        self.finished = False
+        self.version = 0
+        self._rows = []
+
+    def feed(self, text):
+        pass
+
+    def finish(self):
+        pass
+
+    def update(self, summary):
+        self._rows = summary.pop("rows")
+        for name, value in summary.items():
+            setattr(self, name, value)
+        self.version += 1
+
+    def rows(self, max_priority=None, search=None, sort="count"):
+        from wlfk_journal import select_rows
+        return select_rows(self._rows, max_priority, search, sort)
+
+
+class RemoteDirectoryTree(DirectoryTree):
+    """Stands in for a wlfk_dirsize.DirectoryScan in the GUI: the directories as the worker last sent them."""
+
+    def update(self, changes, stats):
+        nodes = self.nodes
+        for node_id, parent, name, size, files, dirs, done in changes: # New nodes come in id order, parents first
+            if node_id == len(nodes):
+                node = DirNode(node_id, parent, name)
+                nodes.append(node)
+                if parent is not None:
+                    nodes[parent].children.append(node_id)
+            else:
+                node = nodes[node_id]
+            node.size, node.files, node.dirs, node.done = size, files, dirs, done
+        for name, value in stats.items():
+            setattr(self, name, value)
+        self.version += 1
+
+
+def _journal_summary(analyzer):
+    return {"records": analyzer.records, "matched": analyzer.matched, "malformed": analyzer.malformed,
+            "last_malformed": analyzer.last_malformed, "distinct": analyzer.distinct,
+            "finished": analyzer.finished, "rows": analyzer.rows()}
+
+
+def _scan_stats(scan):
+    return {"errors": scan.errors, "last_error": scan.last_error, "cached": scan.cached, "finished": scan.finished,
+            "complete": scan.complete}
+
+
+class _Worker:
+    """The worker process's side: runs the commands the GUI sends and forwards their events.
+
+    The command loop (main thread) and the forwarder thread share the connection, one
+    direction each. The worker's JobManager numbers jobs in the order they are submitted,
+    like WorkerJobManager does, so a job has the same id in both processes.
+    """
+
+    def __init__(self, connection, manager):
+        self.connection = connection
+        self.manager = manager
+        # job id -> (kind, object) making what the GUI shows of a job: ("table", TableBuilder),
+        # ("journal", JournalAnalyzer) fed with its output, or ("dirsize", DirectoryScan) run as its task
+        self.parsers = {}
+        self.sent_rows = {} # job id -> table rows sent so far
+        self.aggregate_due = {} # job id -> time.monotonic() the changed journal aggregate is to be sent
+        self.aggregate_sent = {} # job id -> time.monotonic() it was last sent
+        self.closed = False # The GUI is gone: events are dropped so the job readers never block
+
+    def serve(self):
+        threading.Thread(target=self._forward, name="wlfk-forward", daemon=True).start()
+        while True:
+            try:
+                message = self.connection.recv()
+            except (EOFError, OSError):
+                break # The GUI exited (or crashed)
+            kind = message[0]
+            if kind == "submit":
+                _, job_id, name, command, options, parse = message
+                if parse is not None:
+                    self.parsers[job_id] = self._parser(parse)
+                    if parse[0] == "dirsize":
+                        options["task"] = self.parsers[job_id][1].task
+                self.manager.submit(name, command, **options)
+            elif kind == "shutdown":
+                break
+            else:
+                job = self.manager.jobs.get(message[1])
+                if job is not None:
+                    getattr(self.manager, kind)(job) # cancel or forget
+        self.manager.shutdown()
+        # Give the cancelled jobs time to kill their process groups before the process exits.
+        deadline = time.monotonic() + KILL_GRACE_SECONDS + 1
+        while self.manager.running_count() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    @staticmethod
+    def _parser(parse):
+        if parse[0] == "table":
+            from wlfk_parsers import TableBuilder
+            return "table", TableBuilder(parse[1])
+        if parse[0] == "dirsize":
+            from wlfk_dirsize import DirectoryCache, DirectoryScan
+            return "dirsize", DirectoryScan(parse[1], DirectoryCache(), refresh=parse[2])
+        from wlfk_journal import JournalAnalyzer
+        return "journal", JournalAnalyzer(*parse[1:])
+
+    def _forward(self):
+        """Sends the manager's events to the GUI in batches, text of the same job joined."""
+        events = self.manager.events
+        while True:
+            try:
+                item = events.get(timeout=AGGREGATE_SECONDS)
+            except queue.Empty:
+                item = None
+            batch = []
+            size = 0
+            while item is not None:
+                size += self._add(batch, *item)
+                if size >= MAX_MESSAGE_CHARS:
+                    break
+                try:
+                    item = events.get_nowait()
+                except queue.Empty:
+                    item = None
+            self._add_parsed(batch, time.monotonic())
+            if not batch or self.closed:
+                continue
+            for message in batch:
+                if message[0] == "text":
+                    message[2] = "".join(message[2])
+            try:
+                self.connection.send(batch) # Blocks while the GUI's end of the pipe is full
+            except (OSError, ValueError):
+                self.closed = True
+
+    def _add(self, batch, job, kind, payload):
+        """Adds one event to a batch; returns the characters of output it added."""
+        kind_parser = self.parsers.get(job.id)
+        if kind == "text":
+            if kind_parser is not None:
+                if kind_parser[0] == "dirsize":
+                    return 0 # The scan's summary; the GUI shows the tree
+                kind_parser[1].parse(payload)
+                if kind_parser[0] == "journal":
+                    if job.id not in self.aggregate_due:
+                        self.aggregate_due[job.id] = self.aggregate_sent.get(job.id, 0) + AGGREGATE_SECONDS
+                    return 0 # Only the aggregate is shown, not the JSON it was made from
+            if batch and batch[-1][0] == "text" and batch[-1][1] == job.id:
+                batch[-1][2].append(payload)
+            else:
+                batch.append(["text", job.id, [payload]])
+            return len(payload)
+        if payload not in (QUEUED, RUNNING) and kind_parser is not None:
+            # All of the job's output has been added: its last rows (or aggregate) go before its end.
+            if kind_parser[0] != "dirsize":
+                kind_parser[1].parse(None)
+            self.aggregate_due[job.id] = 0
+            self._add_parsed(batch, time.monotonic(), job.id)
+            del self.parsers[job.id]
+            self.sent_rows.pop(job.id, None)
+            self.aggregate_sent.pop(job.id, None)
+        batch.append(("state", job.id, {name: getattr(job, name) for name in STATE_ATTRIBUTES}))
+        return 0
+
+    def _add_parsed(self, batch, now, only=None):
+        """Adds the new table rows, the journal aggregates that are due and the scan's changed directories."""
+        for job_id, (kind, parser) in list(self.parsers.items()): # The command loop adds parsers
+            if only is not None and job_id != only:
+                continue
+            if kind == "table":
+                sent = self.sent_rows.get(job_id, 0)
+                if len(parser.rows) > sent or parser.finished:
+                    batch.append(("rows", job_id, parser.rows[sent:], parser.search_text[sent:], parser.finished))
+                    self.sent_rows[job_id] = len(parser.rows)
+            elif kind == "journal":
+                if self.aggregate_due.get(job_id, now + 1) <= now:
+                    batch.append(("aggregate", job_id, _journal_summary(parser)))
+                    del self.aggregate_due[job_id]
+                    self.aggregate_sent[job_id] = now
+            elif self.aggregate_due.get(job_id, now + 1) <= now or \
+                    now >= self.aggregate_sent.get(job_id, 0) + AGGREGATE_SECONDS: # Scans send updates on a clock
+                changes = parser.changes()
+                if changes or parser.finished:
+                    batch.append(("dirsize", job_id, changes, _scan_stats(parser)))
+                self.aggregate_due.pop(job_id, None)
+                self.aggregate_sent[job_id] = now
+
+
+def _worker_main(connection, max_jobs, broker):
+    """Entry point of the worker process."""
+    from wlfk_cache import ResultCache
+    from wlfk_telemetry import TelemetryStore
+    from wlfk_spool import SpoolStore
+    if broker:
+        from wlfk_broker import PrivilegeBroker
+        broker = PrivilegeBroker()
+    manager = JobManager(max_jobs=max_jobs, cache=ResultCache(), telemetry=TelemetryStore(),
+                         spool=SpoolStore(flush_writes=True), # The GUI reads the logs of running jobs
+                         broker=broker or None, max_events=MAX_WORKER_EVENTS)
+    _Worker(connection, manager).serve()
+
+
+class _WorkerEvents:
+    """The events of a WorkerJobManager, read from the worker's pipe through a queue.Queue's get_nowait().
+
+    Every call that finds nothing more to return ends a poll; one poll takes at most
+    DRAIN_CHARS_PER_POLL of output (plus the message that crosses it) off the pipe.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._ready = collections.deque()
+        self._budget = DRAIN_CHARS_PER_POLL
+
+    def get_nowait(self):
+        while not self._ready:
+            if self._budget <= 0 or not self.manager._receive(self._ready):
+                self._budget = DRAIN_CHARS_PER_POLL
+                raise queue.Empty
+        item = self._ready.popleft()
+        if item[1] == "text":
+            self._budget -= len(item[2])
+        return item
+
+    def empty(self):
+        return not self._ready and not self.manager._waiting()
+
+
+class WorkerJobManager:
+    """A JobManager whose jobs run in a worker process (see the module comment).
+
+    Has the JobManager methods and attributes the GUI uses. jobs holds the GUI's copies
+    of the jobs, updated with every state event; spool, if given, reads the run logs
+    the worker writes (the worker records telemetry itself). Jobs submitted with table=
+    or journal= have their output parsed in the worker, and scan= jobs are directory
+    scans; parsed(job) is what the GUI shows of them. broker=True runs root commands
+    through a wlfk_broker.PrivilegeBroker.
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, broker=False, spool=None):
+        # A fresh interpreter rather than a fork of one running Tk and its threads.
+        context = multiprocessing.get_context("spawn")
+        self._connection, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, max_jobs, broker), name="wlfk-worker")
+        self.process.start()
+        child.close()
+        self.spool = spool
+        self.jobs = {}
+        self.events = _WorkerEvents(self)
+        self._parsed = {}
+        self._ids = itertools.count(1)
+        self._lost = False
+        self._lost_events = [] # Events ending the jobs the lost worker had, not returned by _receive yet
+
+    def submit(self, name, command, table=None, journal=None, scan=None, **options):
+        """Queues a command in the worker and returns the GUI's copy of its Job.
+
+        table is a wlfk_parsers parser name, journal a (max_priority, units) pair for a
+        wlfk_journal.JournalAnalyzer; with scan, a (root, refresh) pair, the job is a
+        wlfk_dirsize.DirectoryScan instead of the command. The other options are
+        JobManager.submit()'s.
+        """
+        job = Job(next(self._ids), name, command, options.get("timeout"), options.get("launches_gui", False),
+                  options.get("probe"), options.get("cache_paths"), options.get("refresh", False),
+                  options.get("encoding"), options.get("history", True))
+        self.jobs[job.id] = job
+        parse = None
+        if table:
+            parse, self._parsed[job.id] = ("table", table), RemoteTable(table)
+        elif journal is not None:
+            parse, self._parsed[job.id] = ("journal",) + tuple(journal), RemoteJournal()
+        elif scan is not None:
+            parse, self._parsed[job.id] = ("dirsize",) + tuple(scan), RemoteDirectoryTree(scan[0])
+        self._send(("submit", job.id, name, command, options, parse))
+        if self._lost and not job.done:
+            self._lost_events += self._fail(job) # Nothing will run it
+        return job
+
+    def parsed(self, job):
+        """The RemoteTable, RemoteJournal or RemoteDirectoryTree of a job submitted with table=, journal= or scan=."""
+        return self._parsed.get(job.id)
+
+    def cancel(self, job):
+        """Stops a job (the state change arrives as an event)."""
+        job.cancel_event.set()
+        self._send(("cancel", job.id))
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            if not job.done:
+                self.cancel(job)
+
+    def forget(self, job):
+        if job.done:
+            self.jobs.pop(job.id, None)
+            self._parsed.pop(job.id, None)
+            self._send(("forget", job.id))
+
+    def running_count(self):
+        return sum(1 for job in self.jobs.values() if not job.done)
+
+    def shutdown(self):
+        """Tells the worker to cancel everything and exit, without waiting for it."""
+        self._send(("shutdown",))
+        self._connection.close() # Also unblocks the worker if it is sending
+
+    def _send(self, message):
+        if self._lost:
+            return
+        try:
+            self._connection.send(message)
+        except (OSError, ValueError):
+            self._worker_lost()
+
+    def _waiting(self):
+        """True if a batch from the worker (or the events of losing it) is waiting."""
+        if self._lost:
+            return bool(self._lost_events)
+        try:
+            return self._connection.poll()
+        except (OSError, ValueError):
+            return False
+
+    def _receive(self, ready):
+        """Turns the next batch from the worker (if one is waiting) into events. Returns False if none was."""
+        if not self._lost:
+            try:
+                if not self._connection.poll():
+                    return False
+                batch = self._connection.recv()
+            except (EOFError, OSError, ValueError):
+                self._worker_lost()
+        if self._lost:
+            # However the loss was noticed (here or by a failed send), its events are returned once.
+            events, self._lost_events = self._lost_events, []
+            ready.extend(events)
+            return bool(events)
+        for message in batch:
+            kind, job_id, payload = message[:3]
+            job = self.jobs.get(job_id)
+            if kind == "text":
+                if job is not None:
+                    ready.append((job, "text", payload))
+            elif kind == "state":
+                if job is not None:
+                    for name, value in payload.items():
+                        setattr(job, name, value)
+                    ready.append((job, "state", job.state))
+            elif job_id in self._parsed:
+                if kind == "rows":
+                    self._parsed[job_id].extend(payload, *message[3:])
+                else:
+                    self._parsed[job_id].update(payload, *message[3:]) # aggregate or dirsize
+        return True
+
+    def _worker_lost(self):
+        """Ends the jobs that were queued or running in the worker; their events are returned by the next _receive."""
+        if self._lost:
+            return
+        self._lost = True
+        self._connection.close()
+        for job in self.jobs.values():
+            if not job.done:
+                self._lost_events += self._fail(job)
+
+    def _fail(self, job):
+        job.state = FAILED
+        job.ended = time.monotonic()
+        return [(job, "text", WORKER_LOST_MESSAGE), (job, "state", FAILED)]